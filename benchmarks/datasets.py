@@ -0,0 +1,22 @@
+"""
+Synthetic inputs shared by the tests and the benchmarks.
+"""
+
+import json
+
+def build_transaction_log(n_events: int, n_orders: int) -> list:
+    # every event type of the logs, the ADJUSTMENT payloads repeat a few templates, AUTH / DASHER_ONLINE have no order_id
+    events = []
+    reasons = ["Customer complaint", "Missing item", "Late delivery"]
+    for i in range(n_events):
+        tr_type = ("CHARGE", "DASHER_PAY", "CHARGE", "REFUND", "ADJUSTMENT", "AUTH", "DASHER_ONLINE")[i % 7]
+        tr = {"event_id": f"evt-{i}", "type": tr_type, "order_id": f"order-{i % n_orders}", "amount": round(1 + (i % 97) * 0.35, 2)}
+        if tr_type == "ADJUSTMENT":
+            del tr["amount"]
+            tr["payload"] = json.dumps({"reason": reasons[i % 3], "amount": -round((i % 5) * 1.25, 2)})
+        if tr_type in ("AUTH", "DASHER_ONLINE"):
+            del tr["order_id"]
+            del tr["amount"]
+            tr["dasher_id"] = f"d-{i % 50}"
+        events.append(tr)
+    return events
@@ -0,0 +1,499 @@
+"""
+Benchmarks of solutions.delivery_assignment:
+    find_best_dasher              linear scan against the grid index
+    calculate_distances           pair by pair against the vectorized batch
+    assign_orders                 greedy assign_order against batch matching
+    dasher_registry               repository query against the registry reads and change feed
+    concurrent_assign_order       assignments per second with 1 to 8 threads
+    write_behind                  synchronous saves against the write-behind queue
+    sqlite_repositories           SQLite saves, bulk saves and bounding box queries
+    caching_distance_service      distance cache hit ratio and cost per pair
+    travel_time_matrix            matrix build, lookups and batch against a routing call
+    scoring_pipeline              pruned against exhaustive scoring
+    delivery_simulator            a simulated hour per engine and repository backend
+    fleet_memory                  bytes per dasher and access time of dataclass, slotted and Fleet dashers
+
+    python -m benchmarks.delivery_assignment
+"""
+
+import contextlib
+import io
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+import numpy as np
+
+from benchmarks.delivery_simulator import DeliverySimulator, SimulationConfig
+from solutions.dasher_index import DasherGridIndex
+from solutions.delivery_assignment import (
+    AcceptanceCriterion, ConcurrentDeliveryAssignmentService, DasherChangeFeed, DasherChangeType, DasherRegistry,
+    DeliveryAssignmentService, DistanceCriterion, Fleet, HeadingCriterion, LoadCriterion, ScoringPipeline
+)
+from solutions.delivery_distances import (
+    build_travel_time_matrix, CachingDistanceService, DistanceService, EARTH_RADIUS_KM, RoadGraph, _travel_times_to,
+    TravelTimeDistanceService, TravelTimeGrid, TravelTimeMatrix
+)
+from solutions.delivery_model import Dasher, DasherRepository, Location, Order, OrderRepository, OrderStatus
+from solutions.delivery_persistence import (
+    SqliteConnectionPool, SqliteDasherRepository, SqliteOrderRepository, WriteBehindDasherRepository,
+    WriteBehindOrderRepository, WriteBehindQueue
+)
+
+def calculate_distances_benchmark():
+    class QuietDistanceService(DistanceService):
+        def calculate_distance(self, loc1, loc2):
+            return math.sqrt((loc1.latitude - loc2.latitude)**2 + (loc1.longitude - loc2.longitude)**2)
+
+    rng = random.Random(2)
+    origin = Location(43.65, -79.38)
+    quiet = QuietDistanceService()
+    service = DistanceService()
+    for n_candidates in (10, 100, 1000, 10000, 100000):
+        dashers = [Dasher(f"d_{i}", Location(43.5 + rng.random() * 0.3, -79.6 + rng.random() * 0.3), True) for i in range(n_candidates)]
+        latitudes = np.array([dasher.location.latitude for dasher in dashers])
+        longitudes = np.array([dasher.location.longitude for dasher in dashers])
+        repeat = max(1, 100000 // n_candidates)
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            [quiet.calculate_distance(dasher.location, origin) for dasher in dashers]
+        loop_time = (time.perf_counter() - start) / repeat
+        timings = []
+        for metric in ("euclidean", "haversine"):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                service.calculate_distances(origin, latitudes, longitudes, metric)
+            timings.append((time.perf_counter() - start) / repeat)
+        print(f"{n_candidates:>6} candidates: loop {loop_time * 1e6:9.1f} us, batch euclidean {timings[0] * 1e6:7.1f} us "
+              f"({loop_time / timings[0]:.0f}x), batch haversine {timings[1] * 1e6:7.1f} us")
+
+def assign_orders_benchmark(n_orders: int = 1000, n_dashers: int = 1500):
+    def make():
+        rng = random.Random(4)
+        dashers = [Dasher(f"d_{i}", Location(43.5 + rng.random() * 0.3, -79.6 + rng.random() * 0.3), True) for i in range(n_dashers)]
+        orders = [Order(f"o_{i}", Location(43.5 + rng.random() * 0.3, -79.6 + rng.random() * 0.3), Location(43.6, -79.5), OrderStatus.PENDING)
+                  for i in range(n_orders)]
+        return dashers, orders
+
+    class QuietRepository(DasherRepository):
+        def __init__(self, dashers):
+            self.dashers = dashers
+        def get_available_dashers(self):
+            return [dasher for dasher in self.dashers if dasher.is_available]
+        def save(self, dasher):
+            pass
+
+    class QuietOrderRepository(OrderRepository):
+        def save(self, order):
+            pass
+
+    def total_km(orders, deliveries, dashers):
+        by_id = {dasher.dasher_id: dasher for dasher in dashers}
+        locations = {order.order_id: order.order_location for order in orders}
+        service = DistanceService("haversine")
+        return sum(
+            service.calculate_distances(locations[delivery.order_id], np.array([by_id[delivery.dasher_id].location.latitude]),
+                                        np.array([by_id[delivery.dasher_id].location.longitude]))[0]
+            for delivery in deliveries
+        )
+
+    results = []
+    for name in ("greedy assign_order", "assign_orders"):
+        dashers, orders = make()
+        index = DasherGridIndex.from_dashers(dashers)
+        service = DeliveryAssignmentService(QuietOrderRepository(), QuietRepository(dashers), DistanceService(), index)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            if name == "assign_orders":
+                deliveries = service.assign_orders(orders)
+            else:
+                deliveries = [service.assign_order(order) for order in orders]
+        elapsed = time.perf_counter() - start
+        results.append(total_km(orders, deliveries, dashers))
+        print(f"{name:<20} {n_orders} orders / {n_dashers} dashers: {elapsed * 1000:7.1f} ms, "
+              f"{len(deliveries)} assigned, total pickup distance {results[-1]:.0f} km")
+    print(f"batch matching saves {100 * (1 - results[1] / results[0]):.1f}% of the total pickup distance")
+
+def dasher_registry_benchmark(n_dashers: int = 20000, n_reads: int = 200):
+    class TableRepository(DasherRepository):
+        # stands for the database: every query builds the dashers again from the rows
+        def __init__(self, rows):
+            self.rows = rows
+        def get_available_dashers(self):
+            return [Dasher(dasher_id, Location(latitude, longitude), True) for dasher_id, latitude, longitude in self.rows]
+
+    rng = random.Random(6)
+    rows = [(f"d_{i}", 43.5 + rng.random() * 0.3, -79.6 + rng.random() * 0.3) for i in range(n_dashers)]
+    repository = TableRepository(rows)
+    start = time.perf_counter()
+    for _ in range(n_reads // 10):
+        repository.get_available_dashers()
+    query_time = (time.perf_counter() - start) / (n_reads // 10)
+
+    feed = DasherChangeFeed()
+    tracemalloc.start()
+    registry = DasherRegistry(repository, feed)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(n_reads):
+        registry.refresh()
+        registry.available_dashers()
+    read_time = (time.perf_counter() - start) / n_reads
+
+    changes = [(DasherChangeType.LOCATION, f"d_{rng.randrange(n_dashers)}", Location(43.6, -79.4)) for _ in range(10000)]
+    for change_type, dasher_id, location in changes:
+        feed.publish(change_type, dasher_id, location)
+    start = time.perf_counter()
+    registry.refresh()
+    apply_time = (time.perf_counter() - start) / len(changes)
+    print(f"{n_dashers} dashers: repository query {query_time * 1000:.1f} ms, registry read {read_time * 1e6:.2f} us, "
+          f"change applied in {apply_time * 1e6:.2f} us, registry memory {memory / n_dashers:.0f} bytes per dasher")
+
+def concurrent_assign_order_benchmark(n_orders: int = 2000, save_seconds: float = 0.0005):
+    class SlowRepository(DasherRepository):
+        def get_available_dashers(self):
+            return []
+        def save(self, dasher):
+            time.sleep(save_seconds)
+
+    class SlowOrderRepository(OrderRepository):
+        def save(self, order):
+            time.sleep(save_seconds)
+
+    for n_threads in (1, 2, 4, 8):
+        rng = random.Random(9)
+        dashers = [Dasher(f"d_{i}", Location(43.5 + rng.random() * 0.3, -79.6 + rng.random() * 0.3), True) for i in range(n_orders)]
+        orders = [Order(f"o_{i}", Location(43.5 + rng.random() * 0.3, -79.6 + rng.random() * 0.3), Location(43.6, -79.5), OrderStatus.PENDING)
+                  for i in range(n_orders)]
+        service = ConcurrentDeliveryAssignmentService(SlowOrderRepository(), SlowRepository(), DistanceService(), DasherGridIndex.from_dashers(dashers))
+        start = time.perf_counter()
+        threads = [threading.Thread(target=lambda worker=worker: [service.assign_order(order) for order in orders[worker::n_threads]])
+                   for worker in range(n_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        assert not any(dasher.is_available for dasher in dashers)
+        print(f"{n_threads} threads: {n_orders / elapsed:7.0f} assignments/s, lost races {next(service.reservations.lost_races)}")
+
+def write_behind_benchmark(n_orders: int = 1000, round_trip_seconds: float = 0.001):
+    class StorageRepository(DasherRepository):
+        # every call is a round trip to the storage, whatever the number of rows
+        def get_available_dashers(self):
+            return []
+        def save(self, entity):
+            time.sleep(round_trip_seconds)
+        def save_many(self, entities):
+            time.sleep(round_trip_seconds)
+
+    for name in ("synchronous saves", "write-behind"):
+        rng = random.Random(10)
+        dashers = [Dasher(f"d_{i}", Location(43.5 + rng.random() * 0.3, -79.6 + rng.random() * 0.3), True) for i in range(n_orders)]
+        orders = [Order(f"o_{i}", Location(43.5 + rng.random() * 0.3, -79.6 + rng.random() * 0.3), Location(43.6, -79.5), OrderStatus.PENDING)
+                  for i in range(n_orders)]
+        queue = None
+        order_repository, dasher_repository = StorageRepository(), StorageRepository()
+        if name == "write-behind":
+            queue = WriteBehindQueue()
+            order_repository = WriteBehindOrderRepository(order_repository, queue)
+            dasher_repository = WriteBehindDasherRepository(dasher_repository, queue)
+        service = DeliveryAssignmentService(order_repository, dasher_repository, DistanceService(), DasherGridIndex.from_dashers(dashers))
+
+        latencies = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for order in orders:
+                start = time.perf_counter()
+                service.assign_order(order)
+                latencies.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        if queue is not None:
+            queue.close()
+        close_time = time.perf_counter() - start
+        latencies.sort()
+        p50, p99 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+        print(f"{name:<18} p50 {p50 * 1e6:7.0f} us, p99 {p99 * 1e6:7.0f} us, total {sum(latencies):.2f} s"
+              + (f", {queue.flushes} bulk writes, close {close_time * 1000:.0f} ms" if queue else ""))
+
+def sqlite_repositories_benchmark(n_dashers: int = 20000, n_threads: int = 4):
+    rng = random.Random(12)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pool = SqliteConnectionPool(os.path.join(tmp_dir, "delivery.sqlite"), size=n_threads)
+        repository = SqliteDasherRepository(pool)
+        dashers = [Dasher(f"d_{i}", Location(43.5 + rng.random() * 0.3, -79.6 + rng.random() * 0.3), rng.random() < 0.5)
+                   for i in range(n_dashers)]
+
+        start = time.perf_counter()
+        for dasher in dashers[:2000]:
+            repository.save(dasher)
+        single_time = (time.perf_counter() - start) / 2000
+        start = time.perf_counter()
+        repository.save_many(dashers)
+        bulk_time = (time.perf_counter() - start) / n_dashers
+
+        start = time.perf_counter()
+        for _ in range(20):
+            available = repository.get_available_dashers()
+        available_time = (time.perf_counter() - start) / 20
+        targets = [Location(43.5 + rng.random() * 0.3, -79.6 + rng.random() * 0.3) for _ in range(1000)]
+        start = time.perf_counter()
+        for target in targets:
+            repository.get_available_dashers_near(target, 0.01)
+        near_time = (time.perf_counter() - start) / len(targets)
+
+        def reader(worker):
+            for target in targets[worker::n_threads]:
+                repository.get_available_dashers_near(target, 0.01)
+        threads = [threading.Thread(target=reader, args=(worker, )) for worker in range(n_threads)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        pooled_time = time.perf_counter() - start
+        print(f"SQLite {n_dashers} dashers: save {1 / single_time:,.0f} rows/s, save_many {1 / bulk_time:,.0f} rows/s, "
+              f"available ({len(available)}) {available_time * 1000:.1f} ms, bounding box {near_time * 1e6:.0f} us, "
+              f"{n_threads} threads {len(targets) / pooled_time:,.0f} bounding box queries/s")
+        pool.close()
+
+def caching_distance_service_benchmark(n_queries: int = 200000, n_hotspots: int = 50, n_restaurants: int = 200):
+    class RouteDistanceService(DistanceService):
+        def calculate_distance(self, loc1, loc2):
+            # stands in for a road ETA: haversine summed along a 20 segment route, about 15 us per pair
+            total = 0.0
+            steps = 20
+            for step in range(steps):
+                lat1 = math.radians(loc1.latitude + (loc2.latitude - loc1.latitude) * step / steps)
+                lat2 = math.radians(loc1.latitude + (loc2.latitude - loc1.latitude) * (step + 1) / steps)
+                dlon = math.radians(loc2.longitude - loc1.longitude) / steps
+                a = math.sin((lat2 - lat1) / 2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2)**2
+                total += 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+            return total
+
+    rng = random.Random(21)
+    hotspots = [(43.5 + rng.random() * 0.3, -79.6 + rng.random() * 0.3) for _ in range(n_hotspots)]
+    restaurants = [Location(43.5 + rng.random() * 0.3, -79.6 + rng.random() * 0.3) for _ in range(n_restaurants)]
+    pairs = []
+    for _ in range(n_queries):
+        latitude, longitude = rng.choice(hotspots)
+        # dashers wait within about 20 m of a hotspot
+        pairs.append((Location(latitude + rng.uniform(-2e-4, 2e-4), longitude + rng.uniform(-2e-4, 2e-4)), rng.choice(restaurants)))
+
+    service = RouteDistanceService()
+    start = time.perf_counter()
+    for loc1, loc2 in pairs:
+        service.calculate_distance(loc1, loc2)
+    direct_time = (time.perf_counter() - start) / n_queries
+    for precision in (1e-4, 1e-3):
+        cached = CachingDistanceService(service, precision=precision)
+        start = time.perf_counter()
+        for loc1, loc2 in pairs:
+            cached.calculate_distance(loc1, loc2)
+        cached_time = (time.perf_counter() - start) / n_queries
+        stats = cached.stats()
+        print(f"distance cache, precision {precision:g}: direct {direct_time * 1e9:.0f} ns, cached {cached_time * 1e9:.0f} ns per pair, "
+              f"hit ratio {stats['hit_ratio']:.2f}, {stats['entries']} entries, {stats['memory_bytes'] / 1e6:.1f} MB")
+
+def travel_time_matrix_benchmark(rows: int = 40, cols: int = 40, n_dashers: int = 1000, n_queries: int = 2000):
+    rng = random.Random(45)
+    grid = TravelTimeGrid(43.5, -79.6, 0.0075, rows, cols)
+    speeds = np.array([[rng.choice((15, 30, 30, 50, 0)) for _ in range(cols)] for _ in range(rows)])
+    graph = RoadGraph.from_speed_table(grid, speeds)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "city.ttm")
+        start = time.perf_counter()
+        size = build_travel_time_matrix(path, grid, graph)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matrix = TravelTimeMatrix(path)
+        open_time = time.perf_counter() - start
+        service = TravelTimeDistanceService(matrix)
+        height, width = rows * grid.cell_size, cols * grid.cell_size
+        latitudes = np.array([43.5 + rng.random() * height for _ in range(n_dashers)])
+        longitudes = np.array([-79.6 + rng.random() * width for _ in range(n_dashers)])
+        restaurants = [Location(43.5 + rng.random() * height, -79.6 + rng.random() * width) for _ in range(n_queries)]
+
+        start = time.perf_counter()
+        for restaurant in restaurants:
+            service.calculate_distance(Location(float(latitudes[0]), float(longitudes[0])), restaurant)
+        lookup_time = (time.perf_counter() - start) / n_queries
+        start = time.perf_counter()
+        for restaurant in restaurants:
+            service.calculate_distances(restaurant, latitudes, longitudes)
+        batch_time = (time.perf_counter() - start) / n_queries
+
+        # what a routing call per query costs: one Dijkstra to the restaurant
+        reverse_adjacency = [[] for _ in graph.locations]
+        for from_node, to_node, seconds in graph.edges:
+            reverse_adjacency[to_node].append((from_node, seconds))
+        start = time.perf_counter()
+        for restaurant in restaurants[:50]:
+            _travel_times_to(reverse_adjacency, grid.cell(restaurant))
+        routing_time = (time.perf_counter() - start) / 50
+        print(f"travel time matrix {rows}x{cols} cells: build {build_time:.1f} s, {size / 1e6:.1f} MB, open {open_time * 1e6:.0f} us, "
+              f"lookup {lookup_time * 1e6:.1f} us, {n_dashers} dashers {batch_time * 1e6:.0f} us, "
+              f"routing per query {routing_time * 1000:.1f} ms")
+        matrix.close()
+
+def scoring_pipeline_benchmark(n_queries: int = 300):
+    rng = random.Random(46)
+    service = DistanceService()
+    criteria = [DistanceCriterion(scale=0.01), LoadCriterion(weight=0.5, max_active_orders=2), AcceptanceCriterion(), HeadingCriterion(weight=0.5)]
+    for n_dashers in (1000, 10000, 100000):
+        dashers = [Dasher(f"d_{i}", Location(43.5 + rng.random() * 0.3, -79.6 + rng.random() * 0.3), True,
+                          active_orders=rng.choice((0, 0, 1, 2, 3)), acceptance_rate=rng.uniform(0.3, 1.0),
+                          heading=rng.choice((None, rng.uniform(0, 360)))) for i in range(n_dashers)]
+        index = DasherGridIndex.from_dashers(dashers, cell_size=0.3 / math.sqrt(n_dashers / 4))
+        orders = [Order(f"o_{i}", Location(43.5 + rng.random() * 0.3, -79.6 + rng.random() * 0.3), Location(43.6, -79.4), OrderStatus.PENDING)
+                  for i in range(n_queries)]
+
+        # the audit scores the whole fleet, so the pruned and exhaustive costs are timed apart
+        pruned = ScoringPipeline(criteria, service, k=16)
+        start = time.perf_counter()
+        for order in orders:
+            pruned.best_dasher(order, dasher_index=index)
+        pruned_time = (time.perf_counter() - start) / n_queries
+        exhaustive = ScoringPipeline(criteria, service, k=n_dashers)
+        start = time.perf_counter()
+        for order in orders[:20]:
+            exhaustive.best_dasher(order, dashers)
+        exhaustive_time = (time.perf_counter() - start) / 20
+        pipeline = ScoringPipeline(criteria, service, k=16, audit_rate=1.0)
+        for order in orders[:100]:
+            pipeline.best_dasher(order, dasher_index=index)
+        print(f"{n_dashers:>6} dashers: pruned {pruned_time * 1e6:6.0f} us ({pruned.scored / n_queries:.0f} scored, "
+              f"{pruned.widenings} widenings), exhaustive {exhaustive_time * 1000:6.1f} ms, "
+              f"pruned differs from exhaustive in {pipeline.disagreement_rate:.0%} of {pipeline.audited} orders")
+
+def delivery_simulator_benchmark():
+    config = SimulationConfig(seed=47, duration_seconds=3600, n_dashers=5000, n_restaurants=500, size=0.3,
+                              order_rates=((0, 60.0), (1200, 150.0), (2400, 60.0)))
+
+    def linear_engine(order_repository, dasher_repository):
+        return DeliveryAssignmentService(order_repository, dasher_repository, DistanceService())
+
+    def index_engine(order_repository, dasher_repository):
+        index = DasherGridIndex.from_dashers(dasher_repository.get_available_dashers(), cell_size=0.005)
+        return DeliveryAssignmentService(order_repository, dasher_repository, DistanceService(), dasher_index=index)
+
+    def registry_engine(order_repository, dasher_repository):
+        registry = DasherRegistry(dasher_repository, DasherChangeFeed(1000000), DasherGridIndex(cell_size=0.005))
+        return DeliveryAssignmentService(order_repository, dasher_repository, DistanceService(), dasher_registry=registry)
+
+    def scoring_engine(order_repository, dasher_repository):
+        index = DasherGridIndex.from_dashers(dasher_repository.get_available_dashers(), cell_size=0.005)
+        scoring = ScoringPipeline([DistanceCriterion(), HeadingCriterion()], DistanceService())
+        return DeliveryAssignmentService(order_repository, dasher_repository, DistanceService(), dasher_index=index, scoring=scoring)
+
+    for name, engine in (("linear scan", linear_engine), ("grid index", index_engine), ("registry", registry_engine),
+                         ("scoring", scoring_engine)):
+        report = DeliverySimulator(config, engine).run()
+        print(f"simulated hour, {name:<11}: {report.summary()}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pool = SqliteConnectionPool(os.path.join(tmp_dir, "simulation.sqlite"), size=1)
+        report = DeliverySimulator(config, index_engine, SqliteDasherRepository(pool), SqliteOrderRepository(pool)).run()
+        print(f"simulated hour, grid index on SQLite: {report.summary()}")
+        pool.close()
+
+def fleet_memory_benchmark(n_dashers: int = 200000):
+    @dataclass
+    class PlainLocation:
+        latitude: float
+        longitude: float
+
+    @dataclass
+    class PlainDasher:
+        dasher_id: str
+        location: PlainLocation
+        is_available: bool
+
+    rng = random.Random(48)
+    ids = [f"d_{i}" for i in range(n_dashers)]
+    coordinates = [(43.5 + rng.random() * 0.3, -79.6 + rng.random() * 0.3) for _ in range(n_dashers)]
+
+    def measure(build):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        built = build()
+        size = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        return built, size
+
+    plain, plain_bytes = measure(lambda: [PlainDasher(dasher_id, PlainLocation(lat, lon), True) for dasher_id, (lat, lon) in zip(ids, coordinates)])
+    slotted, slotted_bytes = measure(lambda: [Dasher(dasher_id, Location(lat, lon), True) for dasher_id, (lat, lon) in zip(ids, coordinates)])
+
+    def build_fleet():
+        fleet = Fleet(n_dashers)
+        for dasher_id, (lat, lon) in zip(ids, coordinates):
+            fleet.add(dasher_id, Location(lat, lon))
+        return fleet
+    fleet, fleet_bytes = measure(build_fleet)
+
+    def access_time(dashers):
+        start = time.perf_counter()
+        total = 0.0
+        for dasher in dashers:
+            if dasher.is_available:
+                total += dasher.location.latitude
+        return (time.perf_counter() - start) / n_dashers
+
+    views = [fleet[dasher_id] for dasher_id in ids]
+    start = time.perf_counter()
+    fleet.latitudes[:len(fleet)][fleet.available[:len(fleet)]].sum()
+    column_time = (time.perf_counter() - start) / n_dashers
+    print(f"{n_dashers} dashers, bytes per dasher: dataclass {plain_bytes / n_dashers:.0f}, slotted {slotted_bytes / n_dashers:.0f}, "
+          f"fleet {fleet_bytes / n_dashers:.0f}; is_available + location.latitude: dataclass {access_time(plain) * 1e9:.0f} ns, "
+          f"slotted {access_time(slotted) * 1e9:.0f} ns, fleet view {access_time(views) * 1e9:.0f} ns, "
+          f"fleet columns {column_time * 1e9:.1f} ns")
+
+def find_best_dasher_benchmark(n_dashers: int = 20000, n_queries: int = 2000):
+    rng = random.Random(1)
+    # a metro area of about 30 x 30 km
+    dashers = [Dasher(f"d_{i}", Location(43.5 + rng.random() * 0.3, -79.6 + rng.random() * 0.3), True) for i in range(n_dashers)]
+    targets = [Location(43.5 + rng.random() * 0.3, -79.6 + rng.random() * 0.3) for _ in range(n_queries)]
+    service = DeliveryAssignmentService(OrderRepository(), DasherRepository(), DistanceService())
+
+    scan_queries = targets[:max(1, n_queries // 20)]
+    start = time.perf_counter()
+    expected = [service.find_best_dasher(dashers, target) for target in scan_queries]
+    scan_time = (time.perf_counter() - start) / len(scan_queries)
+
+    start = time.perf_counter()
+    index = DasherGridIndex.from_dashers(dashers)
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    found = [index.nearest(target) for target in targets]
+    index_time = (time.perf_counter() - start) / n_queries
+    assert found[:len(scan_queries)] == expected
+
+    start = time.perf_counter()
+    for dasher in dashers[:n_queries]:
+        dasher.location = Location(dasher.location.latitude + 0.001, dasher.location.longitude)
+        index.move(dasher)
+    move_time = (time.perf_counter() - start) / n_queries
+    print(f"{n_dashers} dashers: find_best_dasher {scan_time * 1e6:.0f} us/query, grid index {index_time * 1e6:.1f} us/query "
+          f"({scan_time / index_time:.0f}x), build {build_time * 1000:.0f} ms, move {move_time * 1e6:.1f} us")
+
+if __name__ == "__main__":
+    find_best_dasher_benchmark()
+    calculate_distances_benchmark()
+    assign_orders_benchmark()
+    dasher_registry_benchmark()
+    concurrent_assign_order_benchmark()
+    write_behind_benchmark()
+    sqlite_repositories_benchmark()
+    caching_distance_service_benchmark()
+    travel_time_matrix_benchmark()
+    scoring_pipeline_benchmark()
+    delivery_simulator_benchmark()
+    fleet_memory_benchmark()
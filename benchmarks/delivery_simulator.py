@@ -0,0 +1,268 @@
+"""
+Delivery simulator, the load harness of solutions.delivery_assignment:
+DeliverySimulator is a seeded discrete-event simulation of a city: dashers start around a few hotspots and drift
+while idle, orders arrive from fixed restaurants as a Poisson process (order_rates sets the rate per minute from
+a given second on, for rush hours), and every order goes through assign_order of the service under test.
+An assigned dasher drives to the restaurant, then to the customer, and is free again at the customer location.
+Orders that find no dasher wait, and are assigned first when a dasher is free.
+The simulated time only moves with the events, so a run is the same for the same seed whatever the machine, only
+the measured latencies change. make_service builds the engine from the repositories, and the repositories are
+in memory by default, any other backend with save_many can be passed to compare them.
+"""
+
+import contextlib
+import heapq
+import io
+import itertools
+import math
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from solutions.delivery_assignment import DasherChangeType
+from solutions.delivery_distances import haversine_km
+from solutions.delivery_model import (
+    Dasher, DasherRepository, InMemoryDasherRepository, InMemoryOrderRepository, Location,
+    NoDashersAvailableException, Order, OrderRepository, OrderStatus
+)
+
+class LatencyHistogram:
+    def __init__(self, min_seconds: float = 1e-6, n_buckets: int = 24):
+        # bucket i counts the latencies up to min_seconds * 2**i, the last one everything above
+        self.bounds = [min_seconds * 2**i for i in range(n_buckets)]
+        self.counts = [0] * (n_buckets + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float):
+        bucket = 0 if seconds <= self.bounds[0] else min(math.ceil(math.log2(seconds / self.bounds[0])), len(self.bounds))
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, p: float) -> float:
+        # upper bound of the bucket holding the p-th percentile
+        rank = math.ceil(self.count * p / 100)
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return self.bounds[bucket] if bucket < len(self.bounds) else math.inf
+        return 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+@dataclass
+class SimulationConfig:
+    seed: int = 0
+    duration_seconds: float = 3600.0
+    n_dashers: int = 200
+    n_restaurants: int = 100
+    n_hotspots: int = 8
+    # [(from second, orders per minute)], the first step starts at 0
+    order_rates: tuple = ((0.0, 20.0), )
+    min_latitude: float = 43.6
+    min_longitude: float = -79.5
+    size: float = 0.15
+    speed_kmh: float = 25.0
+    handoff_seconds: float = 240.0
+    tick_seconds: float = 60.0
+    # degrees an idle dasher drifts per tick, about 100 m
+    idle_step: float = 0.001
+
+@dataclass
+class SimulationReport:
+    orders: int
+    assigned: int
+    waiting: int
+    wall_seconds: float
+    latency: LatencyHistogram
+    idle_dashers_mean: float
+    idle_dashers_min: int
+    pickup_km_mean: float
+    wait_seconds_mean: float
+    # (order_id, dasher_id) in the order of the assignments
+    assignments: list
+
+    @property
+    def throughput(self) -> float:
+        return self.latency.count / self.latency.total if self.latency.total else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.assigned}/{self.orders} assigned ({self.waiting} waiting), {self.throughput:,.0f} assign_order/s, "
+                f"latency p50 {self.latency.percentile(50) * 1e6:.0f} us p99 {self.latency.percentile(99) * 1e6:.0f} us, "
+                f"idle dashers mean {self.idle_dashers_mean:.0f} min {self.idle_dashers_min}, "
+                f"pickup {self.pickup_km_mean:.2f} km, wait {self.wait_seconds_mean:.0f} s")
+
+ORDER_ARRIVAL, DASHER_FREE, TICK = 0, 1, 2
+
+class DeliverySimulator:
+    def __init__(self, config: SimulationConfig, make_service, dasher_repository: DasherRepository = None,
+                 order_repository: OrderRepository = None, quiet: bool = True):
+        """
+        make_service(order_repository, dasher_repository) returns the DeliveryAssignmentService under test.
+        """
+        self.config = config
+        self.rng = random.Random(config.seed)
+        # the idle moves depend on which dashers are idle, they have their own stream so the orders stay the same
+        self.move_rng = random.Random(f"{config.seed}-moves")
+        rng = self.rng
+        self.hotspots = [self._random_location() for _ in range(config.n_hotspots)]
+        self.restaurants = [self._near(rng.choice(self.hotspots), config.size / 10) for _ in range(config.n_restaurants)]
+        # the simulator owns the state of the dashers, the repositories get copies through save
+        self.dashers = {}
+        for idx in range(config.n_dashers):
+            dasher_id = f"d_{idx:05d}"
+            self.dashers[dasher_id] = Dasher(dasher_id, self._near(rng.choice(self.hotspots), config.size / 20), True)
+        self.dasher_repository = dasher_repository if dasher_repository is not None else InMemoryDasherRepository()
+        self.order_repository = order_repository if order_repository is not None else InMemoryOrderRepository()
+        self.dasher_repository.save_many([self._copy(dasher) for dasher in self.dashers.values()])
+        self.service = make_service(self.order_repository, self.dasher_repository)
+        self.quiet = quiet
+
+        self.now = 0.0
+        self.events = []
+        self.seq = itertools.count()
+        self.waiting = deque()
+        self.arrivals = {}
+        self.latency = LatencyHistogram()
+        self.assignments = []
+        self.idle_samples = []
+        self.pickup_km = []
+        self.wait_seconds = []
+        self.n_orders = 0
+
+    def _random_location(self) -> Location:
+        config = self.config
+        return Location(config.min_latitude + self.rng.random() * config.size, config.min_longitude + self.rng.random() * config.size)
+
+    def _near(self, location: Location, spread: float, rng: random.Random = None) -> Location:
+        config = self.config
+        rng = rng or self.rng
+        latitude = min(max(location.latitude + rng.uniform(-spread, spread), config.min_latitude), config.min_latitude + config.size)
+        longitude = min(max(location.longitude + rng.uniform(-spread, spread), config.min_longitude), config.min_longitude + config.size)
+        return Location(latitude, longitude)
+
+    @staticmethod
+    def _copy(dasher: Dasher) -> Dasher:
+        return Dasher(dasher.dasher_id, Location(dasher.location.latitude, dasher.location.longitude), dasher.is_available)
+
+    def _schedule(self, at: float, kind: int, payload=None):
+        heapq.heappush(self.events, (at, next(self.seq), kind, payload))
+
+    def _order_rate(self, at: float) -> tuple:
+        # (orders per minute at this time, second of the next change)
+        rate, next_change = 0.0, math.inf
+        for start, step_rate in self.config.order_rates:
+            if start <= at:
+                rate = step_rate
+            elif start < next_change:
+                next_change = start
+        return rate, next_change
+
+    def _schedule_next_order(self):
+        # Poisson arrivals, a rate change restarts the draw at the change (memoryless)
+        at = self.now
+        while at < self.config.duration_seconds:
+            rate, next_change = self._order_rate(at)
+            arrival = at + self.rng.expovariate(rate / 60) if rate > 0 else math.inf
+            if arrival < next_change:
+                self._schedule(arrival, ORDER_ARRIVAL)
+                return
+            at = next_change
+
+    def _try_assign(self, order: Order) -> bool:
+        start = time.perf_counter()
+        try:
+            delivery = self.service.assign_order(order)
+        except NoDashersAvailableException:
+            self.latency.record(time.perf_counter() - start)
+            return False
+        self.latency.record(time.perf_counter() - start)
+
+        dasher = self.dashers[delivery.dasher_id]
+        dasher.is_available = False
+        pickup_km = haversine_km(dasher.location, order.order_location)
+        dropoff_km = haversine_km(order.order_location, order.customer_location)
+        self.pickup_km.append(pickup_km)
+        self.wait_seconds.append(self.now - self.arrivals.pop(order.order_id))
+        self.assignments.append((order.order_id, delivery.dasher_id))
+        drive_seconds = (pickup_km + dropoff_km) / self.config.speed_kmh * 3600
+        self._schedule(self.now + drive_seconds + self.config.handoff_seconds, DASHER_FREE, (delivery.dasher_id, order.customer_location))
+        return True
+
+    def _free_dasher(self, dasher_id: str, location: Location):
+        dasher = self.dashers[dasher_id]
+        dasher.location = location
+        dasher.is_available = True
+        self._publish(dasher, DasherChangeType.FREED)
+
+    def _publish(self, dasher: Dasher, change_type: DasherChangeType):
+        # the engine learns about the dasher the same way it would in production
+        registry = self.service.dasher_registry
+        if registry is not None:
+            registry.feed.publish(change_type, dasher.dasher_id, Location(dasher.location.latitude, dasher.location.longitude))
+        elif self.service.dasher_index is not None:
+            copy = self._copy(dasher)
+            if dasher.dasher_id in self.service.dasher_index:
+                self.service.dasher_index.move(copy)
+            elif dasher.is_available:
+                self.service.dasher_index.insert(copy)
+        self.dasher_repository.save(self._copy(dasher))
+
+    def _tick(self):
+        idle = [dasher for dasher in self.dashers.values() if dasher.is_available]
+        self.idle_samples.append(len(idle))
+        for dasher in idle:
+            dasher.location = self._near(dasher.location, self.config.idle_step, self.move_rng)
+            self._publish(dasher, DasherChangeType.LOCATION)
+
+    def _on_order(self):
+        self._schedule_next_order()
+        self.n_orders += 1
+        restaurant = self.rng.choice(self.restaurants)
+        order = Order(f"o_{self.n_orders:07d}", restaurant, self._near(restaurant, self.config.size / 5), OrderStatus.PENDING)
+        self.arrivals[order.order_id] = self.now
+        if self.waiting or not self._try_assign(order):
+            self.waiting.append(order)
+
+    def _assign_waiting(self):
+        while self.waiting and self._try_assign(self.waiting[0]):
+            self.waiting.popleft()
+
+    def run(self) -> SimulationReport:
+        config = self.config
+        self._schedule_next_order()
+        tick = 0.0
+        while tick < config.duration_seconds:
+            self._schedule(tick, TICK)
+            tick += config.tick_seconds
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()) if self.quiet else contextlib.nullcontext():
+            while self.events and self.events[0][0] < config.duration_seconds:
+                self.now, _, kind, payload = heapq.heappop(self.events)
+                if kind == ORDER_ARRIVAL:
+                    self._on_order()
+                elif kind == DASHER_FREE:
+                    self._free_dasher(*payload)
+                    self._assign_waiting()
+                else:
+                    self._tick()
+        wall_seconds = time.perf_counter() - start
+
+        return SimulationReport(
+            orders=self.n_orders,
+            assigned=len(self.assignments),
+            waiting=len(self.waiting),
+            wall_seconds=wall_seconds,
+            latency=self.latency,
+            idle_dashers_mean=sum(self.idle_samples) / len(self.idle_samples) if self.idle_samples else 0.0,
+            idle_dashers_min=min(self.idle_samples, default=0),
+            pickup_km_mean=sum(self.pickup_km) / len(self.pickup_km) if self.pickup_km else 0.0,
+            wait_seconds_mean=sum(self.wait_seconds) / len(self.wait_seconds) if self.wait_seconds else 0.0,
+            assignments=self.assignments
+        )
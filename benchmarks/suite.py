@@ -0,0 +1,341 @@
+"""
+Benchmark suite of the service entry points.
+
+Every entry point has a scenario: an input builder for a size n (events, items, deliveries, transactions or dashers,
+see SCENARIOS) and a call. A run builds the input once, then times calls until min_seconds have passed, and reports
+    throughput  units of input per second (n * calls / time spent in the calls)
+    latency     p50 / p90 / p99 of the calls, in seconds
+    peak memory bytes allocated by one extra call, traced with tracemalloc (the input itself is not counted)
+The services print while they work, stdout goes to os.devnull during the calls so the printing costs the same on
+every machine and does not flood the terminal.
+
+Results are written as JSON, and a run can be compared to a stored baseline (a results file of an earlier run):
+a scenario and size fails when its p50 latency or its peak memory grew by more than the threshold.
+Timings depend on the machine, so the baseline is saved on the machine that runs the comparison (--save-baseline).
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --save-baseline baseline.json
+    python -m benchmarks.suite --baseline baseline.json --threshold 0.2
+    python -m benchmarks.suite --sizes 100,1000,10000,100000,1000000,10000000 --scenarios reconcile_transactions
+
+The default sizes go up to 10^5. The 10^7 inputs are several GB as Python objects and JSON strings
+(about 3-6 GB per scenario), and the assign_order scan does 10^7 distance calls per order.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.datasets import build_transaction_log
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+DEFAULT_THRESHOLD = 0.2
+# metrics compared to the baseline, a larger value is worse for both
+COMPARED_METRICS = ("p50_seconds", "peak_memory_bytes")
+# peak memory below this is noise of the allocator and the tracing, it never fails a comparison
+MIN_COMPARED_MEMORY = 64 * 1024
+
+@dataclass
+class Scenario:
+    name: str
+    unit: str
+    # build(n, rng) -> state, call(state) runs the entry point once
+    build: object
+    call: object
+    # setup(state) runs before every call, out of the timing (resets what the previous call changed)
+    setup: object = None
+
+"""
+Input builders: seeded, so every run of a size measures the same input.
+"""
+
+def _build_pay_units(n: int, rng: random.Random):
+    from solutions.dasher_pay import DasherEvents, DasherService, DasherStatus
+
+    events = []
+    timestamp = 0
+    for _ in range(n // 2):
+        timestamp += rng.randrange(60, 600)
+        events.append(DasherEvents(timestamp, DasherStatus.PICKUP))
+        events.append(DasherEvents(timestamp + rng.randrange(60, 1800), DasherStatus.DROPOFF))
+    rng.shuffle(events)
+    return {"service": DasherService(), "events": events, "batch": None}
+
+def _setup_pay_units(state):
+    # calculate_pay_units sorts the list in place, every call gets the shuffled order again
+    state["batch"] = list(state["events"])
+
+def _build_order_total(n: int, rng: random.Random):
+    from solutions.order_total import calculate_order_total
+
+    order = {
+        "order_id": "ord-1",
+        "items": [{"item_id": f"i-{i}", "name": f"Item {i}", "price": f"{rng.randrange(100, 5000) / 100:.2f}",
+                   "quantity": rng.randrange(1, 4)} for i in range(n)],
+        "promotions": {"FALL20": {"type": "PERCENT", "value": 0.20, "is_active": True},
+                       "WELCOME5": {"type": "FIXED", "value": 5.00, "is_active": False}},
+        "adjustments": [{"name": "Service Fee", "amount": 3.99}, {"name": "Small Order Fee", "amount": None}],
+        "tip": "6.15",
+    }
+    return {"call": calculate_order_total, "order_json": json.dumps(order)}
+
+def _build_process_order(n: int, rng: random.Random):
+    from solutions.order_validation import OrderValidationService
+
+    order = {
+        "orderId": "A-987",
+        "custId": "user-554",
+        "delivery_address": "123 Main St, Toronto, M5V 2K1",
+        "items": {str(1000 + i): {"name": f"Item {i}", "quantity": rng.randrange(1, 4)} for i in range(n)},
+    }
+    return {"service": OrderValidationService(), "order_json": json.dumps(order)}
+
+def _build_bonus(n: int, rng: random.Random):
+    from solutions.dasher_bonus import calculate_bonus
+
+    start = datetime(2025, 10, 25, 11, 0, tzinfo=timezone.utc)
+    deliveries = []
+    for i in range(n):
+        estimated = start + timedelta(seconds=rng.randrange(0, 30 * 86400))
+        actual = estimated + timedelta(seconds=rng.randrange(-600, 600))
+        feedback = None if i % 4 == 0 else {"rating": rng.choice([5, "5", 4, "3"])}
+        deliveries.append({
+            "delivery_id": f"d-{i}",
+            "is_return": i % 20 == 0,
+            "timestamps": {"dropoff_estimated": estimated.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                           "dropoff_actual": actual.strftime("%Y-%m-%dT%H:%M:%SZ")},
+            "customer_feedback": feedback,
+        })
+    return {"call": calculate_bonus, "deliveries_json": json.dumps(deliveries)}
+
+def _build_filter_menu(n: int, rng: random.Random):
+    from solutions.menu_filtering import MenuFilteringService
+
+    tags = ["vegan", "gluten_free", "halal", "spicy", "nut_free"]
+    categories = []
+    for start in range(0, n, 50):
+        items = [{"name": f"Item {i}", "price": rng.randrange(300, 4000) / 100, "is_available": rng.random() < 0.9,
+                  "dietary_tags": rng.sample(tags, rng.randrange(0, 3))} for i in range(start, min(n, start + 50))]
+        categories.append({"category_name": f"Category {start // 50}", "items": items})
+    menu_json = json.dumps({"categories": categories})
+    filter_json = json.dumps({"max_price": 15.00, "dietary_tags": ["vegan"]})
+    return {"service": MenuFilteringService(), "menu_json": menu_json, "filter_json": filter_json}
+
+def _transaction_log_json(n: int, dollar_strings: bool) -> str:
+    events = build_transaction_log(n, max(1, n // 10))
+    if dollar_strings:
+        # calculate_orders_net_total reads "$50.00" style amounts
+        for tr in events:
+            if "amount" in tr:
+                tr["amount"] = f"${tr['amount']:.2f}"
+    return json.dumps(events)
+
+def _build_reconcile(n: int, rng: random.Random):
+    from solutions.reconciliation import reconcile_transactions
+
+    return {"call": reconcile_transactions, "log_json": _transaction_log_json(n, dollar_strings=False)}
+
+def _build_net_total(n: int, rng: random.Random):
+    from solutions.orders_net_total import calculate_orders_net_total
+
+    return {"call": calculate_orders_net_total, "log_json": _transaction_log_json(n, dollar_strings=True)}
+
+def _build_assign_order(n: int, rng: random.Random, indexed: bool = False):
+    from solutions import delivery_assignment as da
+    from solutions import delivery_model as model
+    from solutions.dasher_index import DasherGridIndex
+    from solutions.delivery_distances import DistanceService
+
+    def location():
+        return model.Location(43.60 + rng.random() * 0.15, -79.50 + rng.random() * 0.20)
+
+    dashers = [model.Dasher(f"d-{i}", location(), True) for i in range(n)]
+    index = DasherGridIndex.from_dashers(dashers) if indexed else None
+    service = da.DeliveryAssignmentService(model.InMemoryOrderRepository(), model.InMemoryDasherRepository(dashers),
+                                           DistanceService(), dasher_index=index)
+    orders = [model.Order(f"o-{i}", location(), location(), model.OrderStatus.PENDING) for i in range(256)]
+    return {"module": model, "service": service, "index": index, "orders": orders, "calls": 0, "order": None, "delivery": None}
+
+def _setup_assign_order(state):
+    # the dasher of the previous call is available again, so every call sees the same fleet
+    service, delivery = state["service"], state["delivery"]
+    if delivery is not None:
+        dasher = service.dasher_repository.dashers[delivery.dasher_id]
+        dasher.is_available = True
+        if state["index"] is not None:
+            state["index"].insert(dasher)
+    order = state["orders"][state["calls"] % len(state["orders"])]
+    order.status = state["module"].OrderStatus.PENDING
+    state["order"] = order
+    state["calls"] += 1
+
+def _assign_order(state):
+    state["delivery"] = state["service"].assign_order(state["order"])
+
+SCENARIOS = {
+    scenario.name: scenario for scenario in (
+        Scenario("calculate_pay_units", "events", _build_pay_units,
+                 lambda state: state["service"].calculate_pay_units(state["batch"]), _setup_pay_units),
+        Scenario("calculate_order_total", "items", _build_order_total,
+                 lambda state: state["call"](state["order_json"])),
+        Scenario("process_order", "items", _build_process_order,
+                 lambda state: state["service"].process_order(state["order_json"])),
+        Scenario("calculate_bonus", "deliveries", _build_bonus,
+                 lambda state: state["call"](state["deliveries_json"])),
+        Scenario("filter_menu", "items", _build_filter_menu,
+                 lambda state: state["service"].filter_menu(state["menu_json"], state["filter_json"])),
+        Scenario("reconcile_transactions", "transactions", _build_reconcile,
+                 lambda state: state["call"](state["log_json"])),
+        Scenario("calculate_orders_net_total", "transactions", _build_net_total,
+                 lambda state: state["call"](state["log_json"])),
+        Scenario("assign_order", "dashers", _build_assign_order, _assign_order, _setup_assign_order),
+        Scenario("assign_order_indexed", "dashers", lambda n, rng: _build_assign_order(n, rng, indexed=True),
+                 _assign_order, _setup_assign_order),
+    )
+}
+
+"""
+Measurement
+"""
+
+@contextlib.contextmanager
+def _quiet():
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+def percentile(sorted_values: list, q: float) -> float:
+    # nearest rank
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+def run_scenario(scenario: Scenario, n: int, min_seconds: float = 0.5, min_calls: int = 5,
+                 max_calls: int = 10000, seed: int = 0) -> dict:
+    state = scenario.build(n, random.Random(seed))
+    latencies = []
+    with _quiet():
+        while len(latencies) < max_calls and (len(latencies) < min_calls or sum(latencies) < min_seconds):
+            if scenario.setup is not None:
+                scenario.setup(state)
+            start = time.perf_counter()
+            scenario.call(state)
+            latencies.append(time.perf_counter() - start)
+
+        # peak memory on its own call, tracing slows the calls down too much to time them at the same time
+        if scenario.setup is not None:
+            scenario.setup(state)
+        tracemalloc.start()
+        try:
+            scenario.call(state)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    total = sum(latencies)
+    latencies.sort()
+    return {
+        "scenario": scenario.name,
+        "size": n,
+        "unit": scenario.unit,
+        "calls": len(latencies),
+        "throughput_per_second": n * len(latencies) / total if total else 0.0,
+        "mean_seconds": total / len(latencies),
+        "p50_seconds": percentile(latencies, 50),
+        "p90_seconds": percentile(latencies, 90),
+        "p99_seconds": percentile(latencies, 99),
+        "peak_memory_bytes": peak_memory,
+    }
+
+def run_suite(names=None, sizes=DEFAULT_SIZES, min_seconds: float = 0.5, progress=None) -> dict:
+    results = []
+    for name in names or SCENARIOS:
+        for n in sizes:
+            result = run_scenario(SCENARIOS[name], n, min_seconds)
+            results.append(result)
+            if progress is not None:
+                progress(result)
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list:
+    """
+    Returns the regressions of current against baseline: a dict per scenario, size and metric that grew by more than
+    threshold (0.2 is 20 %). Scenarios and sizes missing from one of the runs are not compared.
+    """
+    baseline_results = {(result["scenario"], result["size"]): result for result in baseline.get("results", [])}
+    regressions = []
+    for result in current.get("results", []):
+        reference = baseline_results.get((result["scenario"], result["size"]))
+        if reference is None:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = reference.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            if metric == "peak_memory_bytes" and max(before, after) < MIN_COMPARED_MEMORY:
+                continue
+            change = after / before - 1
+            if change > threshold:
+                regressions.append({"scenario": result["scenario"], "size": result["size"], "metric": metric,
+                                    "baseline": before, "current": after, "change": change})
+    return regressions
+
+def format_result(result: dict) -> str:
+    return (f"{result['scenario']:<27} {result['size']:>9} {result['unit']:<12} "
+            f"{result['throughput_per_second']:>12.0f}/s  p50 {result['p50_seconds'] * 1e3:9.3f} ms  "
+            f"p90 {result['p90_seconds'] * 1e3:9.3f} ms  p99 {result['p99_seconds'] * 1e3:9.3f} ms  "
+            f"peak {result['peak_memory_bytes'] / 1e6:9.2f} MB")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks of the service entry points.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma separated input sizes, 100 to 10000000")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma separated scenario names")
+    parser.add_argument("--min-seconds", type=float, default=0.5, help="time spent in the calls per scenario and size")
+    parser.add_argument("--output", default="benchmark-results.json", help="JSON results file")
+    parser.add_argument("--baseline", help="results file to compare the run to")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed growth of p50 latency and peak memory, 0.2 is 20%%")
+    parser.add_argument("--save-baseline", help="also write the results to this baseline file")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    names = args.scenarios.split(",")
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"Unknown scenarios {', '.join(unknown)}, available: {', '.join(SCENARIOS)}")
+        return 2
+
+    results = run_suite(names, sizes, args.min_seconds, progress=lambda result: print(format_result(result), flush=True))
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as output:
+            json.dump(results, output, indent=2)
+        print(f"Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['scenario']} n={regression['size']} {regression['metric']}: "
+                  f"{regression['baseline']:.6g} -> {regression['current']:.6g} ({regression['change']:+.0%})")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
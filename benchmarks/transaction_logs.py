@@ -0,0 +1,68 @@
+"""
+Benchmarks of the shared transaction log modules against the JSON functions they replace:
+    transaction_engine      one engine pass against calculate_orders_net_total and reconcile_transactions back to back
+    binary_transaction_log  replaying both aggregations from the binary format against re-reading the JSON log
+
+    python -m benchmarks.transaction_logs
+"""
+
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.datasets import build_transaction_log
+from solutions.binary_transaction_log import (
+    BinaryTransactionLog, calculate_orders_net_total_binary, convert_json_log, reconcile_transactions_binary
+)
+from solutions.orders_net_total import calculate_orders_net_total
+from solutions.reconciliation import reconcile_transactions
+from solutions.transaction_engine import net_profit_aggregation, net_total_aggregation, TransactionEventEngine
+
+def transaction_event_engine_benchmark(n_events: int = 500000, n_orders: int = 50000):
+    log_json = json.dumps(build_transaction_log(n_events, n_orders))
+
+    start = time.perf_counter()
+    expected = {"net_total": calculate_orders_net_total(log_json), "net_profit": reconcile_transactions(log_json)}
+    back_to_back = time.perf_counter() - start
+
+    engine = TransactionEventEngine([net_total_aggregation(), net_profit_aggregation()])
+    start = time.perf_counter()
+    results = engine.run_json(log_json)
+    single_pass = time.perf_counter() - start
+    assert results == expected
+
+    print(f"{n_events} events: two functions back to back {back_to_back:.2f} s, engine single pass {single_pass:.2f} s "
+          f"({back_to_back / single_pass:.2f}x)")
+
+def binary_transaction_log_benchmark(n_events: int = 1000000, n_orders: int = 100000, replays: int = 3):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_path = os.path.join(tmp_dir, "ledger.json")
+        with open(json_path, "w") as json_file:
+            json.dump(build_transaction_log(n_events, n_orders), json_file)
+        binary_path = json_path + ".bin"
+        start = time.perf_counter()
+        convert_json_log(json_path, binary_path)
+        print(f"{n_events} events: JSON {os.path.getsize(json_path) / 1e6:.1f} MB, binary {os.path.getsize(binary_path) / 1e6:.1f} MB, "
+              f"conversion {time.perf_counter() - start:.2f} s")
+
+        start = time.perf_counter()
+        for _ in range(replays):
+            with open(json_path) as json_file:
+                log_json = json_file.read()
+            reconcile_transactions(log_json)
+            calculate_orders_net_total(log_json)
+        json_time = (time.perf_counter() - start) / replays
+
+        start = time.perf_counter()
+        for _ in range(replays):
+            log = BinaryTransactionLog(binary_path)
+            reconcile_transactions_binary(log)
+            calculate_orders_net_total_binary(log)
+            log.close()
+        binary_time = (time.perf_counter() - start) / replays
+        print(f"replay of both aggregations: JSON {json_time:.2f} s, binary {binary_time:.3f} s ({json_time / binary_time:.0f}x)")
+
+if __name__ == "__main__":
+    transaction_event_engine_benchmark()
+    binary_transaction_log_benchmark()
@@ -0,0 +1,64 @@
+"""
+The solutions as an importable package.
+
+The solution files keep their hyphenated names (index.html links to them), so they are mapped to module names:
+
+    solutions.dasher_pay           problem-full-0.py   DasherService.calculate_pay_units
+    solutions.order_total          problem-full-1.py   calculate_order_total
+    solutions.order_validation     problem-full-2.py   OrderValidationService.process_order
+    solutions.dasher_bonus         problem-full-3.py   calculate_bonus
+    solutions.menu_filtering       problem-full-4.py   MenuFilteringService.filter_menu
+    solutions.reconciliation       problem-full-5.py   reconcile_transactions
+    solutions.delivery_assignment  problem-full-6.py   DeliveryAssignmentService.assign_order
+    solutions.orders_net_total     problem-json-a.py   calculate_orders_net_total
+
+plus the shared modules (money, event_dedup, profit_views, transaction_engine, binary_transaction_log, json_stream,
+delivery_model, dasher_index, delivery_distances, delivery_persistence).
+Importing the package loads nothing, a submodule is loaded the first time it is imported or used as an attribute
+(solutions.order_total), so a worker only pays for the modules it uses. Loading a module runs no tests and prints
+nothing, the tests are in tests/.
+"""
+
+import importlib
+import os
+import sys
+
+SOLUTION_FILES = {
+    "dasher_pay": "problem-full-0.py",
+    "order_total": "problem-full-1.py",
+    "order_validation": "problem-full-2.py",
+    "dasher_bonus": "problem-full-3.py",
+    "menu_filtering": "problem-full-4.py",
+    "reconciliation": "problem-full-5.py",
+    "delivery_assignment": "problem-full-6.py",
+    "orders_net_total": "problem-json-a.py",
+}
+SHARED_MODULES = (
+    "money", "event_dedup", "profit_views", "transaction_engine", "binary_transaction_log", "json_stream",
+    "delivery_model", "dasher_index", "delivery_distances", "delivery_persistence",
+)
+
+_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+class _SolutionFileFinder:
+    # lets "import solutions.order_total" find problem-full-1.py
+    # (a meta path finder only needs find_spec, importlib.abc would pull pathlib into every cold start)
+    def find_spec(self, fullname, path, target=None):
+        package, _, name = fullname.rpartition(".")
+        if package != __name__ or name not in SOLUTION_FILES:
+            return None
+        import importlib.util
+        return importlib.util.spec_from_file_location(fullname, os.path.join(_DIRECTORY, SOLUTION_FILES[name]))
+
+if not any(isinstance(finder, _SolutionFileFinder) for finder in sys.meta_path):
+    sys.meta_path.append(_SolutionFileFinder())
+
+__all__ = list(SOLUTION_FILES) + list(SHARED_MODULES)
+
+def __getattr__(name: str):
+    if name in SOLUTION_FILES or name in SHARED_MODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
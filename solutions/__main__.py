@@ -0,0 +1,37 @@
+"""
+Startup benchmark of the package: python -m solutions --bench
+
+Every module is imported in a fresh interpreter, the time of an empty interpreter start is subtracted,
+so the numbers are what a worker pays at cold start for the modules it uses.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from . import SHARED_MODULES, SOLUTION_FILES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _start_time(code: str, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def startup_benchmark(runs: int = 7):
+    baseline = _start_time("pass", runs)
+    print(f"empty interpreter {baseline * 1000:.0f} ms, import time on top of it:")
+    print(f"  {'solutions':<34} {(_start_time('import solutions', runs) - baseline) * 1000:6.1f} ms")
+    for name in list(SOLUTION_FILES) + list(SHARED_MODULES):
+        code = f"import sys, solutions.{name}; print('numpy' in sys.modules)"
+        import_time = _start_time(code, runs) - baseline
+        numpy = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True, text=True).stdout.strip()
+        print(f"  {'solutions.' + name:<34} {import_time * 1000:6.1f} ms" + ("  (numpy)" if numpy == "True" else ""))
+
+if __name__ == "__main__" and "--bench" in sys.argv:
+    startup_benchmark()
@@ -0,0 +1,183 @@
+"""
+Compact binary columnar format for the transaction logs.
+
+The audits replay the same historical logs many times, and with JSON most of the time goes to tokenizing and building
+dicts that are thrown away. A log is converted once to this format and then read with mmap, the columns are numpy
+views on the file (no copy, no parsing), and the aggregations are vectorized group-by sums.
+
+Layout (little endian, every column starts 8 byte aligned):
+    header:   magic b"TXLB", uint32 version, uint64 events, uint64 orders, uint64 dictionary bytes
+    cents:    int64[events]   amount in cents (for ADJUSTMENT, the amount pre-extracted from the payload)
+    amount:   float64[events] the same amount as the JSON number, 0.0 when it is not a number
+    order:    int32[events]   index in the order_id dictionary, -1 when the event has no order_id
+    type:     uint8[events]   event type code, see TYPE_CODES (0 for the types no aggregation uses)
+    flags:    uint8[events]   which amount parsing succeeded, see NUMERIC_AMOUNT / DOLLAR_AMOUNT
+    dictionary: JSON array of the distinct order_ids, in order of first appearance (keeps ints as ints)
+
+An amount that is a JSON number is valid for reconcile_transactions, an amount that calculate_orders_net_total can
+parse ("$50.00" or a number) is valid for it. Each aggregation sums like its JSON version: calculate_orders_net_total
+in integer cents, reconcile_transactions the float amounts in the order of the events, so sub-cent amounts and the
+float rounding give the same result as the JSON log (rounding every amount to the cent first would not).
+The replay benchmark against the JSON functions is in benchmarks/transaction_logs.py.
+"""
+
+import json
+import mmap
+import struct
+from array import array
+
+import numpy as np
+
+# imported as part of the solutions package, or run as a script from solutions/
+if __package__:
+    from .json_stream import iter_transactions
+    from .money import dollar_amounts
+    from .transaction_engine import adjustment_amounts
+else:
+    from json_stream import iter_transactions
+    from money import dollar_amounts
+    from transaction_engine import adjustment_amounts
+
+HEADER = struct.Struct("<4sIQQQ")
+MAGIC = b"TXLB"
+VERSION = 2
+
+TYPE_CODES = {"CHARGE": 1, "DASHER_PAY": 2, "REFUND": 3, "ADJUSTMENT": 4, "AUTH": 5}
+NUMERIC_AMOUNT = 1
+DOLLAR_AMOUNT = 2
+
+def _cents(amount: float) -> int:
+    return round(amount * 100)
+
+def _encode_event(tr):
+    # returns (order_id, type code, cents, amount, flags)
+    tr_type = TYPE_CODES.get(tr.get("type"), 0)
+    order_id = tr.get("order_id")
+
+    if tr_type == TYPE_CODES["ADJUSTMENT"]:
+        try:
+            amount = adjustment_amounts.amount(tr.get("payload"))
+        except (json.JSONDecodeError, TypeError, AttributeError):
+            return order_id, tr_type, 0, 0.0, 0
+        if isinstance(amount, (int, float)) and not isinstance(amount, bool):
+            return order_id, tr_type, _cents(amount), amount, NUMERIC_AMOUNT
+        return order_id, tr_type, 0, 0.0, 0
+
+    amount = tr.get("amount", 0)
+    if isinstance(amount, (int, float)) and not isinstance(amount, bool):
+        return order_id, tr_type, _cents(amount), amount, NUMERIC_AMOUNT | DOLLAR_AMOUNT
+    if isinstance(amount, str):
+        try:
+            return order_id, tr_type, dollar_amounts.cents(amount), 0.0, DOLLAR_AMOUNT
+        except ValueError:
+            pass
+    return order_id, tr_type, 0, 0.0, 0
+
+def write_binary_log(transactions, output_path: str) -> int:
+    """
+    Writes an iterable of events to output_path, returns the number of events written.
+    """
+    cents = array("q")
+    amounts = array("d")
+    orders = array("i")
+    types = bytearray()
+    flags = bytearray()
+    order_index = {}
+    for tr in transactions:
+        if not isinstance(tr, dict):
+            continue
+        order_id, tr_type, tr_cents, tr_amount, tr_flags = _encode_event(tr)
+        if order_id is None:
+            orders.append(-1)
+        else:
+            orders.append(order_index.setdefault(order_id, len(order_index)))
+        cents.append(tr_cents)
+        amounts.append(tr_amount)
+        types.append(tr_type)
+        flags.append(tr_flags)
+
+    dictionary = json.dumps(list(order_index)).encode()
+    n_events = len(cents)
+    with open(output_path, "wb") as output:
+        output.write(HEADER.pack(MAGIC, VERSION, n_events, len(order_index), len(dictionary)))
+        for column in (cents.tobytes(), amounts.tobytes(), orders.tobytes(), bytes(types), bytes(flags)):
+            output.write(column)
+            output.write(b"\0" * (-len(column) % 8))
+        output.write(dictionary)
+    return n_events
+
+def iter_json_log(input_path: str):
+    # a JSON array or NDJSON, streamed in chunks so the logs too big to load can be converted
+    with open(input_path) as input_file:
+        yield from iter_transactions(input_file)
+
+def convert_json_log(input_path: str, output_path: str) -> int:
+    return write_binary_log(iter_json_log(input_path), output_path)
+
+class BinaryTransactionLog:
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.n_events, self.n_orders, dictionary_bytes = HEADER.unpack_from(self.mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a binary transaction log: {path}")
+
+        offset = HEADER.size
+        columns = []
+        for dtype in (np.int64, np.float64, np.int32, np.uint8, np.uint8):
+            columns.append(np.frombuffer(self.mmap, dtype=dtype, count=self.n_events, offset=offset))
+            size = self.n_events * np.dtype(dtype).itemsize
+            offset += size + (-size % 8)
+        self.cents, self.amounts, self.orders, self.types, self.flags = columns
+        self.dictionary_offset = offset
+        self.dictionary_bytes = dictionary_bytes
+        self._order_ids = None
+
+    @property
+    def order_ids(self) -> list:
+        if self._order_ids is None:
+            start = self.dictionary_offset
+            self._order_ids = json.loads(self.mmap[start:start + self.dictionary_bytes])
+        return self._order_ids
+
+    def sum_by_order(self, mask: np.ndarray, signs: np.ndarray, values: np.ndarray = None):
+        """
+        Group-by sum of the signed values (the cents column by default, or the amounts) of the events in mask.
+        Returns the order indexes that have at least one event, and their sums (int64 for the cents).
+        """
+        values = self.cents if values is None else values
+        orders = self.orders[mask]
+        signed_values = values[mask] * signs[self.types[mask]]
+        counts = np.bincount(orders, minlength=self.n_orders)
+        # bincount adds the weights in the order of the events, like the loop over the JSON log does,
+        # float64 weights are exact for integer sums below 2**53 cents, and much faster than np.add.at
+        sums = np.bincount(orders, weights=signed_values, minlength=self.n_orders)
+        if values.dtype == np.int64:
+            sums = sums.astype(np.int64)
+        present = np.flatnonzero(counts)
+        return present, sums[present]
+
+    def close(self):
+        # the numpy views have to be released before the mmap can be closed
+        self.cents = self.amounts = self.orders = self.types = self.flags = None
+        self.mmap.close()
+        self.file.close()
+
+# signs by type code: 0 unknown, CHARGE, DASHER_PAY, REFUND, ADJUSTMENT, AUTH
+NET_PROFIT_SIGNS = np.array([0, 1, -1, -1, 1, 0], dtype=np.int64)
+NET_TOTAL_SIGNS = np.array([0, 1, 0, -1, 0, 0], dtype=np.int64)
+
+def reconcile_transactions_binary(log: BinaryTransactionLog) -> dict:
+    # same result as reconcile_transactions on the original log
+    mask = (log.orders >= 0) & (NET_PROFIT_SIGNS[log.types] != 0) & ((log.flags & NUMERIC_AMOUNT) != 0)
+    present, sums = log.sum_by_order(mask, NET_PROFIT_SIGNS, log.amounts)
+    order_ids = log.order_ids
+    return {order_ids[idx]: max(round(revenue, 2), 0.0) for idx, revenue in zip(present.tolist(), sums.tolist())}
+
+def calculate_orders_net_total_binary(log: BinaryTransactionLog) -> dict:
+    # same result as calculate_orders_net_total on the original log, an empty order_id is skipped like a missing one
+    order_ids = log.order_ids
+    truthy_orders = np.array([bool(order_id) for order_id in order_ids] + [False], dtype=bool)
+    mask = truthy_orders[log.orders] & (NET_TOTAL_SIGNS[log.types] != 0) & ((log.flags & DOLLAR_AMOUNT) != 0)
+    present, sums = log.sum_by_order(mask, NET_TOTAL_SIGNS)
+    return {order_ids[idx]: cents / 100 for idx, cents in zip(present.tolist(), sums.tolist())}
@@ -0,0 +1,162 @@
+"""
+Spatial index of the available dashers (solutions.delivery_assignment, problem-full-6.py).
+
+find_best_dasher scans every available dasher, so an assignment is O(fleet size).
+DasherGridIndex keeps the available dashers in a uniform grid of cell_size x cell_size cells (same latitude/longitude
+plane as DistanceService), insert, move and remove are O(1).
+nearest / k_nearest search the cells ring by ring around the target, and stop when the next ring can not hold
+anything closer (every dasher in ring r + 1 is at least r * cell_size away), or when every dasher was found.
+The rings never go past the bounding box of the occupied cells, a cell emptied on its border shrinks it (recomputed
+by the next search), and once the searched square would have more cells than the index holds, the occupied cells
+left are scanned instead, so a k larger than the fleet or a far away outlier costs O(occupied cells), not O(area).
+Distances are computed with the same formula as DistanceService, and ties go to the dasher indexed first,
+so nearest returns the same dasher as the linear scan over the dashers in index order.
+The cell size is best around a few dashers per cell, the default (about 200 m) is for a dense metro area.
+"""
+
+import heapq
+import math
+
+# imported as part of the solutions package, or run as a script from solutions/
+if __package__:
+    from .delivery_model import Dasher, Location
+else:
+    from delivery_model import Dasher, Location
+
+class DasherGridIndex:
+    def __init__(self, cell_size: float = 0.002):
+        self.cell_size = cell_size
+        # (cell x, cell y) -> {dasher_id: dasher}
+        self.cells = {}
+        # dasher_id -> (cell, latitude, longitude, insertion order)
+        self.positions = {}
+        self.inserted = 0
+        # bounding box of the occupied cells, stale after a cell on its border was emptied
+        self.min_cell = None
+        self.max_cell = None
+        self.bounds_stale = False
+
+    @classmethod
+    def from_dashers(cls, dashers: list[Dasher], cell_size: float = 0.002):
+        index = cls(cell_size)
+        for dasher in dashers:
+            if dasher.is_available:
+                index.insert(dasher)
+        return index
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, dasher_id: str):
+        return dasher_id in self.positions
+
+    def _cell(self, latitude: float, longitude: float):
+        return math.floor(latitude / self.cell_size), math.floor(longitude / self.cell_size)
+
+    def insert(self, dasher: Dasher):
+        if dasher.dasher_id in self.positions:
+            self.move(dasher)
+            return
+        location = dasher.location
+        cell = self._cell(location.latitude, location.longitude)
+        self.cells.setdefault(cell, {})[dasher.dasher_id] = dasher
+        self.positions[dasher.dasher_id] = (cell, location.latitude, location.longitude, self.inserted)
+        self.inserted += 1
+        self._extend_bounds(cell)
+
+    def move(self, dasher: Dasher):
+        # the dasher keeps its insertion order, so the ties do not change when it moves
+        cell, _, _, order = self.positions[dasher.dasher_id]
+        location = dasher.location
+        new_cell = self._cell(location.latitude, location.longitude)
+        if new_cell != cell:
+            self._remove_from_cell(cell, dasher.dasher_id)
+            self.cells.setdefault(new_cell, {})[dasher.dasher_id] = dasher
+            self._extend_bounds(new_cell)
+        self.positions[dasher.dasher_id] = (new_cell, location.latitude, location.longitude, order)
+
+    def remove(self, dasher_id: str):
+        cell = self.positions.pop(dasher_id)[0]
+        self._remove_from_cell(cell, dasher_id)
+
+    def _remove_from_cell(self, cell, dasher_id: str):
+        dashers = self.cells[cell]
+        del dashers[dasher_id]
+        if not dashers:
+            del self.cells[cell]
+            if cell[0] in (self.min_cell[0], self.max_cell[0]) or cell[1] in (self.min_cell[1], self.max_cell[1]):
+                self.bounds_stale = True
+
+    def _extend_bounds(self, cell):
+        # stale bounds still hold every occupied cell, they can grow before they are recomputed
+        if self.min_cell is None:
+            self.min_cell, self.max_cell = cell, cell
+        else:
+            self.min_cell = (min(self.min_cell[0], cell[0]), min(self.min_cell[1], cell[1]))
+            self.max_cell = (max(self.max_cell[0], cell[0]), max(self.max_cell[1], cell[1]))
+
+    def _ring(self, center, radius: int):
+        # cells at Chebyshev distance radius from center
+        cx, cy = center
+        if radius == 0:
+            yield center
+            return
+        for x in range(cx - radius, cx + radius + 1):
+            yield x, cy - radius
+            yield x, cy + radius
+        for y in range(cy - radius + 1, cy + radius):
+            yield cx - radius, y
+            yield cx + radius, y
+
+    def _max_radius(self, center) -> int:
+        if self.bounds_stale:
+            self.bounds_stale = False
+            self.min_cell = self.max_cell = None
+            for cell in self.cells:
+                self._extend_bounds(cell)
+        if self.min_cell is None:
+            return -1
+        return max(abs(center[0] - self.min_cell[0]), abs(center[0] - self.max_cell[0]),
+                   abs(center[1] - self.min_cell[1]), abs(center[1] - self.max_cell[1]))
+
+    def k_nearest(self, target_location: Location, k: int) -> list[Dasher]:
+        """
+        Returns the k closest dashers, closest first.
+        """
+        if k <= 0 or not self.positions:
+            return []
+        latitude, longitude = target_location.latitude, target_location.longitude
+        center = self._cell(latitude, longitude)
+        positions = self.positions
+        cells = self.cells
+        # max heap of the k best (-distance, -insertion order, dasher)
+        best = []
+        for radius in range(self._max_radius(center) + 1):
+            if len(best) == len(positions) or (len(best) == k and -best[0][0] < (radius - 1) * self.cell_size):
+                break
+            # the square searched would have more cells than the index holds, its occupied cells left are scanned instead
+            scan_rest = (2 * radius + 1)**2 > len(cells)
+            if scan_rest:
+                cx, cy = center
+                searched = [cell for cell in cells if max(abs(cell[0] - cx), abs(cell[1] - cy)) >= radius]
+            else:
+                searched = self._ring(center, radius)
+            for cell in searched:
+                dashers = cells.get(cell)
+                if not dashers:
+                    continue
+                for dasher_id, dasher in dashers.items():
+                    _, dasher_latitude, dasher_longitude, order = positions[dasher_id]
+                    distance = math.sqrt((dasher_latitude - latitude)**2 + (dasher_longitude - longitude)**2)
+                    entry = (-distance, -order, dasher_id, dasher)
+                    if len(best) < k:
+                        heapq.heappush(best, entry)
+                    elif entry[:2] > best[0][:2]:
+                        heapq.heapreplace(best, entry)
+            if scan_rest:
+                break
+        return [entry[3] for entry in sorted(best, key=lambda entry: (-entry[0], -entry[1]))]
+
+    def nearest(self, target_location: Location):
+        dashers = self.k_nearest(target_location, 1)
+        return dashers[0] if dashers else None
@@ -0,0 +1,356 @@
+"""
+Distance services of the delivery assignment (solutions.delivery_assignment, problem-full-6.py).
+
+DistanceService is the service of the problem statement: calculate_distance is one pair (it prints, like the other
+mocks), calculate_distances is the vectorized batch from one origin to N points given as latitude / longitude arrays,
+in the plane of the coordinates ("euclidean", in degrees) or on the sphere ("haversine", in km).
+haversine_km is the same great circle distance for one pair, without numpy.
+CachingDistanceService wraps any of them with an LRU / TTL cache of the pairs.
+TravelTimeDistanceService replaces the distances by driving times read from a prebuilt, mmapped matrix.
+"""
+
+import heapq
+import itertools
+import json
+import math
+import mmap
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+# numpy is only needed by the vectorized paths, a service that compares pairs one at a time does not import it
+# imported as part of the solutions package, or run as a script from solutions/
+if __package__:
+    from .delivery_model import Location
+else:
+    from delivery_model import Location
+
+EARTH_RADIUS_KM = 6371.0088
+
+class DistanceService:
+    def __init__(self, metric: str = "euclidean"):
+        # metric of calculate_distances: "euclidean" (in degrees, same as calculate_distance) or "haversine" (in km)
+        if metric not in ("euclidean", "haversine"):
+            raise ValueError(f"Unknown distance metric {metric}")
+        self.metric = metric
+
+    def calculate_distance(self, loc1: Location, loc2: Location) -> float:
+        # Simple "Haversine" distance logic, or just fake it
+        print(f"Mock: Calculating distance between {loc1} and {loc2}")
+        # In an interview, it's fine to just return a simple calculation
+        return math.sqrt((loc1.latitude - loc2.latitude)**2 + (loc1.longitude - loc2.longitude)**2)
+
+    def calculate_distances(self, origin: Location, latitudes: "np.ndarray", longitudes: "np.ndarray", metric: str = None) -> "np.ndarray":
+        """
+        Distances from origin to N points given as latitude / longitude arrays, in one vectorized call.
+        """
+        import numpy as np
+        metric = metric or self.metric
+        if type(self).calculate_distance is not DistanceService.calculate_distance:
+            # a subclass (or a mock) with its own calculate_distance keeps being called pair by pair
+            return np.array([
+                self.calculate_distance(Location(latitude, longitude), origin)
+                for latitude, longitude in zip(latitudes.tolist(), longitudes.tolist())
+            ], dtype=np.float64)
+
+        if metric == "euclidean":
+            return np.sqrt((latitudes - origin.latitude)**2 + (longitudes - origin.longitude)**2)
+        if metric == "haversine":
+            lat1 = math.radians(origin.latitude)
+            lat2 = np.radians(latitudes)
+            half_dlat = (lat2 - lat1) / 2
+            half_dlon = np.radians(longitudes - origin.longitude) / 2
+            a = np.sin(half_dlat)**2 + math.cos(lat1) * np.cos(lat2) * np.sin(half_dlon)**2
+            return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        raise ValueError(f"Unknown distance metric {metric}")
+
+def haversine_km(loc1: Location, loc2: Location) -> float:
+    lat1, lat2 = math.radians(loc1.latitude), math.radians(loc2.latitude)
+    a = math.sin((lat2 - lat1) / 2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(math.radians(loc2.longitude - loc1.longitude) / 2)**2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+"""
+Distance cache:
+Restaurants are fixed points and dashers wait around a few hotspots, so the same pairs are asked again and again,
+which gets expensive once the distance is a real haversine or a road ETA.
+CachingDistanceService wraps a DistanceService and snaps both locations to a grid of precision degrees
+(1e-4 is about 11 m), the snapped pair is the cache key and the distance is computed between the snapped points,
+so the answer does not depend on which caller filled the entry (the error is at most precision per coordinate).
+The cache is an LRU of max_entries pairs, and ttl_seconds expires the entries of metrics that change over time (ETA).
+symmetric=True shares the entry of (a, b) and (b, a), only for metrics where it holds.
+The cache can be shared by threads (ConcurrentDeliveryAssignmentService): the lookups and the updates of the LRU run
+under a lock, the distance of a miss is computed outside of it, so two threads may compute the same pair at once.
+"""
+
+class CachingDistanceService(DistanceService):
+    def __init__(self, service: DistanceService, precision: float = 1e-4, max_entries: int = 100000,
+                 ttl_seconds: float = None, symmetric: bool = False, clock=time.monotonic):
+        # the wrapped service checked its metric, the cache may wrap services with their own (travel_time)
+        self.metric = service.metric
+        self.service = service
+        self.precision = precision
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.symmetric = symmetric
+        self.clock = clock
+        # (lat1, lon1, lat2, lon2) in units of precision -> (distance, computed at)
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _key(self, loc1: Location, loc2: Location) -> tuple:
+        precision = self.precision
+        point1 = (round(loc1.latitude / precision), round(loc1.longitude / precision))
+        point2 = (round(loc2.latitude / precision), round(loc2.longitude / precision))
+        if self.symmetric and point2 < point1:
+            point1, point2 = point2, point1
+        return point1 + point2
+
+    def calculate_distance(self, loc1: Location, loc2: Location) -> float:
+        key = self._key(loc1, loc2)
+        cache = self.cache
+        with self.lock:
+            entry = cache.get(key)
+            if entry is not None:
+                if self.ttl_seconds is None or self.clock() - entry[1] < self.ttl_seconds:
+                    cache.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del cache[key]
+                self.expirations += 1
+            self.misses += 1
+
+        precision = self.precision
+        distance = self.service.calculate_distance(Location(key[0] * precision, key[1] * precision),
+                                                   Location(key[2] * precision, key[3] * precision))
+        with self.lock:
+            cache[key] = (distance, self.clock() if self.ttl_seconds is not None else 0.0)
+            cache.move_to_end(key)
+            if len(cache) > self.max_entries:
+                cache.popitem(last=False)
+                self.evictions += 1
+        return distance
+
+    def calculate_distances(self, origin: Location, latitudes: "np.ndarray", longitudes: "np.ndarray", metric: str = None) -> "np.ndarray":
+        # the vectorized formulas and lookups are cheaper than the cache, only the pair by pair services go through it
+        service_type = type(self.service)
+        if (service_type.calculate_distance is DistanceService.calculate_distance
+                or service_type.calculate_distances is not DistanceService.calculate_distances):
+            return self.service.calculate_distances(origin, latitudes, longitudes, metric)
+        return super().calculate_distances(origin, latitudes, longitudes, metric)
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            # the dict itself, plus one key tuple, one entry tuple and their numbers per entry
+            entry_bytes = 0
+            for key, entry in itertools.islice(self.cache.items(), 1):
+                entry_bytes = sys.getsizeof(key) + sys.getsizeof(entry) + sum(map(sys.getsizeof, key + entry))
+            return {
+                "entries": len(self.cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "memory_bytes": sys.getsizeof(self.cache) + entry_bytes * len(self.cache)
+            }
+
+"""
+Travel time matrix:
+Straight-line distance is a poor proxy for the pickup time, and a routing engine call per candidate is too slow for
+find_best_dasher. build_travel_time_matrix runs offline: the city is cut into a grid of cells, every cell is snapped
+to its nearest road node, and one Dijkstra per destination cell over the reversed road graph gives the travel time
+from every cell to it. The road graph is supplied locally (RoadGraph.from_json), or derived from a table of speeds
+per cell (RoadGraph.from_speed_table, neighbouring cells connected at their average speed).
+
+Layout of the file (little endian):
+    header:  magic b"TTMX", uint32 version, float64 min latitude, float64 min longitude, float64 cell size,
+             uint32 rows, uint32 cols, then padding to 64 bytes
+    seconds: uint16[cells][cells], row = destination cell, column = origin cell, UNREACHABLE when there is no route
+Rows are destinations because a query has a fixed destination (the restaurant) and many origins (the dashers),
+so calculate_distances reads one contiguous row. TravelTimeMatrix maps the file with mmap, a lookup only touches
+the pages it reads, the matrix is never loaded into the heap.
+"""
+
+TRAVEL_TIME_HEADER = struct.Struct("<4sIdddII")
+TRAVEL_TIME_MAGIC = b"TTMX"
+TRAVEL_TIME_VERSION = 1
+TRAVEL_TIME_HEADER_SIZE = 64
+UNREACHABLE = 65535
+
+@dataclass
+class TravelTimeGrid:
+    min_latitude: float
+    min_longitude: float
+    cell_size: float
+    rows: int
+    cols: int
+
+    @property
+    def n_cells(self) -> int:
+        return self.rows * self.cols
+
+    def cell(self, location: Location) -> int:
+        # -1 outside of the grid
+        row = math.floor((location.latitude - self.min_latitude) / self.cell_size)
+        col = math.floor((location.longitude - self.min_longitude) / self.cell_size)
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row * self.cols + col
+        return -1
+
+    def cells(self, latitudes: "np.ndarray", longitudes: "np.ndarray") -> "np.ndarray":
+        import numpy as np
+        rows = np.floor((latitudes - self.min_latitude) / self.cell_size)
+        cols = np.floor((longitudes - self.min_longitude) / self.cell_size)
+        inside = (rows >= 0) & (rows < self.rows) & (cols >= 0) & (cols < self.cols)
+        return np.where(inside, rows * self.cols + cols, -1).astype(np.int64)
+
+    def center(self, cell: int) -> Location:
+        row, col = divmod(cell, self.cols)
+        return Location(self.min_latitude + (row + 0.5) * self.cell_size, self.min_longitude + (col + 0.5) * self.cell_size)
+
+@dataclass
+class RoadGraph:
+    locations: list[Location]
+    # (from node, to node, seconds), one way
+    edges: list[tuple]
+
+    @classmethod
+    def from_json(cls, path: str):
+        # {"nodes": [[latitude, longitude], ...], "edges": [[from, to, seconds], ...], "two_way": true}
+        with open(path) as graph_file:
+            graph = json.load(graph_file)
+        edges = [tuple(edge) for edge in graph["edges"]]
+        if graph.get("two_way", False):
+            edges += [(to_node, from_node, seconds) for from_node, to_node, seconds in edges]
+        return cls([Location(latitude, longitude) for latitude, longitude in graph["nodes"]], edges)
+
+    @classmethod
+    def from_speed_table(cls, grid: TravelTimeGrid, speeds_kmh: "np.ndarray"):
+        import numpy as np
+        # speeds_kmh[row][col] is the average speed across the cell, 0 for the cells nobody can drive through
+        locations = [grid.center(cell) for cell in range(grid.n_cells)]
+        edges = []
+        service = DistanceService(metric="haversine")
+        for row in range(grid.rows):
+            for col in range(grid.cols):
+                if speeds_kmh[row][col] <= 0:
+                    continue
+                for d_row, d_col in ((0, 1), (1, -1), (1, 0), (1, 1)):
+                    other_row, other_col = row + d_row, col + d_col
+                    if not (0 <= other_row < grid.rows and 0 <= other_col < grid.cols) or speeds_kmh[other_row][other_col] <= 0:
+                        continue
+                    cell, other = row * grid.cols + col, other_row * grid.cols + other_col
+                    km = float(service.calculate_distances(locations[cell], np.array([locations[other].latitude]),
+                                                           np.array([locations[other].longitude]))[0])
+                    seconds = km / ((speeds_kmh[row][col] + speeds_kmh[other_row][other_col]) / 2) * 3600
+                    edges += [(cell, other, seconds), (other, cell, seconds)]
+        return cls(locations, edges)
+
+def _travel_times_to(reverse_adjacency: list, target: int) -> list:
+    # Dijkstra from target over the reversed edges: seconds from every node to target
+    seconds = [math.inf] * len(reverse_adjacency)
+    seconds[target] = 0.0
+    heap = [(0.0, target)]
+    while heap:
+        node_seconds, node = heapq.heappop(heap)
+        if node_seconds > seconds[node]:
+            continue
+        for previous, edge_seconds in reverse_adjacency[node]:
+            candidate = node_seconds + edge_seconds
+            if candidate < seconds[previous]:
+                seconds[previous] = candidate
+                heapq.heappush(heap, (candidate, previous))
+    return seconds
+
+def build_travel_time_matrix(output_path: str, grid: TravelTimeGrid, graph: RoadGraph) -> int:
+    """
+    Writes the cell to cell travel times (in seconds, capped below UNREACHABLE) to output_path, returns the file size.
+    """
+    import numpy as np
+    reverse_adjacency = [[] for _ in graph.locations]
+    for from_node, to_node, seconds in graph.edges:
+        reverse_adjacency[to_node].append((from_node, seconds))
+
+    # every cell is snapped to the nearest road node of its center
+    latitudes = np.array([location.latitude for location in graph.locations])
+    longitudes = np.array([location.longitude for location in graph.locations])
+    service = DistanceService()
+    cell_nodes = np.array([int(np.argmin(service.calculate_distances(grid.center(cell), latitudes, longitudes)))
+                           for cell in range(grid.n_cells)], dtype=np.int64)
+
+    matrix = np.full((grid.n_cells, grid.n_cells), UNREACHABLE, dtype=np.uint16)
+    node_rows = {}
+    for cell, node in enumerate(cell_nodes.tolist()):
+        if node not in node_rows:
+            node_seconds = np.array(_travel_times_to(reverse_adjacency, node))
+            node_seconds = np.where(np.isfinite(node_seconds), np.minimum(np.round(node_seconds), UNREACHABLE - 1), UNREACHABLE)
+            node_rows[node] = node_seconds.astype(np.uint16)
+        matrix[cell] = node_rows[node][cell_nodes]
+
+    with open(output_path, "wb") as output:
+        header = TRAVEL_TIME_HEADER.pack(TRAVEL_TIME_MAGIC, TRAVEL_TIME_VERSION, grid.min_latitude, grid.min_longitude,
+                                         grid.cell_size, grid.rows, grid.cols)
+        output.write(header.ljust(TRAVEL_TIME_HEADER_SIZE, b"\0"))
+        output.write(matrix.tobytes())
+    return TRAVEL_TIME_HEADER_SIZE + matrix.nbytes
+
+class TravelTimeMatrix:
+    def __init__(self, path: str):
+        import numpy as np
+        self.file = open(path, "rb")
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, min_latitude, min_longitude, cell_size, rows, cols = TRAVEL_TIME_HEADER.unpack_from(self.mmap, 0)
+        if magic != TRAVEL_TIME_MAGIC or version != TRAVEL_TIME_VERSION:
+            raise ValueError(f"Not a travel time matrix: {path}")
+        self.grid = TravelTimeGrid(min_latitude, min_longitude, cell_size, rows, cols)
+        n_cells = self.grid.n_cells
+        self.seconds = np.frombuffer(self.mmap, dtype=np.uint16, count=n_cells * n_cells,
+                                     offset=TRAVEL_TIME_HEADER_SIZE).reshape(n_cells, n_cells)
+
+    def travel_time(self, origin: Location, destination: Location) -> float:
+        origin_cell, destination_cell = self.grid.cell(origin), self.grid.cell(destination)
+        if origin_cell < 0 or destination_cell < 0:
+            return math.inf
+        seconds = int(self.seconds[destination_cell, origin_cell])
+        return math.inf if seconds == UNREACHABLE else float(seconds)
+
+    def travel_times(self, origins_latitudes: "np.ndarray", origins_longitudes: "np.ndarray", destination: Location) -> "np.ndarray":
+        import numpy as np
+        destination_cell = self.grid.cell(destination)
+        origin_cells = self.grid.cells(origins_latitudes, origins_longitudes)
+        if destination_cell < 0:
+            return np.full(len(origin_cells), np.inf)
+        seconds = self.seconds[destination_cell][origin_cells].astype(np.float64)
+        seconds[(origin_cells < 0) | (seconds == UNREACHABLE)] = np.inf
+        return seconds
+
+    def close(self):
+        # the numpy view has to be released before the mmap can be closed
+        self.seconds = None
+        self.mmap.close()
+        self.file.close()
+
+class TravelTimeDistanceService(DistanceService):
+    def __init__(self, matrix: TravelTimeMatrix):
+        # distances are travel seconds, math.inf outside of the grid or without a route
+        self.metric = "travel_time"
+        self.matrix = matrix
+
+    def calculate_distance(self, loc1: Location, loc2: Location) -> float:
+        # find_best_dasher asks for (dasher, restaurant), the time for the dasher to drive to the restaurant
+        return self.matrix.travel_time(loc1, loc2)
+
+    def calculate_distances(self, origin: Location, latitudes: "np.ndarray", longitudes: "np.ndarray", metric: str = None) -> "np.ndarray":
+        return self.matrix.travel_times(latitudes, longitudes, origin)
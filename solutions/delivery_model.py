@@ -0,0 +1,105 @@
+"""
+Orders, dashers and their repositories, shared by the delivery assignment modules:
+    solutions.delivery_assignment   problem-full-6.py, the DeliveryAssignmentService
+    dasher_index                    DasherGridIndex, nearest available dashers
+    delivery_distances              DistanceService and the services that wrap or replace it
+    delivery_persistence            write-behind and SQLite repositories
+
+Location, Order, Dasher and Delivery are slotted dataclasses, Location and Delivery are frozen.
+DasherRepository and OrderRepository are the mock repositories of the problem statement (they print what a database
+would do), InMemoryDasherRepository and InMemoryOrderRepository keep the saved entities in dicts.
+"""
+
+from dataclasses import dataclass
+from enum import Enum
+
+@dataclass(frozen=True, slots=True)
+class Location:
+    latitude: float
+    longitude: float
+
+class OrderStatus(Enum):
+    ASSIGNED = 1
+    PENDING = 2
+    DELIVERED = 3
+
+@dataclass(slots=True)
+class Order:
+    order_id: str
+    order_location: Location
+    customer_location: Location
+    status: OrderStatus
+
+@dataclass(slots=True)
+class Dasher:
+    dasher_id: str
+    location: Location
+    is_available: bool
+    # inputs of the scoring pipeline: orders in hand, share of offers accepted, direction of travel in degrees
+    # (0 is north, clockwise, None when the dasher is not moving)
+    active_orders: int = 0
+    acceptance_rate: float = 1.0
+    heading: float = None
+
+@dataclass(frozen=True, slots=True)
+class Delivery:
+    delivery_id: str
+    order_id: str
+    dasher_id: str
+
+class InvalidOrderException(Exception):
+    pass
+class NoDashersAvailableException(Exception):
+    pass
+
+class DasherRepository:
+    def get_available_dashers(self) -> list[Dasher]:
+        # In a real app, this queries a DB
+        # For the interview, we can hardcode mock data here
+        print("Mock: Fetching available dashers...")
+        return [
+            Dasher("d_001", Location(43.65, -79.38), True),
+            Dasher("d_002", Location(43.70, -79.40), True),
+            Dasher("d_003", Location(43.60, -79.35), True),
+        ]
+    
+    def save(self, dasher: Dasher):
+        print(f"Mock: Saving Dasher {dasher.dasher_id}, is_available={dasher.is_available}")
+
+    def save_many(self, dashers: list[Dasher]):
+        # one round trip for many rows in a real app
+        for dasher in dashers:
+            self.save(dasher)
+
+class OrderRepository:
+    def save(self, order: Order):
+        print(f"Mock: Saving Order {order.order_id}, status={order.status.name}")
+
+    def save_many(self, orders: list[Order]):
+        for order in orders:
+            self.save(order)
+
+class InMemoryDasherRepository(DasherRepository):
+    def __init__(self, dashers: list[Dasher] = ()):
+        self.dashers = {dasher.dasher_id: dasher for dasher in dashers}
+
+    def get_available_dashers(self) -> list[Dasher]:
+        return [dasher for dasher in self.dashers.values() if dasher.is_available]
+
+    def save(self, dasher: Dasher):
+        self.dashers[dasher.dasher_id] = dasher
+
+    def save_many(self, dashers: list[Dasher]):
+        for dasher in dashers:
+            self.dashers[dasher.dasher_id] = dasher
+
+class InMemoryOrderRepository(OrderRepository):
+    def __init__(self):
+        self.orders = {}
+
+    def save(self, order: Order):
+        self.orders[order.order_id] = order
+
+    def save_many(self, orders: list[Order]):
+        for order in orders:
+            self.orders[order.order_id] = order
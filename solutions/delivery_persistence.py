@@ -0,0 +1,304 @@
+"""
+Persistence of the delivery assignment (solutions.delivery_assignment, problem-full-6.py).
+
+Write-behind persistence:
+assign_order saved the order and the dasher synchronously, two storage round trips on every assignment.
+WriteBehindRepository wraps a repository: save only queues the entity in a WriteBehindQueue, and a background thread
+writes the queue in bulk (save_many) every flush_seconds, or as soon as max_batch entities are waiting.
+Saving an entity that is already queued only keeps its latest state, and moves it to the end of the queue.
+Batches are written one at a time and in order, a batch is one bulk write per repository: the repositories in the
+order of their first entity in the batch (the orders before the dashers for assign_order), the entities of one
+repository in the order of their last change. A failed write keeps the rest of the batch queued, ahead of the newer
+saves, and the background thread retries it with an exponential backoff (up to max_backoff_seconds).
+close() (also called at exit) writes everything that is left.
+WriteBehindDasherRepository also answers get_available_dashers with the queued dasher states, so a dasher assigned
+but not written yet is not returned as available.
+"""
+
+import atexit
+import contextlib
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# imported as part of the solutions package, or run as a script from solutions/
+if __package__:
+    from .delivery_model import Dasher, DasherRepository, Location, Order, OrderRepository, OrderStatus
+else:
+    from delivery_model import Dasher, DasherRepository, Location, Order, OrderRepository, OrderStatus
+
+class WriteBehindQueue:
+    def __init__(self, max_batch: int = 500, flush_seconds: float = 0.05, max_backoff_seconds: float = 5.0):
+        self.max_batch = max_batch
+        self.flush_seconds = flush_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        # (id of the repository, entity key) -> (repository, entity)
+        self.pending = OrderedDict()
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()
+        self.closed = False
+        self.flushes = 0
+        self.written = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def enqueue(self, repository, key, entity):
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("Write-behind queue is closed")
+            pending_key = (id(repository), key)
+            if pending_key in self.pending:
+                self.coalesced += 1
+                self.pending.move_to_end(pending_key)
+            self.pending[pending_key] = (repository, entity)
+            if len(self.pending) >= self.max_batch:
+                self.condition.notify()
+
+    def queued(self, repository, key):
+        # the latest state of an entity that is not written yet, or None
+        with self.condition:
+            entry = self.pending.get((id(repository), key))
+        return entry[1] if entry else None
+
+    def _run(self):
+        backoff = 0.0
+        while True:
+            with self.condition:
+                if backoff:
+                    # after a failed write, the retry waits out the whole backoff even when the queue fills up
+                    deadline = time.monotonic() + backoff
+                    while not self.closed and deadline > time.monotonic():
+                        self.condition.wait(deadline - time.monotonic())
+                elif not self.closed and len(self.pending) < self.max_batch:
+                    self.condition.wait(self.flush_seconds)
+                if self.closed:
+                    return
+            try:
+                self.flush()
+                backoff = 0.0
+            except Exception:
+                # flush printed the error and queued the batch again, the thread keeps going
+                self.failures += 1
+                backoff = min(max(backoff * 2, self.flush_seconds), self.max_backoff_seconds)
+
+    def flush(self):
+        # the write lock keeps the batches in order when flush is also called from another thread
+        with self.write_lock:
+            with self.condition:
+                batch = self.pending
+                self.pending = OrderedDict()
+            if not batch:
+                return
+            written = 0
+            try:
+                # one bulk write per repository, in the order of their first entity in the batch
+                runs = {}
+                for pending_key, (repository, entity) in batch.items():
+                    runs.setdefault(id(repository), (repository, []))[1].append((pending_key, entity))
+                for repository, items in runs.values():
+                    repository.save_many([entity for _, entity in items])
+                    for pending_key, _ in items:
+                        del batch[pending_key]
+                    written += len(items)
+            except Exception as e:
+                print("Write-behind flush failed, the rest of the batch is queued again", e)
+                with self.condition:
+                    # the states queued during the failed write are newer than the batch
+                    for pending_key, entry in self.pending.items():
+                        batch.pop(pending_key, None)
+                        batch[pending_key] = entry
+                    self.pending = batch
+                raise
+            finally:
+                self.written += written
+            self.flushes += 1
+
+    def close(self):
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.condition.notify()
+        atexit.unregister(self.close)
+        self.thread.join()
+        self.flush()
+
+class WriteBehindRepository:
+    def __init__(self, repository, queue: WriteBehindQueue, key):
+        # key(entity) identifies the entity, two saves of the same key are coalesced
+        self.repository = repository
+        self.queue = queue
+        self.key = key
+
+    def save(self, entity):
+        self.queue.enqueue(self.repository, self.key(entity), entity)
+
+    def save_many(self, entities):
+        for entity in entities:
+            self.save(entity)
+
+    def __getattr__(self, name):
+        # the reads go to the wrapped repository
+        return getattr(self.repository, name)
+
+class WriteBehindOrderRepository(WriteBehindRepository):
+    def __init__(self, repository: OrderRepository, queue: WriteBehindQueue):
+        super().__init__(repository, queue, key=lambda order: order.order_id)
+
+class WriteBehindDasherRepository(WriteBehindRepository):
+    def __init__(self, repository: DasherRepository, queue: WriteBehindQueue):
+        super().__init__(repository, queue, key=lambda dasher: dasher.dasher_id)
+
+    def get_available_dashers(self) -> list[Dasher]:
+        dashers = []
+        for dasher in self.repository.get_available_dashers():
+            queued = self.queue.queued(self.repository, dasher.dasher_id)
+            if queued is None or queued.is_available:
+                dashers.append(dasher)
+        return dashers
+
+"""
+SQLite repositories:
+SqliteDasherRepository and SqliteOrderRepository are drop-in replacements for the mock repositories, on a local
+SQLite file in WAL mode (readers do not block the writer). The SQL texts are constants, so every connection prepares
+them once and reuses them from its statement cache. save_many is one executemany upsert in one transaction.
+Available dashers are found through a partial index on (latitude, longitude) of the available rows only, which also
+serves get_available_dashers_near, a bounding box query around a location.
+The dashers keep their scoring inputs (active_orders, acceptance_rate, heading), so a ScoringPipeline ranks them the
+same as with the in-memory repositories, and the tables of an older file get the missing columns when opened.
+SqliteConnectionPool hands out a few connections, one thread at a time per connection.
+"""
+
+class SqliteConnectionPool:
+    def __init__(self, path: str, size: int = 4):
+        self.path = path
+        self.connections = queue.LifoQueue()
+        for _ in range(size):
+            connection = sqlite3.connect(path, check_same_thread=False, cached_statements=256)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.execute("PRAGMA busy_timeout = 5000")
+            self.connections.put(connection)
+        self.size = size
+
+    @contextlib.contextmanager
+    def connection(self):
+        connection = self.connections.get()
+        try:
+            yield connection
+        finally:
+            self.connections.put(connection)
+
+    def close(self):
+        for _ in range(self.size):
+            self.connections.get().close()
+
+class SqliteDasherRepository(DasherRepository):
+    CREATE = [
+        "CREATE TABLE IF NOT EXISTS dashers (dasher_id TEXT PRIMARY KEY, latitude REAL NOT NULL, longitude REAL NOT NULL, "
+        "is_available INTEGER NOT NULL, active_orders INTEGER NOT NULL DEFAULT 0, "
+        "acceptance_rate REAL NOT NULL DEFAULT 1.0, heading REAL) WITHOUT ROWID",
+        "CREATE INDEX IF NOT EXISTS dashers_available ON dashers (latitude, longitude) WHERE is_available = 1"
+    ]
+    # the scoring inputs, added to the tables created before they were stored (heading NULL is None)
+    SCORING_COLUMNS = {
+        "active_orders": "INTEGER NOT NULL DEFAULT 0",
+        "acceptance_rate": "REAL NOT NULL DEFAULT 1.0",
+        "heading": "REAL"
+    }
+    UPSERT = ("INSERT INTO dashers (dasher_id, latitude, longitude, is_available, active_orders, acceptance_rate, heading) "
+              "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (dasher_id) DO UPDATE SET latitude = excluded.latitude, "
+              "longitude = excluded.longitude, is_available = excluded.is_available, active_orders = excluded.active_orders, "
+              "acceptance_rate = excluded.acceptance_rate, heading = excluded.heading")
+    COLUMNS = "dasher_id, latitude, longitude, is_available, active_orders, acceptance_rate, heading"
+    SELECT_AVAILABLE = f"SELECT {COLUMNS} FROM dashers WHERE is_available = 1"
+    SELECT_NEAR = (f"SELECT {COLUMNS} FROM dashers WHERE is_available = 1 "
+                   "AND latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?")
+    SELECT_ONE = f"SELECT {COLUMNS} FROM dashers WHERE dasher_id = ?"
+
+    def __init__(self, pool: SqliteConnectionPool):
+        self.pool = pool
+        with pool.connection() as connection, connection:
+            for statement in self.CREATE:
+                connection.execute(statement)
+            existing = {row[1] for row in connection.execute("PRAGMA table_info(dashers)")}
+            for column, definition in self.SCORING_COLUMNS.items():
+                if column not in existing:
+                    connection.execute(f"ALTER TABLE dashers ADD COLUMN {column} {definition}")
+
+    @staticmethod
+    def _dasher(row) -> Dasher:
+        return Dasher(row[0], Location(row[1], row[2]), bool(row[3]), row[4], row[5], row[6])
+
+    def get_available_dashers(self) -> list[Dasher]:
+        with self.pool.connection() as connection:
+            rows = connection.execute(self.SELECT_AVAILABLE).fetchall()
+        return [self._dasher(row) for row in rows]
+
+    def get_available_dashers_near(self, location: Location, radius: float) -> list[Dasher]:
+        # radius in degrees, like the Euclidean DistanceService
+        with self.pool.connection() as connection:
+            rows = connection.execute(self.SELECT_NEAR, (location.latitude - radius, location.latitude + radius,
+                                                         location.longitude - radius, location.longitude + radius)).fetchall()
+        return [self._dasher(row) for row in rows]
+
+    def get(self, dasher_id: str):
+        with self.pool.connection() as connection:
+            row = connection.execute(self.SELECT_ONE, (dasher_id, )).fetchone()
+        return self._dasher(row) if row else None
+
+    def save(self, dasher: Dasher):
+        self.save_many([dasher])
+
+    def save_many(self, dashers: list[Dasher]):
+        rows = [(dasher.dasher_id, dasher.location.latitude, dasher.location.longitude, int(dasher.is_available),
+                 dasher.active_orders, dasher.acceptance_rate, dasher.heading) for dasher in dashers]
+        with self.pool.connection() as connection, connection:
+            connection.executemany(self.UPSERT, rows)
+
+class SqliteOrderRepository(OrderRepository):
+    CREATE = [
+        "CREATE TABLE IF NOT EXISTS orders (order_id TEXT PRIMARY KEY, order_latitude REAL, order_longitude REAL, "
+        "customer_latitude REAL, customer_longitude REAL, status INTEGER NOT NULL) WITHOUT ROWID",
+        "CREATE INDEX IF NOT EXISTS orders_pending ON orders (order_id) WHERE status = 2"
+    ]
+    UPSERT = ("INSERT INTO orders (order_id, order_latitude, order_longitude, customer_latitude, customer_longitude, status) "
+              "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (order_id) DO UPDATE SET order_latitude = excluded.order_latitude, "
+              "order_longitude = excluded.order_longitude, customer_latitude = excluded.customer_latitude, "
+              "customer_longitude = excluded.customer_longitude, status = excluded.status")
+    SELECT_ONE = "SELECT order_id, order_latitude, order_longitude, customer_latitude, customer_longitude, status FROM orders WHERE order_id = ?"
+    SELECT_PENDING = "SELECT order_id, order_latitude, order_longitude, customer_latitude, customer_longitude, status FROM orders WHERE status = 2"
+
+    def __init__(self, pool: SqliteConnectionPool):
+        self.pool = pool
+        with pool.connection() as connection, connection:
+            for statement in self.CREATE:
+                connection.execute(statement)
+
+    @staticmethod
+    def _order(row) -> Order:
+        return Order(row[0], Location(row[1], row[2]), Location(row[3], row[4]), OrderStatus(row[5]))
+
+    def get(self, order_id: str):
+        with self.pool.connection() as connection:
+            row = connection.execute(self.SELECT_ONE, (order_id, )).fetchone()
+        return self._order(row) if row else None
+
+    def get_pending_orders(self) -> list[Order]:
+        with self.pool.connection() as connection:
+            rows = connection.execute(self.SELECT_PENDING).fetchall()
+        return [self._order(row) for row in rows]
+
+    def save(self, order: Order):
+        self.save_many([order])
+
+    def save_many(self, orders: list[Order]):
+        rows = [(order.order_id, order.order_location.latitude, order.order_location.longitude,
+                 order.customer_location.latitude, order.customer_location.longitude, order.status.value) for order in orders]
+        with self.pool.connection() as connection, connection:
+            connection.executemany(self.UPSERT, rows)
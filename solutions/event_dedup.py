@@ -0,0 +1,268 @@
+"""
+Event deduplication for the transaction aggregators (reconcile_transactions, calculate_orders_net_total).
+
+The payment bus delivers events at least once, so the same event_id can show up more than once in a log.
+A python set of every event_id of a month does not fit in memory, so there are three ways to check:
+
+ExactDeduplicator: in memory set, spilled to a sqlite file on disk when it gets too big.
+    A bloom filter of the spilled ids is kept in memory, so the disk is only read for the events that
+    are likely duplicates (real duplicates + the false positives of the filter).
+BloomDeduplicator: only the bloom filter, fixed memory, a new event is dropped as a duplicate
+    with the configured false positive rate.
+WindowedDeduplicator: remembers the event_ids of the last `window` events (or seconds, when a time key is given),
+    redeliveries are expected to come soon after the original delivery.
+
+Events without an event_id are never duplicates.
+"""
+
+import functools
+import math
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import zlib
+from abc import ABC, abstractmethod
+from array import array
+from collections import deque
+
+class EventDeduplicator(ABC):
+    def __init__(self):
+        self.checked = 0
+        self.duplicates = 0
+
+    def seen(self, event) -> bool:
+        # True if the event was already seen, else the event is recorded and False is returned
+        if not isinstance(event, dict):
+            return False
+        event_id = event.get("event_id")
+        if event_id is None:
+            return False
+        if type(event_id) is not str:
+            event_id = str(event_id)
+        self.checked += 1
+        if self._check_and_add(event_id, event):
+            self.duplicates += 1
+            return True
+        return False
+
+    @abstractmethod
+    def _check_and_add(self, event_id: str, event: dict) -> bool:
+        # True if event_id was already recorded, else it is recorded
+        ...
+
+    @abstractmethod
+    def memory_bytes(self) -> int:
+        ...
+
+    def stats(self) -> dict:
+        return {"checked": self.checked, "duplicates": self.duplicates, "memory_bytes": self.memory_bytes()}
+
+    def close(self):
+        pass
+
+@functools.lru_cache(maxsize=None)
+def _blocked_bloom_shape(false_positive_rate: float):
+    # (bits per key, hashes per key) of the smallest filter that meets the rate.
+    # The keys land in the words unevenly (poisson), so the rate is summed over the word fill instead of
+    # using the classic formula, which assumes every key spreads its bits over the whole array.
+    def rate(keys_per_word, n_hashes):
+        high, low = (n_hashes + 1) // 2, n_hashes // 2
+        bits = high + low * (1 - high / 64)  # the two half masks can share bits
+        probability, total, keys = math.exp(-keys_per_word), 0.0, 0
+        while keys <= keys_per_word or probability > 1e-15:
+            total += probability * (1 - (1 - bits / 64) ** keys) ** bits
+            keys += 1
+            probability *= keys_per_word / keys
+        return total
+
+    best = (0.0, 1)
+    for n_hashes in range(1, 17):
+        low, high = 0.0, 64.0
+        for _ in range(40):
+            middle = (low + high) / 2
+            low, high = (middle, high) if rate(middle, n_hashes) <= false_positive_rate else (low, middle)
+        best = max(best, (low, n_hashes))
+    keys_per_word, n_hashes = best
+    # whole bits per key, the rounding up is headroom for the independence assumed by rate()
+    return math.ceil(64 / keys_per_word), n_hashes
+
+class BloomFilter:
+    """
+    Blocked bloom filter: all the k bits of a key are in one 64 bit word, so a check is one digest,
+    one word read and one mask compare instead of k separate bit lookups.
+    The mask of a key is the OR of two precomputed half masks picked by two groups of digest bits,
+    one table of k-bit masks would repeat masks often enough to set a floor under the false positive rate.
+    """
+    MASK_BITS = 10  # per half mask table, 0x3FF in _slot
+
+    def __init__(self, capacity: int, false_positive_rate: float):
+        capacity = max(1, capacity)
+        bits_per_key, self.n_hashes = _blocked_bloom_shape(false_positive_rate)
+        self.words = array("Q", bytes(8 * max(1, math.ceil(capacity * bits_per_key / 64))))
+
+        masks_rng = random.Random(self.n_hashes)
+        self.high_masks, self.low_masks = (array("Q", (
+            sum(1 << bit for bit in masks_rng.sample(range(64), n_bits))
+            for _ in range(1 << self.MASK_BITS)
+        )) for n_bits in ((self.n_hashes + 1) // 2, self.n_hashes // 2))
+
+    def _slot(self, key: str):
+        # crc32 and adler32 are the cheapest stable hashes in the standard library, python's hash() is
+        # randomized per process. Both are close to linear on ids like "evt-123", a splitmix64 style round
+        # mixes every input bit into the top bits that pick the masks.
+        data = key.encode()
+        digest = zlib.crc32(data) << 32 | zlib.adler32(data)
+        digest = ((digest ^ digest >> 30) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+        digest ^= digest >> 31
+        masks = digest >> (64 - 2 * self.MASK_BITS)
+        return digest % len(self.words), self.high_masks[masks >> self.MASK_BITS] | self.low_masks[masks & 0x3FF]
+
+    def add(self, key: str) -> bool:
+        # adds the key, returns True if it was (probably) already there
+        word, mask = self._slot(key)
+        value = self.words[word]
+        if value & mask == mask:
+            return True
+        self.words[word] = value | mask
+        return False
+
+    def __contains__(self, key: str) -> bool:
+        word, mask = self._slot(key)
+        return self.words[word] & mask == mask
+
+    def memory_bytes(self) -> int:
+        return (len(self.words) + len(self.high_masks) + len(self.low_masks)) * 8
+
+class BloomDeduplicator(EventDeduplicator):
+    def __init__(self, capacity: int, false_positive_rate: float = 0.001):
+        super().__init__()
+        self.bloom = BloomFilter(capacity, false_positive_rate)
+
+    def _check_and_add(self, event_id: str, event: dict) -> bool:
+        return self.bloom.add(event_id)
+
+    def memory_bytes(self) -> int:
+        return self.bloom.memory_bytes()
+
+class ExactDeduplicator(EventDeduplicator):
+    def __init__(self, max_memory_ids: int = 1_000_000, expected_ids: int = 10_000_000, spill_dir: str = None):
+        super().__init__()
+        self.max_memory_ids = max_memory_ids
+        self.memory_ids = set()
+        self.spilled = 0
+        self.disk_lookups = 0
+        self.spill_bloom = BloomFilter(expected_ids, 0.01)
+        self.tmp_dir = tempfile.TemporaryDirectory(dir=spill_dir)
+        self.db = sqlite3.connect(os.path.join(self.tmp_dir.name, "event_ids.sqlite"))
+        self.db.execute("PRAGMA journal_mode = OFF")
+        self.db.execute("PRAGMA synchronous = OFF")
+        self.db.execute("CREATE TABLE event_ids (event_id TEXT PRIMARY KEY) WITHOUT ROWID")
+
+    def _check_and_add(self, event_id: str, event: dict) -> bool:
+        if event_id in self.memory_ids:
+            return True
+        if self.spilled and event_id in self.spill_bloom:
+            self.disk_lookups += 1
+            if self.db.execute("SELECT 1 FROM event_ids WHERE event_id = ?", (event_id, )).fetchone():
+                return True
+
+        self.memory_ids.add(event_id)
+        if len(self.memory_ids) >= self.max_memory_ids:
+            self._spill()
+        return False
+
+    def _spill(self):
+        with self.db:
+            self.db.executemany("INSERT INTO event_ids VALUES (?)", ((event_id, ) for event_id in self.memory_ids))
+        for event_id in self.memory_ids:
+            self.spill_bloom.add(event_id)
+        self.spilled += len(self.memory_ids)
+        self.memory_ids.clear()
+
+    def memory_bytes(self) -> int:
+        ids_size = sum(sys.getsizeof(event_id) for event_id in self.memory_ids)
+        return sys.getsizeof(self.memory_ids) + ids_size + self.spill_bloom.memory_bytes()
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats.update({"spilled_ids": self.spilled, "disk_lookups": self.disk_lookups})
+        return stats
+
+    def close(self):
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+class WindowedDeduplicator(EventDeduplicator):
+    def __init__(self, window: float, time_key: str = None):
+        """
+        window is a number of previous events, or a number of seconds of event[time_key] when time_key is given.
+        """
+        super().__init__()
+        self.window = window
+        self.time_key = time_key
+        self.position = 0
+        self.last_seen = {}
+        self.expiry = deque()
+
+    def _check_and_add(self, event_id: str, event: dict) -> bool:
+        self.position += 1
+        now = self.position
+        if self.time_key is not None:
+            try:
+                now = float(event.get(self.time_key))
+            except (TypeError, ValueError):
+                now = self.expiry[-1][0] if self.expiry else 0.0
+
+        expiry = self.expiry
+        last_seen = self.last_seen
+        while expiry and expiry[0][0] < now - self.window:
+            seen_at, old_id = expiry.popleft()
+            # the id could have been seen again later, only the latest entry removes it
+            if last_seen.get(old_id) == seen_at:
+                del last_seen[old_id]
+
+        duplicate = event_id in last_seen
+        last_seen[event_id] = now
+        expiry.append((now, event_id))
+        return duplicate
+
+    def memory_bytes(self) -> int:
+        ids_size = sum(sys.getsizeof(event_id) for event_id in self.last_seen)
+        return sys.getsizeof(self.last_seen) + sys.getsizeof(self.expiry) + ids_size
+
+def deduplicator_benchmark(n_events: int = 1_000_000, duplicate_every: int = 50):
+    events = []
+    for i in range(n_events):
+        events.append({"event_id": f"evt-{i}"})
+        if i % duplicate_every == 0:
+            events.append({"event_id": f"evt-{max(0, i - 1000)}"})
+
+    start = time.perf_counter()
+    seen_ids = set()
+    for event in events:
+        event_id = event["event_id"]
+        if event_id not in seen_ids:
+            seen_ids.add(event_id)
+    set_time = time.perf_counter() - start
+    set_memory = sys.getsizeof(seen_ids) + sum(sys.getsizeof(event_id) for event_id in seen_ids)
+    print(f"{'python set':<12} {set_time * 1e9 / len(events):6.0f} ns/event, memory {set_memory / 1e6:7.1f} MB")
+
+    for name, dedup in (
+        ("exact", ExactDeduplicator(max_memory_ids=100_000, expected_ids=n_events)),
+        ("bloom", BloomDeduplicator(capacity=n_events, false_positive_rate=0.001)),
+        ("windowed", WindowedDeduplicator(window=10_000))
+    ):
+        start = time.perf_counter()
+        for event in events:
+            dedup.seen(event)
+        elapsed = time.perf_counter() - start
+        stats = dedup.stats()
+        print(f"{name:<12} {elapsed * 1e9 / len(events):6.0f} ns/event, memory {stats['memory_bytes'] / 1e6:7.1f} MB, "
+              f"duplicates {stats['duplicates']}")
+        dedup.close()
+
+if __name__ == "__main__" and "--bench" in sys.argv:
+    deduplicator_benchmark()
@@ -0,0 +1,114 @@
+"""
+Streaming JSON reader for the transaction logs.
+
+iter_transactions reads a text stream in chunks and yields one event at a time, either from a top level JSON array
+or from NDJSON (one event per line), so a log too big to json.loads at once is read with bounded memory.
+Array elements are decoded with the C scanner of the json module straight from the chunk buffer.
+An element that does not parse is read further only while it can still be an event cut at the chunk end, up to
+max_event_size characters, so a malformed event fails right away instead of loading the rest of the file.
+Anything but whitespace after the closing "]" is an error, like for json.loads.
+"""
+
+import json
+import re
+
+VALUE_START_CHARS = set('{["-0123456789tfn')
+WHITESPACE = re.compile(r"\s*")
+COMMA = re.compile(r"\s*,")
+
+def _expect_end(buffer: str, pos: int, stream, chunk_size: int):
+    # only whitespace can follow the closing "]"
+    while True:
+        end = WHITESPACE.match(buffer, pos).end()
+        if end < len(buffer):
+            raise json.JSONDecodeError("Extra data", buffer, end)
+        buffer, pos = stream.read(chunk_size), 0
+        if not buffer:
+            return
+
+def iter_transactions(stream, chunk_size: int = 1 << 16, max_event_size: int = 1 << 20):
+    scan_once = json.JSONDecoder().scan_once
+    buffer = stream.read(chunk_size)
+    pos = 0
+    while True:
+        while pos < len(buffer) and buffer[pos].isspace():
+            pos += 1
+        if pos < len(buffer):
+            break
+        buffer = stream.read(chunk_size)
+        pos = 0
+        if not buffer:
+            return
+
+    if buffer[pos] != "[":
+        yield from _iter_ndjson(buffer[pos:], stream)
+        return
+
+    pos += 1
+    eof = False
+    # expect_value is True right after "[" or ","
+    expect_value = True
+    after_comma = False
+    while True:
+        pos = WHITESPACE.match(buffer, pos).end()
+
+        if pos == len(buffer):
+            if eof:
+                raise json.JSONDecodeError("Unterminated JSON array", buffer, pos)
+            buffer, pos = stream.read(chunk_size), 0
+            eof = not buffer
+            continue
+
+        char = buffer[pos]
+        if not expect_value:
+            if char == "]":
+                _expect_end(buffer, pos + 1, stream, chunk_size)
+                return
+            if char != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+            pos += 1
+            expect_value = after_comma = True
+            continue
+
+        if char == "]" and not after_comma:
+            _expect_end(buffer, pos + 1, stream, chunk_size)
+            return
+        if char not in VALUE_START_CHARS:
+            raise json.JSONDecodeError("Expecting value", buffer, pos)
+
+        try:
+            tr, end = scan_once(buffer, pos)
+        except (StopIteration, json.JSONDecodeError):
+            # the event might be cut at the end of the chunk, read more and try again
+            if eof or len(buffer) - pos > max_event_size:
+                raise json.JSONDecodeError("Invalid array element", buffer, pos)
+            more = stream.read(chunk_size)
+            eof = not more
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+
+        yield tr
+        # most of the time the comma comes right after the event, no need to go around the loop for it
+        comma = COMMA.match(buffer, end)
+        if comma:
+            pos = comma.end()
+            after_comma = True
+        else:
+            pos = end
+            expect_value = False
+        if pos > chunk_size:
+            buffer, pos = buffer[pos:], 0
+
+def _iter_ndjson(first_chunk: str, stream):
+    # the first chunk is already read from the stream and can end in the middle of a line
+    lines = first_chunk.split("\n")
+    pending = lines.pop()
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+    for line in stream:
+        line, pending = pending + line, ""
+        if line.strip():
+            yield json.loads(line)
+    if pending.strip():
+        yield json.loads(pending)
@@ -0,0 +1,169 @@
+"""
+Money amounts as integer cents.
+
+Amounts come as strings in several solutions ("$50.00" in calculate_orders_net_total, "14.99" and a "6.15" tip in
+calculate_order_total) and were parsed with float(), so every sum drifted by fractions of a cent and every call went
+through float parsing and exception handling. MoneyParser turns an amount straight into int cents:
+
+- plain decimal strings with at most 2 decimals ("14.99", "-5", "2.5", ".5") go through a hand-written fast path,
+- anything else float() accepts ("1e3", " 14.99 ", "0.125") is parsed with float() and rounded to cents,
+  so the accepted input stays the same as before (except inf, which has no cents),
+- JSON numbers are rounded to cents,
+- malformed input raises ValueError / TypeError like float() did, the callers keep their own default or skip logic.
+
+Strings repeat a lot in the logs (prices, fees, the same charge amounts), so parsed strings are memoized.
+cents_column converts a whole column at once into numpy arrays.
+"""
+
+import random
+import sys
+import time
+from collections.abc import Hashable
+
+MISSING = object()
+
+def _plain_cents(text: str):
+    # "14.99" -> 1499, None when the text is not a plain decimal with at most 2 decimals
+    if text[-3:-2] == ".":
+        # the usual shape, digits and exactly 2 decimals
+        digits = text[:-3] + text[-2:]
+        if digits.isdigit() and digits.isascii():
+            return int(digits)
+    sign = 1
+    if text and (text[0] == "-" or text[0] == "+"):
+        sign = -1 if text[0] == "-" else 1
+        text = text[1:]
+    whole, _, fraction = text.partition(".")
+    if len(fraction) > 2 or not (whole or fraction):
+        return None
+    if whole and not (whole.isascii() and whole.isdigit()):
+        return None
+    if fraction and not (fraction.isascii() and fraction.isdigit()):
+        return None
+    return sign * (int(whole or "0") * 100 + int(fraction.ljust(2, "0")))
+
+def _float_cents(amount) -> int:
+    try:
+        return round(float(amount) * 100)
+    except OverflowError:
+        raise ValueError(f"Invalid money amount: {amount!r}")
+
+class MoneyParser:
+    def __init__(self, strip_dollar: bool = False, max_cache_size: int = 100000):
+        """
+        strip_dollar removes the leading "$" signs like amount.lstrip("$") did.
+        """
+        self.strip_dollar = strip_dollar
+        self.max_cache_size = max_cache_size
+        # string -> cents, None for the invalid strings
+        self.cache = {}
+        self.cache_hits = 0
+        self.fast_path = 0
+        self.fallbacks = 0
+
+    def _parse_string(self, text: str):
+        digits = text.lstrip("$") if self.strip_dollar else text
+        cents = _plain_cents(digits)
+        if cents is not None:
+            self.fast_path += 1
+        else:
+            self.fallbacks += 1
+            try:
+                cents = _float_cents(digits)
+            except ValueError:
+                cents = None
+
+        if len(self.cache) >= self.max_cache_size:
+            self.cache.clear()
+        self.cache[text] = cents
+        return cents
+
+    def cents(self, amount) -> int:
+        """
+        Returns the amount in cents, raises ValueError (malformed string) or TypeError (not an amount).
+        """
+        if type(amount) is str:
+            cents = self.cache.get(amount, MISSING)
+            if cents is MISSING:
+                cents = self._parse_string(amount)
+            else:
+                self.cache_hits += 1
+            if cents is None:
+                raise ValueError(f"Invalid money amount: {amount!r}")
+            return cents
+        return _float_cents(amount)
+
+    def _cents_or_none(self, amount):
+        try:
+            return self.cents(amount)
+        except (ValueError, TypeError):
+            return None
+
+    def cents_column(self, amounts) -> tuple:
+        """
+        Converts a column of amounts at once.
+        Returns (int64 cents, bool valid) numpy arrays, an invalid amount is 0 and not valid.
+        """
+        # numpy is only needed here, the parsers that never convert a column do not pay for importing it
+        import numpy as np
+
+        if not isinstance(amounts, list):
+            amounts = list(amounts)
+        # every distinct amount is parsed once, then one dict lookup per amount
+        try:
+            distinct = set(amounts)
+            hashable = True
+        except TypeError:
+            # lists and dicts are not amounts, they can not be looked up either
+            distinct = {amount for amount in amounts if isinstance(amount, Hashable)}
+            hashable = False
+        parsed = {amount: self._cents_or_none(amount) for amount in distinct}
+        if hashable:
+            values = np.array([parsed[amount] for amount in amounts], dtype=object)
+        else:
+            values = np.array([parsed[amount] if isinstance(amount, Hashable) else None for amount in amounts], dtype=object)
+
+        valid = values != None
+        return np.where(valid, values, 0).astype(np.int64), valid.astype(np.bool_)
+
+# shared parsers: "$50.00" style amounts of the transaction logs, and plain decimal strings of the orders
+dollar_amounts = MoneyParser(strip_dollar=True)
+decimal_amounts = MoneyParser()
+
+def money_parser_benchmark(n_amounts: int = 1000000, n_distinct: int = 5000):
+    rng = random.Random(3)
+    distinct = [f"${rng.randrange(1, 20000) / 100:.2f}" for _ in range(n_distinct)]
+    amounts = [rng.choice(distinct) for _ in range(n_amounts)]
+
+    start = time.perf_counter()
+    for amount in amounts:
+        try:
+            float(amount.lstrip("$"))
+        except (ValueError, TypeError):
+            pass
+    float_time = time.perf_counter() - start
+
+    parser = MoneyParser(strip_dollar=True)
+    start = time.perf_counter()
+    for amount in amounts:
+        try:
+            parser.cents(amount)
+        except (ValueError, TypeError):
+            pass
+    cents_time = time.perf_counter() - start
+
+    parser = MoneyParser(strip_dollar=True, max_cache_size=0)
+    start = time.perf_counter()
+    for amount in distinct:
+        parser._parse_string(amount)
+    fast_path_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    MoneyParser(strip_dollar=True).cents_column(amounts)
+    column_time = time.perf_counter() - start
+    print(f"{n_amounts} amounts ({n_distinct} distinct): lstrip + float {float_time * 1e9 / n_amounts:.0f} ns, "
+          f"cents {cents_time * 1e9 / n_amounts:.0f} ns, cents_column {column_time * 1e9 / n_amounts:.0f} ns, "
+          f"uncached fast path {fast_path_time * 1e9 / n_distinct:.0f} ns per amount")
+
+if __name__ == "__main__" and "--bench" in sys.argv:
+    money_parser_benchmark()
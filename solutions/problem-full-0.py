@@ -21,7 +21,7 @@ class DasherStatus(Enum):
     PICKUP = 1
     DROPOFF = 2
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DasherEvents:
     timestamp: int
     status: DasherStatus
@@ -48,64 +48,3 @@ class DasherService:
             prev_timestamp = event.timestamp
             print(multiplier, prev_timestamp, pay_unit)
         return pay_unit
-
-    def test_calculate_pay_units_success(self):
-        dasher_events = [
-            DasherEvents(400, DasherStatus.PICKUP),   # 100s: Multiplier becomes 1
-            DasherEvents(100, DasherStatus.PICKUP),   # 100s: Multiplier becomes 1
-            DasherEvents(200, DasherStatus.PICKUP),   # 200s: Multiplier becomes 2
-            DasherEvents(300, DasherStatus.DROPOFF),  # 300s: Multiplier becomes 1
-            DasherEvents(350, DasherStatus.DROPOFF)   # 350s: Multiplier becomes 0
-        ]
-        pay_unit = self.calculate_pay_units(dasher_events)
-        assert pay_unit == 350
-
-    def test_calculate_pay_units_success_2(self):
-        dasher_events = [
-            DasherEvents(500, DasherStatus.PICKUP),   # 100s: Multiplier becomes 1
-            DasherEvents(100, DasherStatus.PICKUP),   # 100s: Multiplier becomes 1
-            DasherEvents(200, DasherStatus.PICKUP),   # 200s: Multiplier becomes 2
-            DasherEvents(400, DasherStatus.PICKUP),   # 100s: Multiplier becomes 1
-            DasherEvents(300, DasherStatus.DROPOFF),  # 300s: Multiplier becomes 1
-            DasherEvents(350, DasherStatus.DROPOFF)   # 350s: Multiplier becomes 0
-        ]
-        pay_unit = self.calculate_pay_units(dasher_events)
-        assert pay_unit == 450
-
-    def test_calculate_pay_units_simultaneous_pickup_and_dropoff(self):
-        dasher_events = [
-            DasherEvents(400, DasherStatus.PICKUP),
-            DasherEvents(100, DasherStatus.PICKUP),   
-            DasherEvents(200, DasherStatus.PICKUP), 
-            DasherEvents(500, DasherStatus.DROPOFF),
-            DasherEvents(200, DasherStatus.DROPOFF), 
-            DasherEvents(400, DasherStatus.DROPOFF),   
-            DasherEvents(350, DasherStatus.PICKUP)  
-        ]
-        pay_unit = self.calculate_pay_units(dasher_events)
-        assert pay_unit == 550
-    
-    def test_calculate_pay_units_less_than_zero(self):
-        dasher_events = [
-            DasherEvents(400, DasherStatus.PICKUP), 
-            DasherEvents(100, DasherStatus.PICKUP),   
-            DasherEvents(200, DasherStatus.PICKUP), #100, 2
-            DasherEvents(200, DasherStatus.DROPOFF), #100, 1 
-            DasherEvents(400, DasherStatus.DROPOFF), #250, 0  
-            DasherEvents(350, DasherStatus.DROPOFF)   #250, 0
-        ]
-        pay_unit = self.calculate_pay_units(dasher_events)
-        assert pay_unit == 250
-
-    def test_calculate_pay_units_exception(self):
-        dasher_events = []
-        try:
-            pay_unit = self.calculate_pay_units(dasher_events)
-        except NotDasherEventException:
-            print("NotDasherEventException")
-
-DasherService().test_calculate_pay_units_success()
-DasherService().test_calculate_pay_units_success_2()
-DasherService().test_calculate_pay_units_simultaneous_pickup_and_dropoff()
-DasherService().test_calculate_pay_units_less_than_zero()
-DasherService().test_calculate_pay_units_exception()
\ No newline at end of file
@@ -45,6 +45,12 @@ Input
 
 import json
 
+# imported as part of the solutions package, or run as a script from solutions/
+if __package__:
+    from .money import decimal_amounts
+else:
+    from money import decimal_amounts
+
 def calculate_order_total(order_json: str) -> float:
     try:
         order = json.loads(order_json)
@@ -62,16 +68,18 @@ def calculate_order_total(order_json: str) -> float:
     adjustments = order.get("adjustments", [])
     tip = order.get("tip", "0.0")
 
-    subtotal_amt = 0
+    # prices are summed in integer cents, so the subtotal does not drift
+    subtotal_cents = 0
     for item in items:
         try:
             item_id = item.get("item_id", "")
             #if price and quantity are not present, that transaction will be default to 0
             price = item.get("price", "0.0")
             quantity = item.get("quantity", 0)
-            subtotal_amt += float(price) * quantity
+            subtotal_cents += decimal_amounts.cents(price) * quantity
         except (ValueError, TypeError):
             print("Invalid Subtotal amount computation for {item_id}")
+    subtotal_amt = subtotal_cents / 100
     print(subtotal_amt)
 
     promotion_amt = 0
@@ -102,92 +110,10 @@ def calculate_order_total(order_json: str) -> float:
 
     tip_amt = 0
     try:
-        tip_amt = float(tip)
+        tip_amt = decimal_amounts.cents(tip) / 100
         print(tip_amt)
     except (TypeError, ValueError):
         print("Tip is Invalid")
 
     order_total = (subtotal_amt - promotion_amt) + adj_amt + tip_amt
     return round(order_total, 2)
-
-def calculate_order_total_test():
-    input = """
-    {
-        "order_id": "ord-123",
-        "subtotal_estimate": "45.00",
-        "items": [
-            {"item_id": "i-1", "name": "Chicken Wings", "price": "14.99", "quantity": 1},
-            {"item_id": "i-2", "name": "Coke Zero", "price": "2.50", "quantity": 2}
-        ],
-        "promotions": {
-            "FALL20": {"type": "PERCENT", "value": 0.20, "is_active": true},
-            "WELCOME5": {"type": "FIXED", "value": 5.00, "is_active": false}
-        },
-        "adjustments": [
-            {"name": "Service Fee", "amount": 3.99},
-            {"name": "Delivery Fee", "amount": 5.00},
-            {"name": "Small Order Fee", "amount": null}
-        ],
-        "tip": "6.15"
-    }
-    """
-    order_total = calculate_order_total(input)
-    assert order_total == 31.13
-
-def calculate_order_total_test_fail():
-    input = """hello"""
-    order_total = calculate_order_total(input)
-    assert order_total == 0
-
-def calculate_order_total_test_invalid_tip():
-    input = """
-    {
-        "order_id": "ord-123",
-        "subtotal_estimate": "45.00",
-        "items": [
-            {"item_id": "i-1", "name": "Chicken Wings", "price": "14.99", "quantity": 1},
-            {"item_id": "i-2", "name": "Coke Zero", "price": "2.50", "quantity": 2}
-        ],
-        "promotions": {
-            "FALL20": {"type": "PERCENT", "value": 0.20, "is_active": true},
-            "WELCOME5": {"type": "FIXED", "value": 5.00, "is_active": false}
-        },
-        "adjustments": [
-            {"name": "Service Fee", "amount": 3.99},
-            {"name": "Delivery Fee", "amount": 5.00},
-            {"name": "Small Order Fee", "amount": null}
-        ],
-        "tip": "ACD6.15"
-    }
-    """
-    order_total = calculate_order_total(input)
-    assert order_total == round(31.13 - 6.15, 2)
-
-def calculate_order_total_test_invalid_price():
-    input = """
-    {
-        "order_id": "ord-123",
-        "subtotal_estimate": "45.00",
-        "items": [
-            {"item_id": "i-1", "name": "Chicken Wings", "price": "ABC14.99", "quantity": 1},
-            {"item_id": "i-2", "name": "Coke Zero", "price": "2.50", "quantity": 2}
-        ],
-        "promotions": {
-            "FALL20": {"type": "PERCENT", "value": 0.20, "is_active": true},
-            "WELCOME5": {"type": "FIXED", "value": 5.00, "is_active": false}
-        },
-        "adjustments": [
-            {"name": "Service Fee", "amount": 3.99},
-            {"name": "Delivery Fee", "amount": 5.00},
-            {"name": "Small Order Fee", "amount": null}
-        ],
-        "tip": "6.15"
-    }
-    """
-    order_total = calculate_order_total(input)
-    assert order_total == 19.14
-
-calculate_order_total_test()
-calculate_order_total_test_fail()
-calculate_order_total_test_invalid_tip()
-calculate_order_total_test_invalid_price()
\ No newline at end of file
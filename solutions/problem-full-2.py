@@ -92,142 +92,8 @@ class OrderValidationService:
             
         
     
-    def process_order_test_success(self):
-        input_json = """
-        {
-            "orderId": "A-987",
-            "custId": "user-554",
-            "delivery_address": "123 Main St, Toronto, M5V 2K1",
-            "items": {
-                "1002": {"name": "Bag of Chips", "quantity": 2},
-                "2005": {"name": "Energy Drink", "quantity": 1}
-            }
-        }
-        """
-
-        expected_order = {
-            "order_id": "A-987",
-            "customer_id": "user-554",
-            "delivery_address": {"address": "123 Main St", "city": "Toronto", "zipcode": "M5V 2K1"},
-            "items": [
-                {"item_id": 1002, "name": "Bag of Chips", "quantity": 2},
-                {"item_id": 2005, "name": "Energy Drink", "quantity": 1}
-            ]
-        }
-        order = self.process_order(input_json)
-        assert order == expected_order
-
-    def process_order_test_invalid_json(self):
-        input_json = """asdf"""
-        order = self.process_order(input_json)
-        assert order == {}
-
-    def process_order_test_invalid_order_id(self):
-        input_json = """
-        {
-            "custId": "user-554",
-            "delivery_address": "123 Main St, Toronto, M5V 2K1",
-            "items": {
-                "1002": {"name": "Bag of Chips", "quantity": 2},
-                "2005": {"name": "Energy Drink", "quantity": 1}
-            }
-        }
-        """
-
-        expected_order = {
-            "order_id": 0,
-            "customer_id": "user-554",
-            "delivery_address": {"address": "123 Main St", "city": "Toronto", "zipcode": "M5V 2K1"},
-            "items": [
-                {"item_id": 1002, "name": "Bag of Chips", "quantity": 2},
-                {"item_id": 2005, "name": "Energy Drink", "quantity": 1}
-            ]
-        }
-        order = self.process_order(input_json)
-        assert order == expected_order
-
-    def process_order_test_invalid_customer_id(self):
-        input_json = """
-        {
-            "orderId": "A-987",
-            "delivery_address": "123 Main St, Toronto, M5V 2K1",
-            "items": {
-                "1002": {"name": "Bag of Chips", "quantity": 2},
-                "2005": {"name": "Energy Drink", "quantity": 1}
-            }
-        }
-        """
-        order = self.process_order(input_json)
-        assert order == {}
-
-    def process_order_test_invalid_delivery_address(self):
-        input_json = """
-        {
-            "orderId": "A-987",
-            "custId": "user-554",
-            "delivery_address": "Toronto, M5V 2K1",
-            "items": {
-                "1002": {"name": "Bag of Chips", "quantity": 2},
-                "2005": {"name": "Energy Drink", "quantity": 1}
-            }
-        }
-        """
-        order = self.process_order(input_json)
-        print(order)
-        assert order == {}
-
-    def process_order_test_no_items(self):
-        input_json = """
-        {
-            "orderId": "A-987",
-            "custId": "user-554",
-            "delivery_address": "123 Main St, Toronto, M5V 2K1",
-            "items": {
-                "asdf1002": {"name": "Bag of Chips", "quantity": 2}
-            }
-        }
-        """
-
-        order = self.process_order(input_json)
-        assert order == {}
-
-    def process_order_test_invalid_item(self):
-        input_json = """
-        {
-            "orderId": "A-987",
-            "custId": "user-554",
-            "delivery_address": "123 Main St, Toronto, M5V 2K1",
-            "items": {
-                "sasdf1002": {"name": "Bag of Chips", "quantity": 2},
-                "2005": {"name": "Energy Drink", "quantity": 1}
-            }
-        }
-        """
-
-        expected_order = {
-            "order_id": "A-987",
-            "customer_id": "user-554",
-            "delivery_address": {"address": "123 Main St", "city": "Toronto", "zipcode": "M5V 2K1"},
-            "items": [
-                {"item_id": 2005, "name": "Energy Drink", "quantity": 1}
-            ]
-        }
-        order = self.process_order(input_json)
-        print(order)
-        assert order == expected_order
-
-
 
-if __name__ == "__main__":
-    order_validation_service = OrderValidationService()
-    order_validation_service.process_order_test_success()
-    order_validation_service.process_order_test_invalid_json()
-    order_validation_service.process_order_test_invalid_order_id()
-    order_validation_service.process_order_test_invalid_customer_id()
-    order_validation_service.process_order_test_invalid_delivery_address()
-    order_validation_service.process_order_test_no_items()
-    order_validation_service.process_order_test_invalid_item()
 
-    # takeaway: You can return a well structured error message instead of print(),
-    # return {"status": "error", "message", "There are no parsable items in the order"}
-    # append all errors, if there are errors in the end, send multiple messages.
\ No newline at end of file
+# takeaway: You can return a well structured error message instead of print(),
+# return {"status": "error", "message", "There are no parsable items in the order"}
+# append all errors, if there are errors in the end, send multiple messages.
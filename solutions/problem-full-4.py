@@ -37,13 +37,112 @@ go through all categories, if atleast one item in the category matches the filte
     else that whole category is skipped
 
 If filters are not given, then return all the ones except is_available = false
+
+Name search (search_menu):
+The filter can also have a "name_query" (e.g. "chick", "pad th"), every word of the query has to be
+a prefix of some word in the item name (case insensitive), together with the other AND filters.
+Scanning every item name per query is too slow for big menus, so an index is built once per menu
+and kept by the service for the following queries, under a digest of the menu text (the service does not
+keep the menu strings). A caller that queries one menu many times can hold the index from build_menu_index
+and pass it to search_menu instead of the text, which skips hashing the menu on every query.
+A name_query without any word (only punctuation or spaces) matches no item.
 """
 
+import hashlib
 import json
+import re
+import sys
+import time
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+from collections.abc import Hashable
+
+# numpy is only needed once a menu is decoded, importing the service (or the package) does not load it
+
+def tokenize_name(name) -> list:
+    return re.findall(r"[a-z0-9]+", str(name).lower())
+
+def item_dietary_tags(item: dict) -> set:
+    # a null dietary_tags is treated like a missing one, tags that can not be hashed never match a filter
+    return {tag for tag in item.get("dietary_tags") or [] if isinstance(tag, Hashable)}
+
+class MenuSearchIndex:
+    """
+    Built once per menu: the flattened item columns and an inverted index from name token to item ids.
+    Tokens are kept sorted, so all the tokens starting with a prefix are one bisect range.
+    The merged ids of the last max_cached_prefixes prefixes are kept (LRU), user typed queries do not grow it.
+    """
+    def __init__(self, ctg_names, entries, prices, available, masks, tag_bits, max_cached_prefixes: int = 1024):
+        import numpy as np
+        self.ctg_names = ctg_names
+        self.entries = entries
+        self.prices = prices
+        self.available = available
+        self.masks = masks
+        self.tag_bits = tag_bits
+
+        postings = defaultdict(list)
+        for item_id, (_, item) in enumerate(entries):
+            for token in set(tokenize_name(item.get("name", ""))):
+                postings[token].append(item_id)
+        self.tokens = sorted(postings)
+        self.postings = [np.array(postings[token], dtype=np.int64) for token in self.tokens]
+        self.max_cached_prefixes = max_cached_prefixes
+        self.prefix_cache = OrderedDict()
+
+    def prefix_matches(self, prefix: str) -> "np.ndarray":
+        import numpy as np
+        # sorted ids of the items having at least one name token starting with prefix
+        item_ids = self.prefix_cache.get(prefix)
+        if item_ids is not None:
+            self.prefix_cache.move_to_end(prefix)
+            return item_ids
+
+        # the tokens starting with prefix sort between prefix and prefix with its last character incremented
+        lo = bisect_left(self.tokens, prefix)
+        hi = bisect_left(self.tokens, prefix[:-1] + chr(ord(prefix[-1]) + 1), lo)
+
+        if hi - lo == 1:
+            item_ids = self.postings[lo]
+        elif hi > lo:
+            item_ids = np.unique(np.concatenate(self.postings[lo:hi]))
+        else:
+            item_ids = np.empty(0, dtype=np.int64)
+        self.prefix_cache[prefix] = item_ids
+        if len(self.prefix_cache) > self.max_cached_prefixes:
+            self.prefix_cache.popitem(last=False)
+        return item_ids
+
+    def search(self, name_query: str, max_price: float, dietary_tags) -> list:
+        import numpy as np
+        # an empty or missing name_query does not filter by name, one without any word matches nothing
+        prefixes = set(tokenize_name(name_query)) if name_query else set()
+        if name_query and not prefixes:
+            return []
+        item_ids = None
+        for prefix in sorted(prefixes, key=len, reverse=True):
+            matches = self.prefix_matches(prefix)
+            item_ids = matches if item_ids is None else np.intersect1d(item_ids, matches, assume_unique=True)
+            if len(item_ids) == 0:
+                return []
+        if item_ids is None:
+            item_ids = np.arange(len(self.entries))
+
+        filter_mask = np.zeros(self.masks.shape[1], dtype=np.uint64)
+        for tag in set(dietary_tags):
+            bit = self.tag_bits.get(tag)
+            if bit is None:
+                return []
+            filter_mask[bit // 64] |= np.uint64(1 << (bit % 64))
+
+        keep = self.available[item_ids] & (self.prices[item_ids] <= max_price)
+        keep &= ((self.masks[item_ids] & filter_mask) == filter_mask).all(axis=1)
+        return item_ids[keep].tolist()
 
 class MenuFilteringService:
-    def __init__(self):
-        pass
+    def __init__(self, max_cached_menus: int = 8):
+        self.max_cached_menus = max_cached_menus
+        self.menu_indexes = {}
 
     def filter_menu(self, menu_json: str, filter_json: str) -> dict:
         
@@ -54,14 +153,9 @@ class MenuFilteringService:
             print("Invalid Json Input")
             return {}
 
-        try:
-            filter_max_price = float(filter_json.get("max_price", float('inf')))
-            filter_max_price = max(0, filter_max_price)
-        except (ValueError, TypeError):
-            print("Invalid filter max price")
-            filter_max_price = float('inf')
+        filter_max_price = self._parse_max_price(filter_json)
         
-        filter_dietary_tag = filter_json.get("dietary_tags", [])
+        filter_dietary_tag = filter_json.get("dietary_tags") or []
         menu_categories = menu_json.get("categories", [])
         matched_result = {"categories": []}
         
@@ -76,7 +170,6 @@ class MenuFilteringService:
             for item in ctg_items:
                 item_name = item.get("name", "")
                 item_is_available = item.get("is_available", False)
-                item_dietary_tags = item.get("dietary_tags", [])
                 
                 try:
                     item_price = round(float(item.get("price")), 2)
@@ -85,7 +178,7 @@ class MenuFilteringService:
                     continue
 
                 if item_is_available == True and \
-                   (set(filter_dietary_tag) <= set(item_dietary_tags)) and \
+                   (set(filter_dietary_tag) <= item_dietary_tags(item)) and \
                    item_price <= filter_max_price:
                         items_match.append(item)
             
@@ -94,160 +187,247 @@ class MenuFilteringService:
         
         return matched_result
 
+    def _parse_max_price(self, filter_json) -> float:
+        try:
+            filter_max_price = float(filter_json.get("max_price", float('inf')))
+            return max(0, filter_max_price)
+        except (ValueError, TypeError):
+            print("Invalid filter max price")
+            return float('inf')
+
+    def _decode_menu_columns(self, menu: dict):
+        import numpy as np
+        # flatten the menu once into columns, so every filter works on the same arrays
+        # items that fail the price parsing are kept as unavailable, so they never match
+        ctg_names = []
+        entries = []
+        prices = []
+        available = []
+        item_tags = []
+        tag_bits = {}
+        for category in menu.get("categories", []):
+            ctg_name = category.get("category_name")
+            if not ctg_name:
+                continue
+            ctg_names.append(ctg_name)
+            for item in category.get("items", []):
+                item_name = item.get("name", "")
+                try:
+                    item_price = round(float(item.get("price")), 2)
+                    item_is_available = item.get("is_available", False) == True
+                except (ValueError, TypeError) as e:
+                    print(f"Invalid Item price for item: {item_name} - {e}")
+                    item_price = float('inf')
+                    item_is_available = False
+                tags = item_dietary_tags(item)
+                for tag in tags:
+                    tag_bits.setdefault(tag, len(tag_bits))
+                entries.append((len(ctg_names) - 1, item))
+                prices.append(item_price)
+                available.append(item_is_available)
+                item_tags.append(tags)
+
+        # one uint64 word holds 64 tags, bigger vocabularies spill into extra words
+        n_words = max(1, (len(tag_bits) + 63) // 64)
+        masks = np.zeros((len(entries), n_words), dtype=np.uint64)
+        for idx, tags in enumerate(item_tags):
+            for tag in tags:
+                bit = tag_bits[tag]
+                masks[idx, bit // 64] |= np.uint64(1 << (bit % 64))
+
+        return ctg_names, entries, np.array(prices, dtype=np.float64), np.array(available, dtype=bool), masks, tag_bits
+
+    def build_menu_index(self, menu_json: str):
+        try:
+            menu = json.loads(menu_json)
+        except json.JSONDecodeError:
+            print("Invalid Json Input")
+            return None
+        return MenuSearchIndex(*self._decode_menu_columns(menu))
 
-    def filter_menu_test_success(self):
-        
-        menu_json = """
-        {
-            "categories": [
-                {"category_name": "Appetizers", "items": [
-                {"name": "Spring Rolls", "price": 8.00, "is_available": true, "dietary_tags": ["vegan"]},
-                {"name": "Chicken Wings", "price": 14.00, "is_available": true, "dietary_tags": []}
-                ]},
-                {"category_name": "Main Courses", "items": [
-                {"name": "Green Curry", "price": 18.00, "is_available": true, "dietary_tags": ["vegan", "gluten_free"]},
-                {"name": "Pad Thai", "price": 16.00, "is_available": false, "dietary_tags": ["gluten_free"]}
-                ]}
-            ]
-        }
-        """
-
-        filters_json = """
-            {
-            "max_price": 15.00,
-            "dietary_tags": ["vegan"]
-            }
-        """
-
-        expected_result = """{
-            "categories": [
-                {
-                    "category_name": "Appetizers", "items": [
-                        {"name": "Spring Rolls", "price": 8.00, "is_available": true, "dietary_tags": ["vegan"]}
-                    ]
-                }
-            ]
-        }"""
-
-        filtered_menu = self.filter_menu(menu_json, filters_json)
-        assert filtered_menu == json.loads(expected_result)
-
-    def filter_menu_test_no_filter(self):
-        
-        menu_json = """
-        {
-            "categories": [
-                {"category_name": "Appetizers", "items": [
-                {"name": "Spring Rolls", "price": 8.00, "is_available": true, "dietary_tags": ["vegan"]},
-                {"name": "Chicken Wings", "price": 14.00, "is_available": true, "dietary_tags": []}
-                ]},
-                {"category_name": "Main Courses", "items": [
-                {"name": "Green Curry", "price": 18.00, "is_available": true, "dietary_tags": ["vegan", "gluten_free"]},
-                {"name": "Pad Thai", "price": 16.00, "is_available": false, "dietary_tags": ["gluten_free"]}
-                ]}
-            ]
-        }
-        """
-
-        filters_json = """{}"""
-
-        expected_result = """
-        {
-            "categories": [
-                {"category_name": "Appetizers", "items": [
-                {"name": "Spring Rolls", "price": 8.00, "is_available": true, "dietary_tags": ["vegan"]},
-                {"name": "Chicken Wings", "price": 14.00, "is_available": true, "dietary_tags": []}
-                ]},
-                {"category_name": "Main Courses", "items": [
-                {"name": "Green Curry", "price": 18.00, "is_available": true, "dietary_tags": ["vegan", "gluten_free"]}
-                ]}
-            ]
-        }
-        """
-
-        filtered_menu = self.filter_menu(menu_json, filters_json)
-        assert filtered_menu == json.loads(expected_result)
-
-    def filter_menu_test_no_dietary_tag(self):
-        
-        menu_json = """
-        {
-            "categories": [
-                {"category_name": "Appetizers", "items": [
-                {"name": "Spring Rolls", "price": 8.00, "is_available": true, "dietary_tags": ["vegan"]},
-                {"name": "Chicken Wings", "price": 14.00, "is_available": true, "dietary_tags": []}
-                ]},
-                {"category_name": "Main Courses", "items": [
-                {"name": "Green Curry", "price": 18.00, "is_available": true, "dietary_tags": ["vegan", "gluten_free"]},
-                {"name": "Pad Thai", "price": 16.00, "is_available": false, "dietary_tags": ["gluten_free"]}
-                ]}
-            ]
-        }
-        """
-
-        filters_json = """
-            {
-            "max_price": 16.00
-            }
+    def search_menu(self, menu_json, filter_json: str) -> dict:
         """
-
-        expected_result = """
-        {
-            "categories": [
-                {"category_name": "Appetizers", "items": [
-                {"name": "Spring Rolls", "price": 8.00, "is_available": true, "dietary_tags": ["vegan"]},
-                {"name": "Chicken Wings", "price": 14.00, "is_available": true, "dietary_tags": []}
-                ]}
-            ]
-        }
+        Same result as filter_menu, plus the optional "name_query" filter.
+        menu_json is the menu text, or the MenuSearchIndex returned by build_menu_index.
+        The index of a menu text is cached by its digest, so repeated queries on a menu skip the parsing.
         """
+        if isinstance(menu_json, MenuSearchIndex):
+            menu_index = menu_json
+        else:
+            menu_key = hashlib.sha256(menu_json.encode()).digest()
+            menu_index = self.menu_indexes.get(menu_key)
+            if menu_index is None:
+                menu_index = self.build_menu_index(menu_json)
+                if menu_index is None:
+                    return {}
+                if len(self.menu_indexes) >= self.max_cached_menus:
+                    # evicting the oldest menu, dicts keep the insertion order
+                    self.menu_indexes.pop(next(iter(self.menu_indexes)))
+                self.menu_indexes[menu_key] = menu_index
 
-        filtered_menu = self.filter_menu(menu_json, filters_json)
-        assert filtered_menu == json.loads(expected_result)
-
-    def filter_menu_test_invalid_filter_max_price(self):
-        
-        menu_json = """
-        {
-            "categories": [
-                {"category_name": "Appetizers", "items": [
-                {"name": "Spring Rolls", "price": 8.00, "is_available": true, "dietary_tags": ["vegan"]},
-                {"name": "Chicken Wings", "price": 14.00, "is_available": true, "dietary_tags": []}
-                ]},
-                {"category_name": "Main Courses", "items": [
-                {"name": "Green Curry", "price": 18.00, "is_available": true, "dietary_tags": ["vegan", "gluten_free"]},
-                {"name": "Pad Thai", "price": 16.00, "is_available": false, "dietary_tags": ["gluten_free"]}
-                ]}
-            ]
-        }
-        """
+        try:
+            filter_json = json.loads(filter_json)
+        except json.JSONDecodeError:
+            print("Invalid Json Input")
+            return {}
 
-        filters_json = """
-            {
-            "max_price": "ABC",
-            "dietary_tags": ["vegan"]
-            }
+        item_ids = menu_index.search(
+            filter_json.get("name_query"),
+            self._parse_max_price(filter_json),
+            filter_json.get("dietary_tags") or []
+        )
+
+        ctg_items = {}
+        for item_id in item_ids:
+            ctg_idx, item = menu_index.entries[item_id]
+            ctg_items.setdefault(ctg_idx, []).append(item)
+        return {"categories": [
+            {"category_name": menu_index.ctg_names[ctg_idx], "items": items}
+            for ctg_idx, items in ctg_items.items()
+        ]}
+
+    def filter_menu_many(self, menu_json: str, filters_json: str, ids_only: bool = False, chunk_cells: int = 1 << 22) -> list:
         """
+        Evaluates a list of filters against one menu, the menu is decoded only once.
+        filters_json is a JSON list where every entry follows the filter_menu filter format.
 
-        expected_result = """
-        {
-            "categories": [
-                {"category_name": "Appetizers", "items": [
-                {"name": "Spring Rolls", "price": 8.00, "is_available": true, "dietary_tags": ["vegan"]}
-                ]},
-                {"category_name": "Main Courses", "items": [
-                {"name": "Green Curry", "price": 18.00, "is_available": true, "dietary_tags": ["vegan", "gluten_free"]}
-                ]}
-            ]
-        }
+        Returns one result per filter, in the same order as the filters:
+            ids_only=False -> the filtered menu, same shape as filter_menu
+            ids_only=True  -> list of matching item ids, where an item id is its position in the menu
+                              (counting items of all valid categories from top to bottom)
         """
+        import numpy as np
+        try:
+            menu = json.loads(menu_json)
+            filters = json.loads(filters_json)
+        except json.JSONDecodeError:
+            print("Invalid Json Input")
+            return []
+
+        if not isinstance(filters, list):
+            print("Filters should be a list")
+            return []
+
+        ctg_names, entries, prices, available, item_masks, tag_bits = self._decode_menu_columns(menu)
+        n_words = item_masks.shape[1]
+
+        max_prices = np.empty(len(filters), dtype=np.float64)
+        filter_masks = np.zeros((len(filters), n_words), dtype=np.uint64)
+        # a filter tag that no item has can never be matched
+        impossible = np.zeros(len(filters), dtype=bool)
+        for f_idx, filter_json in enumerate(filters):
+            if not isinstance(filter_json, dict):
+                filter_json = {}
+            max_prices[f_idx] = self._parse_max_price(filter_json)
+            for tag in set(filter_json.get("dietary_tags") or []):
+                bit = tag_bits.get(tag)
+                if bit is None:
+                    impossible[f_idx] = True
+                    continue
+                filter_masks[f_idx, bit // 64] |= np.uint64(1 << (bit % 64))
+
+        missing_tags = ~item_masks
+        # filters x items matrix is built in chunks of filters to keep memory bounded
+        step = max(1, chunk_cells // max(1, len(entries) * n_words))
+        results = []
+        for start in range(0, len(filters), step):
+            end = start + step
+            price_ok = prices[None, :] <= max_prices[start:end, None]
+            tags_ok = ((filter_masks[start:end, None, :] & missing_tags[None, :, :]) == 0).all(axis=2)
+            matches = price_ok & tags_ok & available[None, :] & ~impossible[start:end, None]
+
+            for row in matches:
+                item_ids = np.flatnonzero(row)
+                if ids_only:
+                    results.append(item_ids.tolist())
+                    continue
 
-        filtered_menu = self.filter_menu(menu_json, filters_json)
-        assert filtered_menu == json.loads(expected_result)
-
-if __name__ == "__main__":
-    menu_filter_service = MenuFilteringService()
-    menu_filter_service.filter_menu_test_success()
-    menu_filter_service.filter_menu_test_no_filter()
-    menu_filter_service.filter_menu_test_no_dietary_tag()
-    menu_filter_service.filter_menu_test_invalid_filter_max_price()
\ No newline at end of file
+                ctg_items = {}
+                for item_id in item_ids:
+                    ctg_idx, item = entries[item_id]
+                    ctg_items.setdefault(ctg_idx, []).append(item)
+                results.append({"categories": [
+                    {"category_name": ctg_names[ctg_idx], "items": items}
+                    for ctg_idx, items in ctg_items.items()
+                ]})
+        return results
+
+
+
+def search_menu_benchmark():
+    service = MenuFilteringService()
+    words = ["chicken", "beef", "tofu", "pad", "thai", "green", "curry", "spring", "rolls", "wings",
+             "spicy", "garlic", "noodle", "rice", "soup", "salad", "fried", "basil", "mango", "sticky"]
+    n_items = 10000
+    categories = []
+    for c in range(n_items // 50):
+        items = []
+        for i in range(50):
+            idx = c * 50 + i
+            name = " ".join(words[(idx * k + c) % len(words)] for k in (1, 3, 7)) + f" {idx}"
+            items.append({"name": name, "price": 5 + idx % 30, "is_available": idx % 9 != 0, "dietary_tags": ["vegan"] if idx % 4 == 0 else []})
+        categories.append({"category_name": f"category-{c}", "items": items})
+    menu_json = json.dumps({"categories": categories})
+
+    start = time.perf_counter()
+    menu_index = service.build_menu_index(menu_json)
+    print(f"index build for {n_items} items: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    for name_query in ["chick", "pad th", "green curry", "s", "mango sticky rice"]:
+        filter_json = json.dumps({"name_query": name_query, "max_price": 25, "dietary_tags": ["vegan"]})
+        runs = 1000
+        timings = []
+        # the menu text (hashed on every query) and the index held by the caller
+        for menu in (menu_json, menu_index):
+            start = time.perf_counter()
+            for _ in range(runs):
+                service.search_menu(menu, filter_json)
+            timings.append((time.perf_counter() - start) / runs)
+        print(f"name_query={name_query!r:<22} {timings[0] * 1000:.3f} ms/query, held index {timings[1] * 1000:.3f} ms/query")
+
+def filter_menu_many_benchmark():
+    # compares calling filter_menu once per filter with a single filter_menu_many call
+    service = MenuFilteringService()
+    tags = ["vegan", "gluten_free", "halal", "nut_free", "dairy_free", "spicy"]
+
+    def build_menu(n_items):
+        categories = []
+        for c in range(max(1, n_items // 50)):
+            items = []
+            for i in range(min(50, n_items - c * 50)):
+                idx = c * 50 + i
+                items.append({
+                    "name": f"item-{idx}",
+                    "price": 5 + (idx * 7) % 30,
+                    "is_available": idx % 11 != 0,
+                    "dietary_tags": [t for b, t in enumerate(tags) if (idx >> b) & 1]
+                })
+            categories.append({"category_name": f"category-{c}", "items": items})
+        return json.dumps({"categories": categories})
+
+    def build_filters(n_filters):
+        return [
+            {"max_price": 10 + (f * 3) % 25, "dietary_tags": [t for b, t in enumerate(tags) if (f >> b) & 1 and b < 3]}
+            for f in range(n_filters)
+        ]
+
+    print(f"{'items':>8} {'filters':>8} {'filter_menu (s)':>16} {'filter_menu_many (s)':>21} {'speedup':>8}")
+    for n_items, n_filters in [(100, 100), (1000, 100), (10000, 100), (1000, 1000), (1000, 5000)]:
+        menu_json = build_menu(n_items)
+        filters = build_filters(n_filters)
+        filter_jsons = [json.dumps(f) for f in filters]
+
+        start = time.perf_counter()
+        for filter_json in filter_jsons:
+            service.filter_menu(menu_json, filter_json)
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        service.filter_menu_many(menu_json, json.dumps(filters), ids_only=True)
+        many_time = time.perf_counter() - start
+
+        print(f"{n_items:>8} {n_filters:>8} {loop_time:>16.4f} {many_time:>21.4f} {loop_time / many_time:>7.1f}x")
+
+if __name__ == "__main__" and "--bench" in sys.argv:
+    filter_menu_many_benchmark()
+    search_menu_benchmark()
@@ -39,10 +39,74 @@ Rounding up by 2 decimals to maintain consistency
 You can convert the types to enum to make it better for use (some good to have)
 """
 
+import csv
 import json
+import os
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+import pickle
+import zlib
+from array import array
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
-def reconcile_transactions(transactions_json):
+# imported as part of the solutions package, or run as a script from solutions/
+# (ADJUSTMENT payload amounts are read with the cached extractor shared with the event engine)
+if __package__:
+    from .json_stream import iter_transactions
+    from .transaction_engine import adjustment_amounts
+else:
+    from json_stream import iter_transactions
+    from transaction_engine import adjustment_amounts
+
+def transaction_delta(tr):
+    # returns (order_id, signed amount) for the events that change an order revenue, else None
+    if not isinstance(tr, dict):
+        return None
+
+    tr_type = tr.get("type", "UNKNOWN")
+    tr_amount = tr.get("amount", 0)
+    tr_order_id = tr.get("order_id")
+    if tr_order_id is None:
+        return None
+
+    if tr_type in ("CHARGE"):
+        return tr_order_id, tr_amount
+    
+    elif tr_type in ("DASHER_PAY", "REFUND"):
+        # adding the negated amount is bit for bit the same as subtracting it
+        return tr_order_id, -tr_amount
+    
+    elif tr_type == "ADJUSTMENT":
+        tr_payload_json = tr.get("payload")
+        try:
+            adj_amount = adjustment_amounts.amount(tr_payload_json)
+        except json.JSONDecodeError as e:
+            print("Invalid Adjustment type Payload", e)
+            return None
+        
+        return tr_order_id, adj_amount
+    return None
+
+def apply_transaction(orders_with_revenues, tr, views=None):
+    # folds a single log event into the per order running revenue, and into the profit views if any
+    delta = transaction_delta(tr)
+    if delta is None:
+        return
+    if views is None:
+        orders_with_revenues[delta[0]] += delta[1]
+        return
+    old_revenue = orders_with_revenues.get(delta[0])
+    orders_with_revenues[delta[0]] += delta[1]
+    views.update(orders_with_revenues, delta[0], old_revenue, orders_with_revenues[delta[0]])
+
+def net_profit(raw_revenue: float) -> float:
+    return max(round(raw_revenue, 2), 0.0)
+
+def reconcile_transactions(transactions_json, deduplicator=None):
     
     try:
         transactions = json.loads(transactions_json)
@@ -53,105 +117,351 @@ def reconcile_transactions(transactions_json):
     orders_with_revenues = defaultdict(float)
 
     for tr in transactions:
-        if not isinstance(tr, dict):
+        # events are delivered at least once, a redelivered event is skipped
+        if deduplicator is not None and deduplicator.seen(tr):
             continue
-
-        tr_type = tr.get("type", "UNKNOWN")
-        tr_amount = tr.get("amount", 0)
-        tr_order_id = tr.get("order_id")
-        if tr_order_id is None:
-            continue
-
-        if tr_type in ("CHARGE"):
-            orders_with_revenues[tr_order_id] += tr_amount
-        
-        elif tr_type in ("DASHER_PAY", "REFUND"):
-            orders_with_revenues[tr_order_id] -= tr_amount
-        
-        elif tr_type == "ADJUSTMENT":
-            tr_payload_json = tr.get("payload")
-            try:
-                tr_payload = json.loads(tr_payload_json)
-            except json.JSONDecodeError as e:
-                print("Invalid Adjustment type Payload", e)
-                continue
-            
-            adj_amount = tr_payload.get("amount", 0)
-            orders_with_revenues[tr_order_id] += adj_amount
+        apply_transaction(orders_with_revenues, tr)
     
     for ord_id, raw_revenue in orders_with_revenues.items():
-        orders_with_revenues[ord_id] = max(round(raw_revenue, 2), 0.0)
+        orders_with_revenues[ord_id] = net_profit(raw_revenue)
     
     return dict(orders_with_revenues)
 
-def reconcile_transactions_test_success():
-
-    input_json = """
-        [
-            { "event_id": "evt-1", "type": "CHARGE", "order_id": "A100", "amount": 45.50 },
-            { "event_id": "evt-2", "type": "DASHER_PAY", "order_id": "A100", "amount": 8.00 },
-            { "event_id": "evt-3", "type": "DASHER_ONLINE", "dasher_id": "D123" },
-            { "event_id": "evt-4", "type": "CHARGE", "order_id": "B200", "amount": 22.00 },
-            { "event_id": "evt-5",
-                "type": "ADJUSTMENT",
-                "order_id": "A100",
-                "payload": "{\\"reason\\": \\"Customer complaint\\", \\"amount\\": -5.00}"
-            },
-            { "event_id": "evt-6", "type": "DASHER_PAY", "order_id": "B200", "amount": 6.50 },
-            { "event_id": "evt-7", "type": "REFUND", "order_id": "B200", "amount": 22.00 }
-        ]
+"""
+Streaming mode:
+The monthly ledger is too big to json.loads at once, so iter_transactions (json_stream.py, shared with the binary log
+conversion) reads the input in chunks and yields one event at a time, either from a top level JSON array or from NDJSON.
+Only the per order running revenue is kept in memory, and the results are handed one by one to a writer.
+"""
+
+class NDJSONResultWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, order_id, profit: float):
+        self.stream.write(json.dumps({"order_id": order_id, "net_profit": profit}) + "\n")
+
+class CSVResultWriter:
+    def __init__(self, stream):
+        self.writer = csv.writer(stream)
+        self.writer.writerow(["order_id", "net_profit"])
+
+    def write(self, order_id, profit: float):
+        self.writer.writerow([order_id, profit])
+
+def reconcile_transactions_stream(input_stream, writer, chunk_size: int = 1 << 16, deduplicator=None, views=None) -> int:
     """
-    order_with_revenues = reconcile_transactions(input_json)
-    assert order_with_revenues == {'A100': 32.5, 'B200': 0}
-
-def reconcile_transactions_test_json_fail():
-
-    input_json = """ asfd   """
-    order_with_revenues = reconcile_transactions(input_json)
-    assert order_with_revenues == {}
-
-def reconcile_transactions_test_payload_fail():
-    input_json = """
-        [
-            { "event_id": "evt-1", "type": "CHARGE", "order_id": "A100", "amount": 45.50 },
-            { "event_id": "evt-2", "type": "DASHER_PAY", "order_id": "A100", "amount": 8.00 },
-            { "event_id": "evt-3", "type": "DASHER_ONLINE", "dasher_id": "D123" },
-            { "event_id": "evt-4", "type": "CHARGE", "order_id": "B200", "amount": 22.00 },
-            { "event_id": "evt-5",
-                "type": "ADJUSTMENT",
-                "order_id": "A100",
-                "payload": "asfd"
-            },
-            { "event_id": "evt-6", "type": "DASHER_PAY", "order_id": "B200", "amount": 6.50 },
-            { "event_id": "evt-7", "type": "REFUND", "order_id": "B200", "amount": 22.00 }
-        ]
+    Same reconciliation as reconcile_transactions, but reads the events from a text stream
+    (JSON array or NDJSON) and writes every order result to the writer.
+    views (a profit_views.ProfitViews) is kept up to date with every event, and can be queried while the stream runs.
+    Returns the number of orders written, or -1 if the input is not valid JSON.
     """
-    order_with_revenues = reconcile_transactions(input_json)
-    assert order_with_revenues == {'A100': 37.5, 'B200': 0}
-
-def reconcile_transactions_test_no_order_id():
-    input_json = """
-        [
-            { "event_id": "evt-1", "type": "CHARGE", "order_id": "A100", "amount": 45.50 },
-            { "event_id": "evt-2", "type": "DASHER_PAY", "amount": 8.00 }
-        ]
+    orders_with_revenues = defaultdict(float)
+    try:
+        for tr in iter_transactions(input_stream, chunk_size):
+            if deduplicator is not None and deduplicator.seen(tr):
+                continue
+            apply_transaction(orders_with_revenues, tr, views)
+    except json.JSONDecodeError as e:
+        print("Invalid JSON Input", e)
+        return -1
+
+    for ord_id, raw_revenue in orders_with_revenues.items():
+        writer.write(ord_id, net_profit(raw_revenue))
+    return len(orders_with_revenues)
+
+"""
+Parallel mode:
+Reconciliation is a fold per order_id, so the log file is split in byte ranges on line boundaries and every range
+is parsed by a worker process (map). A worker splits its events by a stable hash of order_id into partitions and
+writes, for every partition, its partial ledger: the (order_id, signed amount) deltas in file order.
+Partial ledgers of one partition merge by concatenating them in range order, which is associative, and folding the
+merged ledger adds the amounts of an order in the exact same order as the serial loop does (reduce).
+Partitions own disjoint order_ids, so their ledgers are simply unioned, and rounding/clamping is applied last.
+
+The file has to be NDJSON or a JSON array with one event per line, otherwise it falls back to the streaming mode.
+"""
+
+class DictResultWriter:
+    def __init__(self):
+        self.results = {}
+
+    def write(self, order_id, profit: float):
+        self.results[order_id] = profit
+
+def _split_byte_ranges(path: str, n_ranges: int) -> list:
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as log_file:
+        for i in range(1, n_ranges):
+            log_file.seek(size * i // n_ranges)
+            # moving to the start of the next line, so no record is cut in two
+            log_file.readline()
+            bounds.append(max(log_file.tell(), bounds[-1]))
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+
+def _partition_of(order_id, n_partitions: int) -> int:
+    # python's str hash is randomized per process, crc32 gives the same partition in every worker
+    return zlib.crc32(str(order_id).encode()) % n_partitions
+
+def _event_line(line: bytes) -> bytes:
+    # removing the array brackets and commas around the event of a one event per line JSON array
+    line = line.strip().lstrip(b"[,").rstrip(b",")
+    if line.endswith(b"]"):
+        line = line[:-1]
+    return line
+
+def _map_range(path: str, start: int, end: int, range_idx: int, n_partitions: int, tmp_dir: str):
+    ledgers = [([], array("d")) for _ in range(n_partitions)]
+    with open(path, "rb") as log_file:
+        log_file.seek(start)
+        data = log_file.read(end - start)
+
+    for line in data.split(b"\n"):
+        line = _event_line(line)
+        if not line:
+            continue
+        delta = transaction_delta(json.loads(line))
+        if delta is None:
+            continue
+        order_ids, amounts = ledgers[_partition_of(delta[0], n_partitions)]
+        order_ids.append(delta[0])
+        amounts.append(delta[1])
+
+    for partition, ledger in enumerate(ledgers):
+        with open(os.path.join(tmp_dir, f"map-{range_idx}-{partition}.pkl"), "wb") as ledger_file:
+            pickle.dump(ledger, ledger_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+def _reduce_partition(partition: int, n_ranges: int, tmp_dir: str) -> dict:
+    orders_with_revenues = defaultdict(float)
+    for range_idx in range(n_ranges):
+        with open(os.path.join(tmp_dir, f"map-{range_idx}-{partition}.pkl"), "rb") as ledger_file:
+            order_ids, amounts = pickle.load(ledger_file)
+        for order_id, amount in zip(order_ids, amounts):
+            orders_with_revenues[order_id] += amount
+    return {ord_id: net_profit(raw_revenue) for ord_id, raw_revenue in orders_with_revenues.items()}
+
+def reconcile_transactions_parallel(path: str, workers: int = None, ranges_per_worker: int = 4) -> dict:
     """
-    order_with_revenues = reconcile_transactions(input_json)
-    assert order_with_revenues == {'A100': 45.50}
-
-def reconcile_transactions_test_empty_result():
-    input_json = """
-        [
-            { "event_id": "evt-1", "type": "CHARGE", "amount": 45.50 },
-            { "event_id": "evt-2", "type": "DASHER_PAY", "amount": 8.00 },
-        ]
+    Same result as reconcile_transactions on the file content, computed by a process pool.
     """
-    order_with_revenues = reconcile_transactions(input_json)
-    assert order_with_revenues == {}
-
-if __name__ == "__main__":
-    reconcile_transactions_test_success()
-    reconcile_transactions_test_json_fail()
-    reconcile_transactions_test_payload_fail()
-    reconcile_transactions_test_no_order_id()
-    reconcile_transactions_test_empty_result()
\ No newline at end of file
+    workers = workers or os.cpu_count() or 1
+    byte_ranges = _split_byte_ranges(path, workers * ranges_per_worker)
+    n_partitions = workers
+
+    with tempfile.TemporaryDirectory() as tmp_dir, ProcessPoolExecutor(max_workers=workers) as pool:
+        try:
+            list(pool.map(_map_range, *zip(*[
+                (path, start, end, range_idx, n_partitions, tmp_dir)
+                for range_idx, (start, end) in enumerate(byte_ranges)
+            ])))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            print("Events are not one per line, falling back to the streaming reconciliation")
+            writer = DictResultWriter()
+            with open(path) as log_file:
+                if reconcile_transactions_stream(log_file, writer) < 0:
+                    return {}
+            return writer.results
+
+        results = {}
+        for ledger in pool.map(_reduce_partition, range(n_partitions), [len(byte_ranges)] * n_partitions, [tmp_dir] * n_partitions):
+            results.update(ledger)
+        return results
+
+"""
+Resumable mode:
+ResumableReconciliation reads a one event per line log (like the parallel mode) and every `checkpoint_every` events
+writes a checkpoint: the byte offset of the next line and the raw (not rounded) revenue of every order.
+The checkpoint is a compact binary file, written to a temp file and renamed so a crash while writing it keeps the
+previous one. A new job on the same checkpoint continues from the offset, so the result is the same as one run.
+
+Checkpoint layout (little endian):
+    header: magic b"RCK1", uint64 offset, uint64 events, uint64 number of orders
+    per order: uint8 key kind, uint32 key length, key, float64 raw revenue
+               (kind 0: utf-8 order_id string, kind 1: json encoded order_id, keeps other types like ints as they are)
+"""
+
+CHECKPOINT_HEADER = struct.Struct("<4sQQQ")
+CHECKPOINT_ORDER = struct.Struct("<BId")
+
+class ResumableReconciliation:
+    def __init__(self, log_path: str, checkpoint_path: str, checkpoint_every: int = 100000):
+        self.log_path = log_path
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+        self.offset = 0
+        self.events = 0
+        self.orders_with_revenues = defaultdict(float)
+        self.checkpoints_written = 0
+        self.checkpoint_seconds = 0.0
+        self.checkpoint_bytes = 0
+        if os.path.exists(checkpoint_path):
+            self._load_checkpoint()
+
+    def _load_checkpoint(self):
+        with open(self.checkpoint_path, "rb") as checkpoint_file:
+            data = checkpoint_file.read()
+        magic, self.offset, self.events, n_orders = CHECKPOINT_HEADER.unpack_from(data, 0)
+        if magic != b"RCK1":
+            raise ValueError(f"Not a reconciliation checkpoint: {self.checkpoint_path}")
+
+        pos = CHECKPOINT_HEADER.size
+        for _ in range(n_orders):
+            key_kind, key_len, raw_revenue = CHECKPOINT_ORDER.unpack_from(data, pos)
+            pos += CHECKPOINT_ORDER.size
+            key = data[pos:pos + key_len]
+            order_id = key.decode() if key_kind == 0 else json.loads(key)
+            pos += key_len
+            self.orders_with_revenues[order_id] = raw_revenue
+
+    def write_checkpoint(self):
+        start = time.perf_counter()
+        parts = [CHECKPOINT_HEADER.pack(b"RCK1", self.offset, self.events, len(self.orders_with_revenues))]
+        pack = CHECKPOINT_ORDER.pack
+        for order_id, raw_revenue in self.orders_with_revenues.items():
+            if type(order_id) is str:
+                key = order_id.encode()
+                parts.append(pack(0, len(key), raw_revenue))
+            else:
+                key = json.dumps(order_id).encode()
+                parts.append(pack(1, len(key), raw_revenue))
+            parts.append(key)
+        data = b"".join(parts)
+
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "wb") as checkpoint_file:
+            checkpoint_file.write(data)
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+        self.checkpoints_written += 1
+        self.checkpoint_bytes = len(data)
+        self.checkpoint_seconds += time.perf_counter() - start
+
+    def process(self, max_events: int = None) -> bool:
+        """
+        Folds the log from the last checkpoint, returns True once the end of the log is reached.
+        max_events stops early (without a checkpoint), the job can be continued by another instance later.
+        """
+        processed = 0
+        since_checkpoint = 0
+        with open(self.log_path, "rb") as log_file:
+            log_file.seek(self.offset)
+            for line in log_file:
+                if max_events is not None and processed >= max_events:
+                    return False
+                event_line = _event_line(line)
+                if event_line:
+                    apply_transaction(self.orders_with_revenues, json.loads(event_line))
+                    self.events += 1
+                    processed += 1
+                    since_checkpoint += 1
+                self.offset += len(line)
+                if since_checkpoint >= self.checkpoint_every:
+                    self.write_checkpoint()
+                    since_checkpoint = 0
+        return True
+
+    def run(self, writer) -> int:
+        """
+        Runs the job to the end, writes the results and removes the checkpoint.
+        Returns the number of orders written, or -1 if a line is not valid JSON.
+        """
+        try:
+            self.process()
+        except json.JSONDecodeError as e:
+            print("Invalid JSON Input, the log must have one event per line", e)
+            return -1
+
+        for ord_id, raw_revenue in self.orders_with_revenues.items():
+            writer.write(ord_id, net_profit(raw_revenue))
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        return len(self.orders_with_revenues)
+
+def reconcile_transactions_parallel_benchmark(n_events: int = 1000000):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_path = os.path.join(tmp_dir, "ledger.ndjson")
+        with open(log_path, "w") as log_file:
+            for i in range(n_events):
+                tr = {"event_id": f"evt-{i}", "type": ("CHARGE", "DASHER_PAY", "REFUND")[i % 3],
+                      "order_id": f"order-{i % 50000}", "amount": 10.25}
+                log_file.write(json.dumps(tr) + "\n")
+
+        start = time.perf_counter()
+        with open(log_path) as log_file:
+            writer = DictResultWriter()
+            reconcile_transactions_stream(log_file, writer)
+        serial_time = time.perf_counter() - start
+        print(f"{n_events} events, serial streaming: {serial_time:.2f} s")
+
+        workers = 1
+        while workers <= (os.cpu_count() or 1):
+            start = time.perf_counter()
+            results = reconcile_transactions_parallel(log_path, workers)
+            elapsed = time.perf_counter() - start
+            assert results == writer.results
+            print(f"{workers:>3} workers: {elapsed:.2f} s, speedup {serial_time / elapsed:.2f}x")
+            workers *= 2
+
+def resumable_reconciliation_benchmark(n_events: int = 1000000, n_orders: int = 100000):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_path = os.path.join(tmp_dir, "ledger.ndjson")
+        with open(log_path, "w") as log_file:
+            for i in range(n_events):
+                tr = {"event_id": f"evt-{i}", "type": ("CHARGE", "DASHER_PAY", "REFUND")[i % 3],
+                      "order_id": f"order-{i % n_orders}", "amount": 10.25}
+                log_file.write(json.dumps(tr) + "\n")
+
+        start = time.perf_counter()
+        ResumableReconciliation(log_path, os.path.join(tmp_dir, "none.ckpt"), checkpoint_every=n_events + 1).run(DictResultWriter())
+        base_time = time.perf_counter() - start
+        print(f"{n_events} events, {n_orders} orders, no checkpoint: {base_time:.2f} s")
+
+        for every in (500000, 100000, 20000):
+            job = ResumableReconciliation(log_path, os.path.join(tmp_dir, f"{every}.ckpt"), checkpoint_every=every)
+            start = time.perf_counter()
+            job.run(DictResultWriter())
+            elapsed = time.perf_counter() - start
+            print(f"checkpoint every {every:>7} events: {elapsed:.2f} s (+{(elapsed / base_time - 1) * 100:.0f}%), "
+                  f"{job.checkpoints_written} checkpoints, {job.checkpoint_seconds / max(1, job.checkpoints_written) * 1000:.1f} ms "
+                  f"and {job.checkpoint_bytes / 1e6:.1f} MB each")
+
+def reconcile_transactions_stream_benchmark(n_events: int = 500000):
+    # peak python memory of loading the whole log vs streaming it from a file
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_path = os.path.join(tmp_dir, "ledger.json")
+        with open(log_path, "w") as log_file:
+            log_file.write("[\n")
+            for i in range(n_events):
+                tr = {"event_id": f"evt-{i}", "type": ("CHARGE", "DASHER_PAY", "REFUND")[i % 3],
+                      "order_id": f"order-{i % 20000}", "amount": 10.25}
+                log_file.write(("," if i else "") + json.dumps(tr) + "\n")
+            log_file.write("]")
+        print(f"{n_events} events, {os.path.getsize(log_path) / 1e6:.1f} MB log, 20000 orders")
+
+        def run_serial():
+            with open(log_path) as log_file:
+                reconcile_transactions(log_file.read())
+
+        def run_stream():
+            with open(log_path) as log_file, open(os.path.join(tmp_dir, "out.ndjson"), "w") as out_file:
+                reconcile_transactions_stream(log_file, NDJSONResultWriter(out_file))
+
+        for name, run in (("reconcile_transactions", run_serial), ("reconcile_transactions_stream", run_stream)):
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            # memory is measured on a second run, tracemalloc slows down the timing a lot
+            tracemalloc.start()
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{name:<30} {elapsed:.2f} s, peak {peak / 1e6:.1f} MB")
+
+if __name__ == "__main__" and "--bench" in sys.argv:
+    reconcile_transactions_stream_benchmark()
+    reconcile_transactions_parallel_benchmark()
+    resumable_reconciliation_benchmark()
@@ -7,79 +7,638 @@ Core Requirements:
     When an order is assigned, the Dasher becomes unavailable, and the order's status should be updated to ASSIGNED.
     If no Dashers are available, the service should throw a NoDashersAvailableException.
 """
+from abc import ABC, abstractmethod
 from enum import Enum
 from dataclasses import dataclass
+from collections import deque
+import heapq
+import itertools
 import math
+import random
+import sys
+import threading
+import time
 
-@dataclass
-class Location:
-    latitude: float
-    longitude: float
+# numpy is imported by the functions that use it, a worker that imports the module does not pay for it until it
+# assigns. The types, the index, the distance services and the persistence are in the shared delivery modules,
+# the simulator and the benchmarks in benchmarks/.
+# imported as part of the solutions package, or run as a script from solutions/
+if __package__:
+    from .dasher_index import DasherGridIndex
+    from .delivery_distances import DistanceService
+    from .delivery_model import (
+        Dasher, DasherRepository, Delivery, InvalidOrderException, Location, NoDashersAvailableException, Order,
+        OrderRepository, OrderStatus
+    )
+else:
+    from dasher_index import DasherGridIndex
+    from delivery_distances import DistanceService
+    from delivery_model import (
+        Dasher, DasherRepository, Delivery, InvalidOrderException, Location, NoDashersAvailableException, Order,
+        OrderRepository, OrderStatus
+    )
 
-class OrderStatus(Enum):
-    ASSIGNED = 1
-    PENDING = 2
-    DELIVERED = 3
+"""
+Fleet:
+Location, Order, Dasher and Delivery are slotted dataclasses (no per instance __dict__), Location and Delivery are
+frozen. A metro fleet still costs a Dasher and a nested Location object per dasher, so Fleet keeps the dashers as
+a struct of arrays: the ids in a list, the coordinates in float64 arrays, the availability in a bool array and the
+scoring inputs (active_orders, acceptance_rate, heading, NaN for None) in their own arrays, grown by doubling.
+fleet[dasher_id] hands out a FleetDasher, a two slot view that reads and writes the arrays, and can be used where a
+Dasher is expected, by the services and by the criteria of a ScoringPipeline.
+A view builds its Location on every read, so the hot loops should work on the arrays (see nearest_available).
+"""
 
-@dataclass
-class Order:
-    order_id: str
-    order_location: Location
-    customer_location: Location
-    status: OrderStatus
+class FleetDasher:
+    __slots__ = ("fleet", "index")
 
-@dataclass
-class Dasher:
-    dasher_id: str
-    location: Location
-    is_available: bool
+    def __init__(self, fleet, index: int):
+        self.fleet = fleet
+        self.index = index
+
+    @property
+    def dasher_id(self) -> str:
+        return self.fleet.ids[self.index]
+
+    @property
+    def location(self) -> Location:
+        fleet = self.fleet
+        return Location(fleet.latitudes.item(self.index), fleet.longitudes.item(self.index))
+
+    @location.setter
+    def location(self, location: Location):
+        self.fleet.latitudes[self.index] = location.latitude
+        self.fleet.longitudes[self.index] = location.longitude
+
+    @property
+    def is_available(self) -> bool:
+        return self.fleet.available.item(self.index)
+
+    @is_available.setter
+    def is_available(self, is_available: bool):
+        self.fleet.available[self.index] = is_available
+
+    @property
+    def active_orders(self) -> int:
+        return self.fleet.active_orders.item(self.index)
+
+    @active_orders.setter
+    def active_orders(self, active_orders: int):
+        self.fleet.active_orders[self.index] = active_orders
+
+    @property
+    def acceptance_rate(self) -> float:
+        return self.fleet.acceptance_rates.item(self.index)
+
+    @acceptance_rate.setter
+    def acceptance_rate(self, acceptance_rate: float):
+        self.fleet.acceptance_rates[self.index] = acceptance_rate
+
+    @property
+    def heading(self) -> float:
+        heading = self.fleet.headings.item(self.index)
+        return None if math.isnan(heading) else heading
+
+    @heading.setter
+    def heading(self, heading: float):
+        self.fleet.headings[self.index] = math.nan if heading is None else heading
+
+    def __repr__(self):
+        return f"FleetDasher(dasher_id={self.dasher_id!r}, location={self.location}, is_available={self.is_available})"
+
+class Fleet:
+    def __init__(self, capacity: int = 1024):
+        import numpy as np
+        self.ids = []
+        # dasher_id -> index in the arrays
+        self.positions = {}
+        self.latitudes = np.zeros(capacity)
+        self.longitudes = np.zeros(capacity)
+        self.available = np.zeros(capacity, dtype=bool)
+        self.active_orders = np.zeros(capacity, dtype=np.int32)
+        self.acceptance_rates = np.ones(capacity)
+        self.headings = np.full(capacity, math.nan)
+
+    @classmethod
+    def from_dashers(cls, dashers: list[Dasher]):
+        fleet = cls(max(len(dashers), 1))
+        for dasher in dashers:
+            fleet.add(dasher.dasher_id, dasher.location, dasher.is_available,
+                      dasher.active_orders, dasher.acceptance_rate, dasher.heading)
+        return fleet
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, dasher_id: str):
+        return dasher_id in self.positions
+
+    def __getitem__(self, dasher_id: str) -> FleetDasher:
+        return FleetDasher(self, self.positions[dasher_id])
+
+    def add(self, dasher_id: str, location: Location, is_available: bool = True, active_orders: int = 0,
+            acceptance_rate: float = 1.0, heading: float = None) -> FleetDasher:
+        import numpy as np
+        # inserts a new dasher, or updates the one already in the fleet
+        index = self.positions.get(dasher_id)
+        if index is None:
+            index = len(self.ids)
+            if index == len(self.latitudes):
+                self.latitudes = np.concatenate([self.latitudes, np.zeros(index)])
+                self.longitudes = np.concatenate([self.longitudes, np.zeros(index)])
+                self.available = np.concatenate([self.available, np.zeros(index, dtype=bool)])
+                self.active_orders = np.concatenate([self.active_orders, np.zeros(index, dtype=np.int32)])
+                self.acceptance_rates = np.concatenate([self.acceptance_rates, np.ones(index)])
+                self.headings = np.concatenate([self.headings, np.full(index, math.nan)])
+            self.ids.append(dasher_id)
+            self.positions[dasher_id] = index
+        self.latitudes[index] = location.latitude
+        self.longitudes[index] = location.longitude
+        self.available[index] = is_available
+        self.active_orders[index] = active_orders
+        self.acceptance_rates[index] = acceptance_rate
+        self.headings[index] = math.nan if heading is None else heading
+        return FleetDasher(self, index)
+
+    def available_dashers(self) -> list[FleetDasher]:
+        import numpy as np
+        return [FleetDasher(self, index) for index in np.flatnonzero(self.available[:len(self.ids)]).tolist()]
+
+    def nearest_available(self, target_location: Location):
+        import numpy as np
+        # same Euclidean distance and first-of-equals as find_best_dasher, in fleet order
+        available = np.flatnonzero(self.available[:len(self.ids)])
+        if not len(available):
+            return None
+        distances = np.sqrt((self.latitudes[available] - target_location.latitude)**2 +
+                            (self.longitudes[available] - target_location.longitude)**2)
+        return FleetDasher(self, int(available[int(np.argmin(distances))]))
+
+    @property
+    def nbytes(self) -> int:
+        # the arrays and the containers, the id strings are shared with the callers
+        arrays = (self.latitudes, self.longitudes, self.available, self.active_orders, self.acceptance_rates, self.headings)
+        return sum(array.nbytes for array in arrays) + sys.getsizeof(self.ids) + sys.getsizeof(self.positions)
+
+class FleetDasherRepository(DasherRepository):
+    def __init__(self, fleet: Fleet):
+        self.fleet = fleet
+
+    def get_available_dashers(self) -> list[FleetDasher]:
+        return self.fleet.available_dashers()
+
+    def save(self, dasher):
+        # a view already wrote to the fleet, a Dasher is copied into it
+        if not isinstance(dasher, FleetDasher) or dasher.fleet is not self.fleet:
+            self.fleet.add(dasher.dasher_id, dasher.location, dasher.is_available,
+                           dasher.active_orders, dasher.acceptance_rate, dasher.heading)
+
+    def save_many(self, dashers: list):
+        for dasher in dashers:
+            self.save(dasher)
+
+"""
+Dasher registry:
+get_available_dashers is a database query that builds every Dasher again, and assign_order called it for every order.
+DasherRegistry loads the dashers once, then applies the change events of a DasherChangeFeed (online / offline,
+assigned / freed, location). Reads are served from memory: available_dashers() returns a list that is only rebuilt
+after a change, and the registry keeps an optional DasherGridIndex in sync.
+The feed only keeps its last changes, the registry resyncs from the repository when it missed some (its next sequence
+number is not in the feed anymore) or when its last sync is older than resync_seconds.
+"""
+
+class DasherChangeType(Enum):
+    ONLINE = 1
+    OFFLINE = 2
+    ASSIGNED = 3
+    FREED = 4
+    LOCATION = 5
 
 @dataclass
-class Delivery:
-    delivery_id: str
-    order_id: str
+class DasherChange:
+    seq: int
+    change_type: DasherChangeType
     dasher_id: str
+    location: Location = None
 
-class InvalidOrderException(Exception):
-    pass
-class NoDashersAvailableException(Exception):
-    pass
-
-class DasherRepository:
-    def get_available_dashers(self) -> list[Dasher]:
-        # In a real app, this queries a DB
-        # For the interview, we can hardcode mock data here
-        print("Mock: Fetching available dashers...")
-        return [
-            Dasher("d_001", Location(43.65, -79.38), True),
-            Dasher("d_002", Location(43.70, -79.40), True),
-            Dasher("d_003", Location(43.60, -79.35), True),
-        ]
-    
-    def save(self, dasher: Dasher):
-        print(f"Mock: Saving Dasher {dasher.dasher_id}, is_available={dasher.is_available}")
+class DasherChangeFeed:
+    def __init__(self, capacity: int = 100000):
+        self.changes = deque(maxlen=capacity)
+        self.last_seq = 0
+
+    def publish(self, change_type: DasherChangeType, dasher_id: str, location: Location = None) -> int:
+        self.last_seq += 1
+        self.changes.append(DasherChange(self.last_seq, change_type, dasher_id, location))
+        return self.last_seq
+
+    def changes_after(self, seq: int):
+        # the changes after seq, None when some of them are not kept anymore
+        if seq >= self.last_seq:
+            return []
+        if not self.changes or self.changes[0].seq > seq + 1:
+            return None
+        return list(itertools.islice(self.changes, seq + 1 - self.changes[0].seq, None))
+
+class DasherRegistry:
+    def __init__(self, repository: DasherRepository, feed: DasherChangeFeed, index: DasherGridIndex = None,
+                 resync_seconds: float = 300.0, clock=time.monotonic):
+        self.repository = repository
+        self.feed = feed
+        self.index = index
+        self.resync_seconds = resync_seconds
+        self.clock = clock
+        # every dasher seen, and the available ones
+        self.dashers = {}
+        self.available = {}
+        self.available_list = None
+        self.seq = 0
+        self.synced_at = None
+        self.resyncs = 0
+        self.applied = 0
+        # called with every dasher that becomes available
+        self.availability_listeners = []
+        self.resync()
+
+    def resync(self):
+        # the feed position is taken before the query, the changes that happen during it are applied again after
+        seq = self.feed.last_seq
+        dashers = self.repository.get_available_dashers()
+        if self.index is not None:
+            for dasher_id in list(self.available):
+                self.index.remove(dasher_id)
+        self.available = {}
+        for dasher in dashers:
+            self.dashers[dasher.dasher_id] = dasher
+            if dasher.is_available:
+                self._make_available(dasher)
+        for dasher_id, dasher in self.dashers.items():
+            if dasher_id not in self.available:
+                dasher.is_available = False
+        self.available_list = None
+        self.seq = seq
+        self.synced_at = self.clock()
+        self.resyncs += 1
+
+    def refresh(self):
+        if self.clock() - self.synced_at >= self.resync_seconds:
+            self.resync()
+        changes = self.feed.changes_after(self.seq)
+        if changes is None:
+            print(f"Dasher registry missed changes after {self.seq}, resyncing")
+            self.resync()
+            changes = self.feed.changes_after(self.seq) or []
+        for change in changes:
+            self.apply(change)
+
+    def apply(self, change: DasherChange):
+        self.seq = change.seq
+        self.applied += 1
+        dasher = self.dashers.get(change.dasher_id)
+        if dasher is None:
+            if change.location is None:
+                # nothing is known about this dasher yet, the next resync loads it
+                return
+            dasher = self.dashers[change.dasher_id] = Dasher(change.dasher_id, change.location, False)
+        if change.location is not None:
+            dasher.location = change.location
+            if self.index is not None and change.dasher_id in self.available:
+                self.index.move(dasher)
+
+        if change.change_type in (DasherChangeType.ONLINE, DasherChangeType.FREED):
+            if change.dasher_id not in self.available:
+                self._make_available(dasher)
+        elif change.change_type in (DasherChangeType.OFFLINE, DasherChangeType.ASSIGNED):
+            self.mark_unavailable(change.dasher_id)
+
+    def _make_available(self, dasher: Dasher):
+        dasher.is_available = True
+        self.available[dasher.dasher_id] = dasher
+        if self.index is not None:
+            self.index.insert(dasher)
+        self.available_list = None
+        for listener in self.availability_listeners:
+            listener(dasher)
+
+    def mark_available(self, dasher_id: str):
+        dasher = self.dashers.get(dasher_id)
+        if dasher is not None and dasher_id not in self.available:
+            self._make_available(dasher)
+
+    def mark_unavailable(self, dasher_id: str):
+        dasher = self.available.pop(dasher_id, None)
+        if dasher is None:
+            return
+        dasher.is_available = False
+        if self.index is not None:
+            self.index.remove(dasher_id)
+        self.available_list = None
+
+    def available_dashers(self) -> list[Dasher]:
+        if self.available_list is None:
+            self.available_list = list(self.available.values())
+        return self.available_list
+
+    def get(self, dasher_id: str):
+        return self.dashers.get(dasher_id)
+
+"""
+Batch assignment:
+During a rush, giving every order the closest dasher left lets the first orders take the dashers the next orders
+needed more. assign_orders matches a batch of orders to dashers with the minimum total distance instead.
+min_cost_matching is a successive shortest path matching on the sparse order -> candidate dasher graph:
+every order in turn is matched through the cheapest alternating path (Dijkstra with node potentials, so the
+reduced costs stay non negative), which may move already matched orders to other dashers. After every order the
+matching is the cheapest one for the orders seen so far, and the orders are served first come first served when
+there are fewer dashers than orders. OrderBatchWindow collects the orders of a short window for assign_orders.
+"""
+
+def min_cost_matching(candidates: list, n_dashers: int) -> list[int]:
+    """
+    candidates[order] is a list of (dasher, cost) with the dashers numbered 0..n_dashers-1.
+    Returns the dasher of every order, -1 for the orders that could not be matched.
+    """
+    order_dasher = [-1] * len(candidates)
+    dasher_order = [-1] * n_dashers
+    order_potential = [0.0] * len(candidates)
+    dasher_potential = [0.0] * n_dashers
+
+    for source in range(len(candidates)):
+        if not candidates[source]:
+            continue
+        # Dijkstra over the dashers, order_dist is the distance of the orders reached (through their dasher)
+        dasher_dist = {}
+        previous_order = {}
+        order_dist = {source: 0.0}
+        done = set()
+        heap = []
+        for dasher, cost in candidates[source]:
+            reduced = cost + order_potential[source] - dasher_potential[dasher]
+            if reduced < dasher_dist.get(dasher, math.inf):
+                dasher_dist[dasher] = reduced
+                previous_order[dasher] = source
+                heapq.heappush(heap, (reduced, dasher))
+
+        free_dasher = -1
+        while heap:
+            dist, dasher = heapq.heappop(heap)
+            if dasher in done or dist > dasher_dist[dasher]:
+                continue
+            done.add(dasher)
+            order = dasher_order[dasher]
+            if order < 0:
+                free_dasher = dasher
+                break
+            # the matched edge is walked backwards, its reduced cost is 0
+            order_dist[order] = dist
+            for next_dasher, cost in candidates[order]:
+                if next_dasher == dasher or next_dasher in done:
+                    continue
+                reduced = dist + cost + order_potential[order] - dasher_potential[next_dasher]
+                if reduced < dasher_dist.get(next_dasher, math.inf):
+                    dasher_dist[next_dasher] = reduced
+                    previous_order[next_dasher] = order
+                    heapq.heappush(heap, (reduced, next_dasher))
+        if free_dasher < 0:
+            continue
+
+        # potentials of the nodes closer than the free dasher, the others stay as they are
+        total = dasher_dist[free_dasher]
+        for order, dist in order_dist.items():
+            order_potential[order] += dist - total
+        for dasher in done:
+            dasher_potential[dasher] += dasher_dist[dasher] - total
+
+        # flips the alternating path
+        dasher = free_dasher
+        while True:
+            order = previous_order[dasher]
+            next_dasher = order_dasher[order]
+            order_dasher[order] = dasher
+            dasher_order[dasher] = order
+            if order == source:
+                break
+            dasher = next_dasher
+    return order_dasher
+
+class OrderBatchWindow:
+    def __init__(self, service, window_seconds: float = 2.0, max_batch: int = 500, clock=time.monotonic):
+        """
+        Collects the orders of window_seconds (or max_batch orders) and assigns them with service.assign_orders.
+        """
+        self.service = service
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self.clock = clock
+        self.orders = []
+        self.opened_at = None
+
+    def add(self, order: Order) -> list[Delivery]:
+        # returns the deliveries of the batch when adding the order closes it, else []
+        if not self.orders:
+            self.opened_at = self.clock()
+        self.orders.append(order)
+        if len(self.orders) >= self.max_batch or self.clock() - self.opened_at >= self.window_seconds:
+            return self.flush()
+        return []
 
-class OrderRepository:
-    def save(self, order: Order):
-        print(f"Mock: Saving Order {order.order_id}, status={order.status.name}")
+    def flush(self) -> list[Delivery]:
+        orders, self.orders = self.orders, []
+        if not orders:
+            return []
+        return self.service.assign_orders(orders)
+
+"""
+Scoring pipeline:
+find_best_dasher only ranks by distance. ScoringPipeline also weighs the load, the acceptance rate and the heading of
+the dashers, as a weighted sum of criteria costs (lower is better). Scoring the whole fleet for every order does not
+scale, so the pipeline first retrieves the k nearest dashers (from the grid index, or one vectorized distance pass),
+and only scores those. When fewer than min_qualified of them pass the criteria limits (too busy, too picky),
+k is doubled, which widens the search radius, up to max_candidates, so the cost per assignment stays bounded
+whatever the fleet size.
+The best dasher by score can be outside of the k nearest. audit_rate scores a sample of the orders against the
+whole fleet as well, and counts how often the pruned answer differs (disagreement_rate).
+"""
+
+class ScoringCriterion(ABC):
+    def __init__(self, weight: float = 1.0):
+        self.weight = weight
+
+    @abstractmethod
+    def costs(self, order: Order, dashers: list[Dasher], distances: "np.ndarray") -> "np.ndarray":
+        # the cost of every dasher for the order, lower is better
+        ...
+
+    def qualifies(self, order: Order, dashers: list[Dasher], distances: "np.ndarray") -> "np.ndarray":
+        import numpy as np
+        return np.ones(len(dashers), dtype=bool)
+
+class DistanceCriterion(ScoringCriterion):
+    def __init__(self, weight: float = 1.0, scale: float = 0.01):
+        # scale is the distance that costs as much as one unit of the other criteria
+        super().__init__(weight)
+        self.scale = scale
+
+    def costs(self, order, dashers, distances):
+        return distances / self.scale
 
-class DistanceService:
-    def calculate_distance(self, loc1: Location, loc2: Location) -> float:
-        # Simple "Haversine" distance logic, or just fake it
-        print(f"Mock: Calculating distance between {loc1} and {loc2}")
-        # In an interview, it's fine to just return a simple calculation
-        return math.sqrt((loc1.latitude - loc2.latitude)**2 + (loc1.longitude - loc2.longitude)**2)
+class LoadCriterion(ScoringCriterion):
+    def __init__(self, weight: float = 1.0, max_active_orders: int = None):
+        super().__init__(weight)
+        self.max_active_orders = max_active_orders
+
+    def costs(self, order, dashers, distances):
+        import numpy as np
+        return np.array([dasher.active_orders for dasher in dashers], dtype=np.float64)
+
+    def qualifies(self, order, dashers, distances):
+        import numpy as np
+        if self.max_active_orders is None:
+            return super().qualifies(order, dashers, distances)
+        return np.array([dasher.active_orders <= self.max_active_orders for dasher in dashers], dtype=bool)
+
+class AcceptanceCriterion(ScoringCriterion):
+    def __init__(self, weight: float = 1.0, min_acceptance_rate: float = None):
+        super().__init__(weight)
+        self.min_acceptance_rate = min_acceptance_rate
+
+    def costs(self, order, dashers, distances):
+        import numpy as np
+        return 1.0 - np.array([dasher.acceptance_rate for dasher in dashers], dtype=np.float64)
+
+    def qualifies(self, order, dashers, distances):
+        import numpy as np
+        if self.min_acceptance_rate is None:
+            return super().qualifies(order, dashers, distances)
+        return np.array([dasher.acceptance_rate >= self.min_acceptance_rate for dasher in dashers], dtype=bool)
+
+class HeadingCriterion(ScoringCriterion):
+    def costs(self, order, dashers, distances):
+        import numpy as np
+        # 0 when driving towards the restaurant, 1 when driving away, 0 for the dashers not moving
+        target = order.order_location
+        costs = np.zeros(len(dashers))
+        for idx, dasher in enumerate(dashers):
+            if dasher.heading is None:
+                continue
+            d_north = target.latitude - dasher.location.latitude
+            d_east = (target.longitude - dasher.location.longitude) * math.cos(math.radians(dasher.location.latitude))
+            if d_north == 0 and d_east == 0:
+                continue
+            bearing = math.atan2(d_east, d_north)
+            costs[idx] = (1 - math.cos(bearing - math.radians(dasher.heading))) / 2
+        return costs
+
+class ScoringPipeline:
+    def __init__(self, criteria: list[ScoringCriterion], distance_service: DistanceService, k: int = 16,
+                 min_qualified: int = 4, max_candidates: int = 256, audit_rate: float = 0.0, seed: int = 0):
+        self.criteria = criteria
+        self.distance_service = distance_service
+        self.k = k
+        self.min_qualified = min_qualified
+        self.max_candidates = max_candidates
+        self.audit_rate = audit_rate
+        self.rng = random.Random(seed)
+        self.assignments = 0
+        self.widenings = 0
+        self.scored = 0
+        self.audited = 0
+        self.disagreements = 0
+
+    def _distances(self, order: Order, dashers: list[Dasher]) -> "np.ndarray":
+        import numpy as np
+        latitudes = np.fromiter((dasher.location.latitude for dasher in dashers), dtype=np.float64, count=len(dashers))
+        longitudes = np.fromiter((dasher.location.longitude for dasher in dashers), dtype=np.float64, count=len(dashers))
+        distances = self.distance_service.calculate_distances(order.order_location, latitudes, longitudes)
+        distances[np.isnan(distances)] = np.inf
+        return distances
+
+    def _best(self, order: Order, dashers: list[Dasher], distances: "np.ndarray"):
+        import numpy as np
+        # returns (dasher, qualified count), ties go to the first (closest) dasher
+        qualified = np.isfinite(distances)
+        for criterion in self.criteria:
+            qualified &= criterion.qualifies(order, dashers, distances)
+        n_qualified = int(qualified.sum())
+        if not n_qualified:
+            return None, 0
+        self.scored += len(dashers)
+        scores = np.zeros(len(dashers))
+        for criterion in self.criteria:
+            scores += criterion.weight * criterion.costs(order, dashers, distances)
+        scores[~qualified] = np.inf
+        return dashers[int(np.argmin(scores))], n_qualified
+
+    def _nearest(self, order: Order, dashers: list[Dasher], dasher_index: DasherGridIndex, k: int):
+        import numpy as np
+        if dasher_index is not None:
+            nearest = dasher_index.k_nearest(order.order_location, k)
+            return nearest, self._distances(order, nearest)
+        distances = self._distances(order, dashers)
+        if k < len(dashers):
+            nearest = np.argpartition(distances, k)[:k]
+            nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+        else:
+            nearest = np.argsort(distances, kind="stable")
+        return [dashers[idx] for idx in nearest.tolist()], distances[nearest]
+
+    def best_dasher(self, order: Order, dashers: list[Dasher] = None, dasher_index: DasherGridIndex = None):
+        """
+        Returns the best scored dasher among the nearest ones, None when no dasher qualifies.
+        The dashers come from dasher_index when given, else from the dashers list.
+        """
+        self.assignments += 1
+        fleet_size = len(dasher_index) if dasher_index is not None else len(dashers)
+        k = self.k
+        while True:
+            candidates, distances = self._nearest(order, dashers, dasher_index, k)
+            best, n_qualified = self._best(order, candidates, distances)
+            if n_qualified >= self.min_qualified or k >= self.max_candidates or k >= fleet_size:
+                break
+            k = min(2 * k, self.max_candidates)
+            self.widenings += 1
+
+        if self.audit_rate and self.rng.random() < self.audit_rate:
+            self.audited += 1
+            if dasher_index is not None:
+                dashers = [dasher for cell in dasher_index.cells.values() for dasher in cell.values()]
+            exhaustive, _ = self._best(order, dashers, self._distances(order, dashers))
+            if (exhaustive and exhaustive.dasher_id) != (best and best.dasher_id):
+                self.disagreements += 1
+        return best
+
+    @property
+    def disagreement_rate(self) -> float:
+        return self.disagreements / self.audited if self.audited else 0.0
 
 class DeliveryAssignmentService:
     def __init__(
         self,
         order_repository: OrderRepository,
         dasher_repository: DasherRepository,
-        distance_service: DistanceService
+        distance_service: DistanceService,
+        dasher_index: DasherGridIndex = None,
+        dasher_registry: DasherRegistry = None,
+        scoring: ScoringPipeline = None
     ):
+        """
+        dasher_index holds the available dashers when given, assign_order then queries it instead of
+        scanning the dashers of the repository. It assumes the Euclidean distance of DistanceService.
+        dasher_registry replaces the repository queries, its index (if any) is used as dasher_index.
+        scoring picks the dasher of assign_order by score instead of by distance only.
+        """
         self.order_repository = order_repository
         self.dasher_repository = dasher_repository
         self.distance_service = distance_service
+        if dasher_registry is not None and dasher_index is None:
+            dasher_index = dasher_registry.index
+        self.dasher_index = dasher_index
+        self.dasher_registry = dasher_registry
+        self.scoring = scoring
+
+    def _available_dashers(self) -> list[Dasher]:
+        if self.dasher_registry is not None:
+            return self.dasher_registry.available_dashers()
+        return self.dasher_repository.get_available_dashers()
     
     def assign_order(self, order: Order) -> Delivery:
         if not order:
@@ -87,114 +646,296 @@ class DeliveryAssignmentService:
         if order.status != OrderStatus.PENDING:
             raise InvalidOrderException("Order status either Assigned or Delivered")
         
-        dashers = self.dasher_repository.get_available_dashers()
+        if self.dasher_registry is not None:
+            self.dasher_registry.refresh()
+        order_location = order.order_location
+        if self.dasher_index is not None:
+            if not len(self.dasher_index):
+                raise NoDashersAvailableException("No Dasher is available at this time.")
+            if self.scoring is not None:
+                dasher = self.scoring.best_dasher(order, dasher_index=self.dasher_index)
+                if dasher is None:
+                    raise NoDashersAvailableException("No Dasher qualifies for this order.")
+            else:
+                dasher = self.dasher_index.nearest(order_location)
+        else:
+            dashers = self._available_dashers()
 
-        if not dashers:
-            raise NoDashersAvailableException("No Dasher is available at this time.")
+            if not dashers:
+                raise NoDashersAvailableException("No Dasher is available at this time.")
 
-        print("Dasher found")
-        order_location = order.order_location
-        dasher = self.find_best_dasher(dashers, order_location)
+            print("Dasher found")
+            if self.scoring is not None:
+                dasher = self.scoring.best_dasher(order, dashers)
+                if dasher is None:
+                    raise NoDashersAvailableException("No Dasher qualifies for this order.")
+            else:
+                dasher = self.find_best_dasher(dashers, order_location)
 
         if not dasher:
             raise Exception("An unexpected error finding the best dasher.")
 
+        delivery = self._create_delivery(order, dasher)
+        print("Successfully created delivery; Order and Dasher status changed")
+        return delivery
+
+    def _create_delivery(self, order: Order, dasher: Dasher) -> Delivery:
         delivery = Delivery(
             delivery_id= "del_" + order.order_id,
             order_id= order.order_id,
             dasher_id= dasher.dasher_id
         )
 
-        order.status = OrderStatus.ASSIGNED
-        dasher.is_available = False
+        self._mark_assigned(order, dasher)
         self.order_repository.save(order)
         self.dasher_repository.save(dasher)
-
-        print("Successfully created delivery; Order and Dasher status changed")
         return delivery
 
+    def _mark_assigned(self, order: Order, dasher: Dasher):
+        order.status = OrderStatus.ASSIGNED
+        dasher.is_available = False
+        if self.dasher_registry is not None:
+            self.dasher_registry.mark_unavailable(dasher.dasher_id)
+        elif self.dasher_index is not None and dasher.dasher_id in self.dasher_index:
+            self.dasher_index.remove(dasher.dasher_id)
+
+    def assign_orders(self, orders: list[Order], candidates_per_order: int = 10) -> list[Delivery]:
+        """
+        Assigns a batch of orders at once, with the minimum total distance between the restaurants and the dashers
+        (see min_cost_matching), instead of giving every order in turn the closest dasher left.
+        Every order is only matched with its candidates_per_order closest dashers. When that is not enough to match
+        an order, it gets the closest dasher left after the matching, like assign_order would.
+        Returns the deliveries in the order of the orders, the orders left without a dasher stay PENDING.
+        """
+        import numpy as np
+        for order in orders:
+            if not order:
+                raise InvalidOrderException("Order can not be null")
+            if order.status != OrderStatus.PENDING:
+                raise InvalidOrderException("Order status either Assigned or Delivered")
+        if not orders:
+            return []
+
+        if self.dasher_registry is not None:
+            self.dasher_registry.refresh()
+        if self.dasher_index is not None:
+            dashers = None
+            candidate_dashers = [self.dasher_index.k_nearest(order.order_location, candidates_per_order) for order in orders]
+        else:
+            dashers = self._available_dashers()
+            candidate_dashers = self._nearest_candidates(orders, dashers, candidates_per_order)
+        if not any(candidate_dashers):
+            raise NoDashersAvailableException("No Dasher is available at this time.")
+
+        # the matching works on indexes of the dashers that are a candidate of at least one order
+        dasher_indexes = {}
+        candidates = []
+        for order, order_dashers in zip(orders, candidate_dashers):
+            if not order_dashers:
+                candidates.append([])
+                continue
+            latitudes = np.array([dasher.location.latitude for dasher in order_dashers])
+            longitudes = np.array([dasher.location.longitude for dasher in order_dashers])
+            distances = self.distance_service.calculate_distances(order.order_location, latitudes, longitudes)
+            candidates.append([
+                (dasher_indexes.setdefault(dasher.dasher_id, (len(dasher_indexes), dasher))[0], distance)
+                for dasher, distance in zip(order_dashers, distances.tolist())
+            ])
+        matched_dashers = [dasher for _, dasher in dasher_indexes.values()]
+        matching = min_cost_matching(candidates, len(matched_dashers))
+
+        # the matched pairs are created first, so the fallbacks below can not take a dasher matched to a later order
+        deliveries = [None] * len(orders)
+        for position, (order, dasher_idx) in enumerate(zip(orders, matching)):
+            if dasher_idx >= 0:
+                deliveries[position] = self._create_delivery(order, matched_dashers[dasher_idx])
+        for position, (order, dasher_idx) in enumerate(zip(orders, matching)):
+            if dasher_idx >= 0:
+                continue
+            # the candidates of this order were all taken, the closest dasher left is used
+            if self.dasher_index is not None:
+                dasher = self.dasher_index.nearest(order.order_location)
+            else:
+                dasher = self.find_best_dasher([dasher for dasher in dashers if dasher.is_available], order.order_location)
+            if dasher is not None:
+                deliveries[position] = self._create_delivery(order, dasher)
+        deliveries = [delivery for delivery in deliveries if delivery is not None]
+        print(f"Batch assignment: {len(deliveries)} of {len(orders)} orders assigned")
+        return deliveries
+
+    def _nearest_candidates(self, orders: list[Order], dashers: list[Dasher], k: int) -> list[list[Dasher]]:
+        import numpy as np
+        if not dashers:
+            return [[] for _ in orders]
+        latitudes = np.fromiter((dasher.location.latitude for dasher in dashers), dtype=np.float64, count=len(dashers))
+        longitudes = np.fromiter((dasher.location.longitude for dasher in dashers), dtype=np.float64, count=len(dashers))
+        candidates = []
+        for order in orders:
+            distances = self.distance_service.calculate_distances(order.order_location, latitudes, longitudes)
+            distances[np.isnan(distances)] = np.inf
+            if k < len(dashers):
+                nearest = np.argpartition(distances, k)[:k]
+            else:
+                nearest = np.arange(len(dashers))
+            nearest = nearest[np.isfinite(distances[nearest])]
+            candidates.append([dashers[idx] for idx in nearest.tolist()])
+        return candidates
+
     def find_best_dasher(self, dashers: list[Dasher], target_location: Location):
-        min_distance = float('inf')
-        best_dasher = None
-        for dasher in dashers:
-            distance = self.distance_service.calculate_distance(dasher.location, target_location)
-            if distance < min_distance:
-                min_distance = distance
-                best_dasher = dasher
-        return best_dasher
-
-def test_assign_order_success():
-    # mocking classes
-    class MockDasherRepo(DasherRepository):
-        def get_available_dashers(self):
-            return [
-                Dasher("d_001", Location(43.65, -79.38), True),
-                Dasher("d_002", Location(43.70, -79.40), True),
-            ]
-        def save(self, dasher: Dasher):
-            assert dasher.dasher_id == "d_001"
-            assert dasher.is_available == False
-    
-    class MockOrderRepo(OrderRepository):
-        def save(self, order: Order):
-            assert order.status == OrderStatus.ASSIGNED
-    
-    class MockDistanceService(DistanceService):
-        def calculate_distance(self, loc1, loc2):
-            # Fake the logic to control the test
-            if loc1.latitude == 50.0: return 100.0 # d_far
-            if loc1.latitude == 10.1: return 10.0  # d_close
-            return 0.0
+        import numpy as np
+        if not dashers:
+            return None
+        latitudes = np.fromiter((dasher.location.latitude for dasher in dashers), dtype=np.float64, count=len(dashers))
+        longitudes = np.fromiter((dasher.location.longitude for dasher in dashers), dtype=np.float64, count=len(dashers))
+        distances = self.distance_service.calculate_distances(target_location, latitudes, longitudes)
+        # argmin takes the first of equal distances like the loop did, a NaN distance is never the best
+        distances[np.isnan(distances)] = np.inf
+        best = int(np.argmin(distances))
+        if distances[best] == np.inf:
+            return None
+        return dashers[best]
 
+"""
+Concurrent assignment:
+assign_order reads the available dashers, picks one and only then makes it unavailable, so two threads can pick the
+same dasher. ConcurrentDeliveryAssignmentService reserves the dasher first with a compare-and-set on a reservation
+token: dict.setdefault is atomic, so only one call can store its token for a dasher_id, the others lose the race
+and try their next nearest candidate. The shared index / registry are only touched under a short lock, the slow part
+(saving the order and the dasher) runs outside of it, so the assigners scale across threads.
+A reserved dasher stays reserved until it is free again: with a dasher_registry, the reservation of an assigned dasher
+is released when the registry makes it available again (FREED / ONLINE in the feed, or a resync). Without one, the
+service never learns that a delivery is done, the caller has to call release_dasher when the dasher is free again
+(and put it back in its dasher_index), else the dasher is never offered again.
+The reservations of assignments still in progress are never released this way. When saving the order or the dasher
+fails, the assignment is rolled back in memory (order PENDING, dasher available and back in the index / registry,
+reservation released) before the error is raised, a write that went through is overwritten by the next assignment.
+"""
 
-    deliveryAssignmentService = DeliveryAssignmentService(MockOrderRepo(), MockDasherRepo(), MockDistanceService())
+class DasherReservations:
+    def __init__(self):
+        self.tokens = {}
+        self.lost_races = itertools.count()
 
-    order_to_assign = Order(
-        "o_123", 
-        Location(10.0, 10.0), # Restaurant Location
-        Location(12.0, 12.0), # Customer Location
-        OrderStatus.PENDING
-    )
+    def try_reserve(self, key, token) -> bool:
+        if self.tokens.setdefault(key, token) is token:
+            return True
+        next(self.lost_races)
+        return False
 
-    delivery = deliveryAssignmentService.assign_order(order_to_assign)
+    def release(self, key, token=None):
+        # with a token, only the reservation made with it is released
+        if token is None or self.tokens.get(key) is token:
+            self.tokens.pop(key, None)
 
-    assert delivery.dasher_id == "d_001"
-    assert delivery.delivery_id == "del_o_123"
+    def __contains__(self, key):
+        return key in self.tokens
+
+class ConcurrentDeliveryAssignmentService(DeliveryAssignmentService):
+    def __init__(self, *args, candidates_per_attempt: int = 8, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.candidates_per_attempt = candidates_per_attempt
+        self.reservations = DasherReservations()
+        self.order_reservations = DasherReservations()
+        self.state_lock = threading.Lock()
+        # dashers reserved and marked assigned, their reservation is released when they are available again
+        self.assigned = set()
+        if self.dasher_registry is not None:
+            self.dasher_registry.availability_listeners.append(self._dasher_available)
+
+    def assign_order(self, order: Order) -> Delivery:
+        if not order:
+            raise InvalidOrderException("Order can not be null")
+        token = object()
+        if not self.order_reservations.try_reserve(order.order_id, token):
+            raise InvalidOrderException("Order is already being assigned")
+        try:
+            if order.status != OrderStatus.PENDING:
+                raise InvalidOrderException("Order status either Assigned or Delivered")
+            while True:
+                candidates = self._candidates(order.order_location)
+                if not candidates:
+                    break
+                for dasher in candidates:
+                    if self.reservations.try_reserve(dasher.dasher_id, token):
+                        try:
+                            return self._create_delivery(order, dasher)
+                        except Exception:
+                            self.reservations.release(dasher.dasher_id, token)
+                            raise
+                # every candidate was reserved by another call since the query, their winners remove them from
+                # the index right after, the thread lets them run before querying again
+                time.sleep(0)
+        except Exception:
+            self.order_reservations.release(order.order_id, token)
+            raise
+        self.order_reservations.release(order.order_id, token)
+        raise NoDashersAvailableException("No Dasher is available at this time.")
 
+    def _candidates(self, target_location: Location) -> list[Dasher]:
+        import numpy as np
+        # the nearest dashers that are not reserved yet, nearest first
+        k = self.candidates_per_attempt
+        if self.dasher_index is not None:
+            # the reserved dashers are still in the index until their winners remove them, the search is widened
+            # until it finds a free dasher or runs out of dashers
+            search_k = k
+            while True:
+                with self.state_lock:
+                    if self.dasher_registry is not None:
+                        self.dasher_registry.refresh()
+                    dashers = self.dasher_index.k_nearest(target_location, search_k)
+                free = [dasher for dasher in dashers if dasher.dasher_id not in self.reservations]
+                if free or len(dashers) < search_k:
+                    return free[:k]
+                search_k *= 2
 
-def test_assign_dasher_not_found():
-    # mocking classes
-    class MockDasherRepo(DasherRepository):
-        def get_available_dashers(self):
+        if self.dasher_registry is not None:
+            with self.state_lock:
+                self.dasher_registry.refresh()
+                dashers = self.dasher_registry.available_dashers()
+        else:
+            dashers = self.dasher_repository.get_available_dashers()
+        dashers = [dasher for dasher in dashers if dasher.dasher_id not in self.reservations]
+        if not dashers:
             return []
-        def save(self, dasher: Dasher):
-            assert dasher.dasher_id == "d_001"
-            assert dasher.is_available == False
-    
-    class MockOrderRepo(OrderRepository):
-        def save(self, order: Order):
-            assert order.status == OrderStatus.ASSIGNED
-    
-    class MockDistanceService(DistanceService):
-        def calculate_distance(self, loc1, loc2):
-            # Fake the logic to control the test
-            if loc1.latitude == 50.0: return 100.0 # d_far
-            if loc1.latitude == 10.1: return 10.0  # d_close
-            return 0.0
-
-    deliveryAssignmentService = DeliveryAssignmentService(MockOrderRepo(), MockDasherRepo(), MockDistanceService())
-
-    order_to_assign = Order(
-        "o_123", 
-        Location(10.0, 10.0), # Restaurant Location
-        Location(12.0, 12.0), # Customer Location
-        OrderStatus.PENDING
-    )
+        latitudes = np.fromiter((dasher.location.latitude for dasher in dashers), dtype=np.float64, count=len(dashers))
+        longitudes = np.fromiter((dasher.location.longitude for dasher in dashers), dtype=np.float64, count=len(dashers))
+        distances = self.distance_service.calculate_distances(target_location, latitudes, longitudes)
+        distances[np.isnan(distances)] = np.inf
+        nearest = np.argsort(distances, kind="stable")[:k]
+        return [dashers[idx] for idx in nearest.tolist() if distances[idx] != np.inf]
+
+    def _create_delivery(self, order: Order, dasher: Dasher) -> Delivery:
+        try:
+            return super()._create_delivery(order, dasher)
+        except Exception:
+            self._unmark_assigned(order, dasher)
+            raise
+
+    def _mark_assigned(self, order: Order, dasher: Dasher):
+        with self.state_lock:
+            super()._mark_assigned(order, dasher)
+            self.assigned.add(dasher.dasher_id)
+
+    def _unmark_assigned(self, order: Order, dasher: Dasher):
+        # the caller still holds the reservation, and releases it after
+        with self.state_lock:
+            order.status = OrderStatus.PENDING
+            self.assigned.discard(dasher.dasher_id)
+            if self.dasher_registry is not None:
+                self.dasher_registry.mark_available(dasher.dasher_id)
+            else:
+                dasher.is_available = True
+                if self.dasher_index is not None:
+                    self.dasher_index.insert(dasher)
 
-    try: 
-        delivery = deliveryAssignmentService.assign_order(order_to_assign)
-    except NoDashersAvailableException:
-        print("Dasher Not Available Exception")
+    def _dasher_available(self, dasher: Dasher):
+        # called by the registry under state_lock
+        if dasher.dasher_id in self.assigned:
+            self.assigned.discard(dasher.dasher_id)
+            self.reservations.release(dasher.dasher_id)
 
-test_assign_order_success()
-test_assign_dasher_not_found()
\ No newline at end of file
+    def release_dasher(self, dasher_id: str):
+        with self.state_lock:
+            self.assigned.discard(dasher_id)
+        self.reservations.release(dasher_id)
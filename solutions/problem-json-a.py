@@ -29,6 +29,12 @@ import json
 from enum import Enum
 from collections import defaultdict
 
+# imported as part of the solutions package, or run as a script from solutions/
+if __package__:
+    from .money import dollar_amounts
+else:
+    from money import dollar_amounts
+
 input = [
   {"event_id": "e-1", "type": "CHARGE", "order_id": "order-100", "amount": "$50.00"},
   {"event_id": "e-2", "type": "AUTH", "dasher_id": "d-123"},
@@ -42,17 +48,21 @@ class orderType(Enum):
     AUTH = "AUTH"
     REFUND = "REFUND"
 
-def calculate_orders_net_total(transactions_json: str) -> dict:
+def calculate_orders_net_total(transactions_json: str, deduplicator=None) -> dict:
     try:
         transactions = json.loads(transactions_json)
     except json.JSONDecodeError:
         print("Invalid JSON file input")
         return {}
 
-    # converting to defaultdict so all keys already have default values as 0.0
-    orders_net_total = defaultdict(float)
+    # converting to defaultdict so all keys already have default values as 0
+    # totals are summed in integer cents, so they do not drift like float sums
+    orders_net_total = defaultdict(int)
     
     for item in transactions:
+        # events are delivered at least once, a redelivered event is skipped
+        if deduplicator is not None and deduplicator.seen(item):
+            continue
         item_type = item.get("type")
         order_id = item.get("order_id")
 
@@ -62,59 +72,14 @@ def calculate_orders_net_total(transactions_json: str) -> dict:
         # If the amount is not in the same pattern, the logic can fail, so good to throw exception
         try:
             amount = item.get("amount", 0)
-            # removing the $ sign from the number
-            item_amount = float(amount.lstrip("$"))
+            # removing the $ sign from the number, amounts already given as JSON numbers are taken as they are
+            item_cents = dollar_amounts.cents(amount)
         except (ValueError, TypeError):
             continue
         
         if item_type == orderType.CHARGE.value:
-            orders_net_total[order_id] += item_amount
+            orders_net_total[order_id] += item_cents
         if item_type == orderType.REFUND.value:
-            orders_net_total[order_id] -= item_amount
-    #converting defaultDict to normal dictionary
-    return dict(orders_net_total)
-
-def calculate_orders_net_total_test_no_input():
-    input = """[]"""
-    assert calculate_orders_net_total(input) == {}
-
-def calculate_orders_net_total_test_success():
-    input = """[
-        {"event_id": "e-1", "type": "CHARGE", "order_id": "order-100", "amount": "$50.00"},
-        {"event_id": "e-2", "type": "AUTH", "dasher_id": "d-123"},
-        {"event_id": "e-3", "type": "CHARGE", "order_id": "order-200", "amount": "$25.50"},
-        {"event_id": "e-4", "type": "REFUND", "order_id": "order-100", "amount": "$10.50"},
-        {"event_id": "e-5", "type": "CHARGE", "order_id": "order-100", "amount": "$5.00"}
-    ]"""
-    assert calculate_orders_net_total(input) == {'order-100': 44.5, 'order-200': 25.5}
-
-def calculate_orders_net_total_test_negative_total():
-    input = """[
-        {"event_id": "e-1", "type": "CHARGE", "order_id": "order-100", "amount": "$50.00"},
-        {"event_id": "e-2", "type": "AUTH", "dasher_id": "d-123"},
-        {"event_id": "e-3", "type": "CHARGE", "order_id": "order-200", "amount": "$25.50"},
-        {"event_id": "e-4", "type": "REFUND", "order_id": "order-100", "amount": "$60.50"},
-        {"event_id": "e-5", "type": "CHARGE", "order_id": "order-100", "amount": "$5.00"}
-    ]"""
-    assert calculate_orders_net_total(input) == {'order-100': -5.5, 'order-200': 25.5}
-
-def calculate_orders_net_total_test_invalid_json():
-    input = "hey"
-    assert calculate_orders_net_total(input) == {}
-
-def calculate_orders_net_total_test_invalid_amount():
-    input = """[
-        {"event_id": "e-1", "type": "CHARGE", "order_id": "order-100", "amount": "$$%!50.00"},
-        {"event_id": "e-2", "type": "AUTH", "dasher_id": "d-123"},
-        {"event_id": "e-4", "type": "REFUND", "order_id": "order-100", "amount": "$60.50"},
-        {"event_id": "e-5", "type": "CHARGE", "order_id": "order-100", "amount": "$5.00"}
-    ]"""
-
-    assert calculate_orders_net_total(input) == {"order-100": -55.5}
-
-calculate_orders_net_total_test_no_input()
-calculate_orders_net_total_test_success()
-calculate_orders_net_total_test_negative_total()
-calculate_orders_net_total_test_invalid_json()
-calculate_orders_net_total_test_invalid_amount()
-print("test complete")
+            orders_net_total[order_id] -= item_cents
+    #converting defaultDict to normal dictionary, back in dollars
+    return {order_id: cents / 100 for order_id, cents in orders_net_total.items()}
@@ -0,0 +1,184 @@
+"""
+Incremental views over the reconciled order profits.
+
+Finance asks for the K least (or most) profitable orders and for the orders clamped to 0 by
+max(round(raw_revenue, 2), 0.0). Sorting the whole result at the end does not scale to millions of orders and can not
+be asked mid-stream, so ProfitViews is updated with the running revenue of an order every time an event changes it.
+
+RankTracker keeps a bounded heap of candidates (K plus some slack) with lazy deletion, an update is O(log K).
+Values of the orders outside of the heap are only known by an upper bound (the largest value an order had when it
+was left outside). As long as the K-th candidate is above that bound the answer is exact, else the query rebuilds the candidates from all the running revenues (O(n log K), only at query time).
+
+ThresholdWatcher counts the orders that are below a threshold right now and appends every crossing of the threshold
+(order_id, down or up) to a spill file, so the ids do not stay in memory. The ids below the threshold are read back
+from the spill file when asked.
+"""
+
+import heapq
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+class RankTracker:
+    def __init__(self, k: int, largest: bool = True, slack: int = None):
+        self.k = k
+        self.capacity = k + (slack if slack is not None else max(16, k))
+        self.sign = 1 if largest else -1
+        # order_id -> signed value of the candidates, the heap holds (signed value, order_id), stale entries included
+        self.members = {}
+        self.heap = []
+        self.outside_bound = float("-inf")
+        self.rebuilds = 0
+
+    def _peek_min(self):
+        heap = self.heap
+        while heap and self.members.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def update(self, order_id, value: float):
+        key = self.sign * value
+        members = self.members
+        if order_id in members:
+            members[order_id] = key
+            heapq.heappush(self.heap, (key, order_id))
+        else:
+            if len(members) >= self.capacity:
+                smallest = self._peek_min()
+                if key <= smallest[0]:
+                    self.outside_bound = max(self.outside_bound, key)
+                    return
+                heapq.heappop(self.heap)
+                del members[smallest[1]]
+                self.outside_bound = max(self.outside_bound, smallest[0])
+            members[order_id] = key
+            heapq.heappush(self.heap, (key, order_id))
+
+        if len(self.heap) > 4 * self.capacity:
+            # too many stale entries, rebuilding the heap from the live candidates
+            self.heap = [(key, member_id) for member_id, key in members.items()]
+            heapq.heapify(self.heap)
+
+    def rebuild(self, orders_with_revenues: dict):
+        best = heapq.nlargest(self.capacity + 1, ((self.sign * value, order_id) for order_id, value in orders_with_revenues.items()),
+                              key=lambda entry: entry[0])
+        self.members = {order_id: key for key, order_id in best[:self.capacity]}
+        self.heap = [(key, order_id) for order_id, key in self.members.items()]
+        heapq.heapify(self.heap)
+        self.outside_bound = best[self.capacity][0] if len(best) > self.capacity else float("-inf")
+        self.rebuilds += 1
+
+    def query(self, orders_with_revenues: dict, k: int = None) -> list:
+        """
+        Returns [(order_id, raw revenue)] of the k largest (or smallest) orders, best first.
+        orders_with_revenues is only read when the candidates are not known to be exact.
+        """
+        k = min(k or self.k, self.k)
+        ranked = sorted(self.members.items(), key=lambda item: item[1], reverse=True)
+        # a candidate that dropped below the bound may have been passed by an order outside of the heap
+        if (len(ranked) >= k and ranked[k - 1][1] < self.outside_bound) or \
+                (len(ranked) < k and self.outside_bound > float("-inf")):
+            self.rebuild(orders_with_revenues)
+            ranked = sorted(self.members.items(), key=lambda item: item[1], reverse=True)
+        return [(order_id, self.sign * key) for order_id, key in ranked[:k]]
+
+class ThresholdWatcher:
+    def __init__(self, threshold: float, spill_path: str):
+        self.threshold = threshold
+        self.spill_path = spill_path
+        self.spill_file = open(spill_path, "w")
+        self.below = 0
+        self.crossings = 0
+
+    def update(self, order_id, old_value, new_value: float):
+        # old_value is None for an order seen for the first time
+        was_below = old_value is not None and round(old_value, 2) < self.threshold
+        is_below = round(new_value, 2) < self.threshold
+        if was_below == is_below:
+            return
+        self.below += 1 if is_below else -1
+        self.crossings += 1
+        self.spill_file.write(("-" if is_below else "+") + json.dumps(order_id) + "\n")
+
+    def ids_below(self) -> list:
+        # replays the crossings, the orders that went down last are the ones below now
+        self.spill_file.flush()
+        below = {}
+        with open(self.spill_path) as spill_file:
+            for line in spill_file:
+                order_id = json.loads(line[1:])
+                if line[0] == "-":
+                    below[order_id] = True
+                else:
+                    below.pop(order_id, None)
+        return list(below)
+
+    def close(self):
+        self.spill_file.close()
+
+class ProfitViews:
+    def __init__(self, k: int = 1000, thresholds=(0.0, ), spill_dir: str = None):
+        self.top = RankTracker(k, largest=True)
+        self.bottom = RankTracker(k, largest=False)
+        self.tmp_dir = tempfile.TemporaryDirectory(dir=spill_dir)
+        self.watchers = {
+            threshold: ThresholdWatcher(threshold, os.path.join(self.tmp_dir.name, f"below-{idx}.spill"))
+            for idx, threshold in enumerate(thresholds)
+        }
+        self.orders_with_revenues = None
+
+    def update(self, orders_with_revenues: dict, order_id, old_value, new_value: float):
+        self.orders_with_revenues = orders_with_revenues
+        self.top.update(order_id, new_value)
+        self.bottom.update(order_id, new_value)
+        for watcher in self.watchers.values():
+            watcher.update(order_id, old_value, new_value)
+
+    def most_profitable(self, k: int = None) -> list:
+        return self.top.query(self.orders_with_revenues or {}, k)
+
+    def least_profitable(self, k: int = None) -> list:
+        return self.bottom.query(self.orders_with_revenues or {}, k)
+
+    def count_below(self, threshold: float = 0.0) -> int:
+        return self.watchers[threshold].below
+
+    def ids_below(self, threshold: float = 0.0) -> list:
+        # with the default threshold, the orders that max(round(raw_revenue, 2), 0.0) clamps to 0
+        return self.watchers[threshold].ids_below()
+
+    def close(self):
+        for watcher in self.watchers.values():
+            watcher.close()
+        self.tmp_dir.cleanup()
+
+def profit_views_benchmark(n_events: int = 1000000, n_orders: int = 200000, k: int = 1000):
+    rng = random.Random(1)
+    revenues = {}
+    views = ProfitViews(k=k)
+    start = time.perf_counter()
+    for _ in range(n_events):
+        order_id = rng.randrange(n_orders)
+        old_value = revenues.get(order_id)
+        revenues[order_id] = (old_value or 0.0) + rng.uniform(-10, 12)
+        views.update(revenues, order_id, old_value, revenues[order_id])
+    update_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    views.least_profitable()
+    views.most_profitable()
+    query_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sorted(revenues.items(), key=lambda item: item[1])
+    sort_time = time.perf_counter() - start
+    print(f"{n_events} updates over {n_orders} orders, k={k}: {update_time * 1e9 / n_events:.0f} ns/update, "
+          f"queries {query_time * 1000:.1f} ms (rebuilds {views.top.rebuilds + views.bottom.rebuilds}), "
+          f"full sort {sort_time * 1000:.1f} ms, {views.count_below()} orders below 0")
+    views.close()
+
+if __name__ == "__main__" and "--bench" in sys.argv:
+    profit_views_benchmark()
@@ -0,0 +1,209 @@
+"""
+Single pass event engine for the transaction logs.
+
+calculate_orders_net_total (problem-json-a) and reconcile_transactions (problem-full-5) are two folds over the same
+kind of event log, each with its own parse and its own if/elif chain on "type". Finance needs both views, so the log
+was parsed and scanned twice. TransactionEventEngine parses the log once and dispatches every event, by its type,
+to the handlers of all the registered aggregations.
+
+An Aggregation is a name, a table of event type -> (amount parser, sign) and a finish step for the final values.
+Amount parsers take the event and return the amount, or None to skip the event.
+The built in aggregations keep the results of the original functions:
+    net_total_aggregation()  -> calculate_orders_net_total ("$50.00" string amounts summed in cents, CHARGE/REFUND)
+    net_profit_aggregation() -> reconcile_transactions (CHARGE/DASHER_PAY/REFUND/ADJUSTMENT, rounded, clamped at 0)
+The benchmark of the engine against the two functions back to back is in benchmarks/transaction_logs.py.
+"""
+
+import json
+import sys
+import time
+from collections import defaultdict
+
+# imported as part of the solutions package, or run as a script from solutions/
+if __package__:
+    from .money import dollar_amounts
+else:
+    from money import dollar_amounts
+
+"""
+ADJUSTMENT payloads:
+The ADJUSTMENT events carry their amount in a double encoded JSON string payload.
+Decoding the payload with json.loads only to read "amount" is the most expensive part of the loop.
+Payloads are built from a few templates, so AdjustmentAmountExtractor keeps the amounts cached by payload string.
+On a cache miss, an object payload goes straight to the C scanner of the json module, which skips the
+python level work json.loads does around it. Anything unusual (leading whitespace, not an object, errors)
+goes through json.loads like before, so the values and the errors stay the same.
+A regex extractor that avoids building the dict was tried, it is slower than the C scanner on these small payloads.
+"""
+
+class AdjustmentAmountExtractor:
+    def __init__(self, max_cache_size: int = 1 << 16):
+        self.max_cache_size = max_cache_size
+        self.scan_once = json.JSONDecoder().scan_once
+        self.cache = {}
+        self.cache_hits = 0
+        self.fast_path = 0
+        self.fallbacks = 0
+
+    def amount(self, payload_json):
+        """
+        Returns the same value as json.loads(payload_json).get("amount", 0),
+        raises json.JSONDecodeError for an invalid payload.
+        """
+        if not isinstance(payload_json, str):
+            return json.loads(payload_json).get("amount", 0)
+
+        amount = self.cache.get(payload_json, self)
+        if amount is not self:
+            self.cache_hits += 1
+            return amount
+
+        payload = None
+        if payload_json.startswith("{"):
+            try:
+                payload, end = self.scan_once(payload_json, 0)
+                if end != len(payload_json) and payload_json[end:].strip(" \t\n\r"):
+                    payload = None
+            except StopIteration:
+                payload = None
+
+        if payload is None:
+            self.fallbacks += 1
+            amount = json.loads(payload_json).get("amount", 0)
+        else:
+            self.fast_path += 1
+            amount = payload.get("amount", 0)
+
+        if len(self.cache) >= self.max_cache_size:
+            self.cache.clear()
+        self.cache[payload_json] = amount
+        return amount
+
+
+adjustment_amounts = AdjustmentAmountExtractor()
+
+def numeric_amount(tr):
+    return tr.get("amount", 0)
+
+def dollar_string_amount(tr):
+    # "$50.00" -> 5000 cents, the invalid amounts skip the event
+    try:
+        return dollar_amounts.cents(tr.get("amount", 0))
+    except (ValueError, TypeError):
+        return None
+
+def payload_amount(tr):
+    try:
+        return adjustment_amounts.amount(tr.get("payload"))
+    except json.JSONDecodeError as e:
+        print("Invalid Adjustment type Payload", e)
+        return None
+
+def order_id_present(order_id) -> bool:
+    return order_id is not None
+
+class Aggregation:
+    def __init__(self, name: str, accept_order_id=order_id_present, finish=dict):
+        self.name = name
+        self.accept_order_id = accept_order_id
+        self.finish = finish
+        self.handlers = {}
+
+    def on(self, tr_type: str, parse_amount, sign: int = 1):
+        self.handlers[tr_type] = (parse_amount, sign)
+        return self
+
+def round_and_clamp(orders_with_revenues) -> dict:
+    return {ord_id: max(round(raw_revenue, 2), 0.0) for ord_id, raw_revenue in orders_with_revenues.items()}
+
+def cents_to_dollars(orders_net_total) -> dict:
+    return {ord_id: cents / 100 for ord_id, cents in orders_net_total.items()}
+
+def net_total_aggregation(name: str = "net_total") -> Aggregation:
+    # an empty order_id is skipped like a missing one, the totals are summed in cents
+    return Aggregation(name, accept_order_id=bool, finish=cents_to_dollars) \
+        .on("CHARGE", dollar_string_amount) \
+        .on("REFUND", dollar_string_amount, -1)
+
+def net_profit_aggregation(name: str = "net_profit") -> Aggregation:
+    return Aggregation(name, finish=round_and_clamp) \
+        .on("CHARGE", numeric_amount) \
+        .on("DASHER_PAY", numeric_amount, -1) \
+        .on("REFUND", numeric_amount, -1) \
+        .on("ADJUSTMENT", payload_amount)
+
+class TransactionEventEngine:
+    def __init__(self, aggregations: list = None):
+        self.aggregations = {}
+        # event type -> handlers of every aggregation interested in that type
+        self.dispatch = defaultdict(list)
+        for aggregation in aggregations or []:
+            self.register(aggregation)
+
+    def register(self, aggregation: Aggregation):
+        if aggregation.name in self.aggregations:
+            raise ValueError(f"Aggregation {aggregation.name} is already registered")
+        self.aggregations[aggregation.name] = aggregation
+        for tr_type, (parse_amount, sign) in aggregation.handlers.items():
+            self.dispatch[tr_type].append((aggregation.name, aggregation.accept_order_id, parse_amount, sign))
+
+    def run(self, transactions, deduplicator=None) -> dict:
+        """
+        One pass over an iterable of events, returns {aggregation name: result}.
+        """
+        states = {name: defaultdict(float) for name in self.aggregations}
+        dispatch = self.dispatch
+        for tr in transactions:
+            if not isinstance(tr, dict):
+                continue
+            handlers = dispatch.get(tr.get("type"))
+            if handlers is None:
+                continue
+            if deduplicator is not None and deduplicator.seen(tr):
+                continue
+
+            order_id = tr.get("order_id")
+            for name, accept_order_id, parse_amount, sign in handlers:
+                if not accept_order_id(order_id):
+                    continue
+                amount = parse_amount(tr)
+                if amount is None:
+                    continue
+                # subtracting keeps the float results the same as the original functions
+                if sign > 0:
+                    states[name][order_id] += amount
+                else:
+                    states[name][order_id] -= amount
+
+        return {name: aggregation.finish(states[name]) for name, aggregation in self.aggregations.items()}
+
+    def run_json(self, transactions_json: str, deduplicator=None) -> dict:
+        try:
+            transactions = json.loads(transactions_json)
+        except json.JSONDecodeError as e:
+            print("Invalid JSON Input", e)
+            return {name: {} for name in self.aggregations}
+        return self.run(transactions, deduplicator)
+
+def adjustment_amount_benchmark(n_events: int = 200000):
+    reasons = ["Customer complaint", "Missing item", "Late delivery", "Cold food", "Wrong order"]
+    templated = [json.dumps({"reason": reasons[i % 5], "amount": -(i % 10) - 0.5}) for i in range(n_events)]
+    unique = [json.dumps({"reason": f"ticket {i}", "amount": -(i % 1000) / 100}) for i in range(n_events)]
+
+    for name, payloads in (("templated", templated), ("all distinct", unique)):
+        start = time.perf_counter()
+        for payload in payloads:
+            json.loads(payload).get("amount", 0)
+        loads_time = time.perf_counter() - start
+
+        extractor = AdjustmentAmountExtractor()
+        start = time.perf_counter()
+        for payload in payloads:
+            extractor.amount(payload)
+        extract_time = time.perf_counter() - start
+        print(f"{name:<13} json.loads {loads_time * 1e9 / n_events:7.0f} ns/event, "
+              f"extractor {extract_time * 1e9 / n_events:7.0f} ns/event, "
+              f"cache hits {extractor.cache_hits}, fast path {extractor.fast_path}, fallbacks {extractor.fallbacks}")
+
+if __name__ == "__main__" and "--bench" in sys.argv:
+    adjustment_amount_benchmark()
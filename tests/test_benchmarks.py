@@ -0,0 +1,51 @@
+import json
+
+from benchmarks.suite import SCENARIOS, compare, main, percentile, run_scenario
+
+def result(scenario="process_order", size=100, p50=0.001, peak=1000000):
+    return {"scenario": scenario, "size": size, "p50_seconds": p50, "peak_memory_bytes": peak}
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([7], 90) == 7
+    assert percentile([], 50) == 0.0
+
+def test_every_scenario_runs():
+    for scenario in SCENARIOS.values():
+        run = run_scenario(scenario, 100, min_seconds=0, min_calls=2)
+        assert run["calls"] == 2
+        assert run["size"] == 100
+        assert run["p50_seconds"] <= run["p90_seconds"] <= run["p99_seconds"]
+        assert run["throughput_per_second"] > 0
+        assert run["peak_memory_bytes"] >= 0
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = {"results": [result(), result(size=1000)]}
+    current = {"results": [result(p50=0.00119), result(size=1000, p50=0.0013, peak=1500000)]}
+    regressions = compare(current, baseline, threshold=0.2)
+    assert [(r["size"], r["metric"]) for r in regressions] == [(1000, "p50_seconds"), (1000, "peak_memory_bytes")]
+    assert round(regressions[0]["change"], 2) == 0.3
+
+def test_compare_skips_missing_results_and_small_memory():
+    baseline = {"results": [result(peak=1000)]}
+    current = {"results": [result(peak=5000), result(scenario="filter_menu", p50=1.0)]}
+    assert compare(current, baseline) == []
+
+def test_main_writes_results_and_fails_on_regression(tmp_path, capsys):
+    output = tmp_path / "results.json"
+    assert main(["--sizes", "100", "--scenarios", "process_order", "--min-seconds", "0", "--output", str(output)]) == 0
+    results = json.loads(output.read_text())
+    assert [(r["scenario"], r["size"]) for r in results["results"]] == [("process_order", 100)]
+
+    baseline = tmp_path / "baseline.json"
+    results["results"][0]["p50_seconds"] /= 100
+    baseline.write_text(json.dumps(results))
+    assert main(["--sizes", "100", "--scenarios", "process_order", "--min-seconds", "0", "--output", "",
+                 "--baseline", str(baseline)]) == 1
+    assert "REGRESSION process_order n=100 p50_seconds" in capsys.readouterr().out
+
+def test_main_rejects_unknown_scenarios(capsys):
+    assert main(["--scenarios", "missing", "--output", ""]) == 2
+    assert "Unknown scenarios missing" in capsys.readouterr().out
@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+
+from benchmarks.datasets import build_transaction_log
+from solutions.binary_transaction_log import (
+    BinaryTransactionLog, calculate_orders_net_total_binary, convert_json_log, reconcile_transactions_binary
+)
+from solutions.orders_net_total import calculate_orders_net_total as net_total
+from solutions.reconciliation import reconcile_transactions as reconcile
+
+def test_binary_transaction_log_matches_functions():
+    events = build_transaction_log(3000, 41)
+    events += [
+        {"event_id": "x-1", "type": "CHARGE", "order_id": 7, "amount": 12.25},
+        {"event_id": "x-2", "type": "CHARGE", "order_id": "", "amount": 3.50},
+        {"event_id": "x-3", "type": "REFUND", "order_id": "order-1", "amount": "$2.50"},
+        {"event_id": "x-4", "type": "CHARGE", "order_id": "order-2", "amount": "$$%!50.00"},
+        {"event_id": "x-5", "type": "ADJUSTMENT", "order_id": "order-3", "payload": "asfd"},
+        # sub-cent amounts: each one rounds to 0 cents, their float sum does not
+        {"event_id": "x-6", "type": "CHARGE", "order_id": "sub-cent", "amount": 0.004},
+        {"event_id": "x-7", "type": "CHARGE", "order_id": "sub-cent", "amount": 0.004},
+        {"event_id": "x-8", "type": "CHARGE", "order_id": "sub-cent", "amount": 0.004},
+        {"event_id": "x-9", "type": "ADJUSTMENT", "order_id": "sub-cent", "payload": '{"amount": 0.0049}'}
+    ]
+    # reconcile_transactions can not add the string amounts, it runs on the events with numeric amounts only
+    numeric_events = [tr for tr in events if not isinstance(tr.get("amount", 0), str)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, log_events in (("all", events), ("numeric", numeric_events)):
+            json_path = os.path.join(tmp_dir, f"{name}.json")
+            with open(json_path, "w") as json_file:
+                json.dump(log_events, json_file)
+            ndjson_path = os.path.join(tmp_dir, f"{name}.ndjson")
+            with open(ndjson_path, "w") as ndjson_file:
+                ndjson_file.write("\n".join(json.dumps(tr) for tr in log_events))
+            for path in (json_path, ndjson_path):
+                convert_json_log(path, path + ".bin")
+            # the array is streamed in chunks, it converts to the same file as the NDJSON
+            with open(json_path + ".bin", "rb") as array_bin, open(ndjson_path + ".bin", "rb") as ndjson_bin:
+                assert array_bin.read() == ndjson_bin.read()
+
+        log = BinaryTransactionLog(os.path.join(tmp_dir, "all.ndjson.bin"))
+        expected = net_total(json.dumps(events))
+        results = calculate_orders_net_total_binary(log)
+        # both sum in integer cents
+        assert results == expected
+        assert results[7] == 12.25 and "" not in results
+        log.close()
+
+        log = BinaryTransactionLog(os.path.join(tmp_dir, "numeric.json.bin"))
+        results = reconcile_transactions_binary(log)
+        # the float amounts are summed like the JSON function does, not the amounts rounded to the cent
+        assert results == reconcile(json.dumps(numeric_events))
+        assert results["sub-cent"] == 0.02 and log.cents[-4:].tolist() == [0, 0, 0, 0]
+        log.close()
+
+        with open(os.path.join(tmp_dir, "trailing.json"), "w") as json_file:
+            json_file.write('[{"type": "CHARGE", "order_id": "A", "amount": 1}] [')
+        try:
+            convert_json_log(json_file.name, json_file.name + ".bin")
+            assert False
+        except json.JSONDecodeError:
+            pass
@@ -0,0 +1,163 @@
+from solutions.dasher_bonus import calculate_bonus
+
+def test_calculate_bonus_success():
+    input = """
+        [
+            {
+                "delivery_id": "d-1", "is_return": false,
+                "timestamps": {
+                "dropoff_estimated": "2025-10-25T14:30:00Z",
+                "dropoff_actual": "2025-10-25T14:28:00Z"
+                },
+                "customer_feedback": {"rating": 5}
+            },
+            {
+                "delivery_id": "d-2", "is_return": false,
+                "timestamps": {
+                "dropoff_estimated": "2025-10-25T15:20:00Z",
+                "dropoff_actual": "2025-10-25T15:22:00Z"
+                },
+                "customer_feedback": {"rating": "4"}
+            },
+            {
+                "delivery_id": "d-3", "is_return": true,
+                "timestamps": {"...": "..."},
+                "customer_feedback": {"rating": 5}
+            },
+            {
+                "delivery_id": "d-4", "is_return": false,
+                "timestamps": {
+                "dropoff_estimated": "2025-10-25T17:20:00Z",
+                "dropoff_actual": "2025-10-25T17:19:00Z"
+                },
+                "customer_feedback": null
+            }
+        ]
+    """
+    dasher_bonus = calculate_bonus(input)
+    assert dasher_bonus == 4
+
+def test_calculate_bonus_fail():
+    input = """json invalid"""
+    dasher_bonus = calculate_bonus(input)
+    assert dasher_bonus == 0
+
+def test_calculate_bonus_no_delivery_id():
+    input = """
+        [
+            {
+                "is_return": false,
+                "timestamps": {
+                "dropoff_estimated": "2025-10-25T14:30:00Z",
+                "dropoff_actual": "2025-10-25T14:28:00Z"
+                },
+                "customer_feedback": {"rating": 5}
+            },
+            {
+                "delivery_id": "d-2", "is_return": false,
+                "timestamps": {
+                "dropoff_estimated": "2025-10-25T15:20:00Z",
+                "dropoff_actual": "2025-10-25T15:22:00Z"
+                },
+                "customer_feedback": {"rating": "4"}
+            }
+        ]
+    """
+    dasher_bonus = calculate_bonus(input)
+    assert dasher_bonus == 0
+
+def test_calculate_bonus_invalid_dropoff_estimated():
+    input = """
+        [
+            {
+                "delivery_id": "d-1", "is_return": false,
+                "timestamps": {
+                "dropoff_estimated": "",
+                "dropoff_actual": "2025-10-25T14:28:00Z"
+                },
+                "customer_feedback": {"rating": 5}
+            },
+            {
+                "delivery_id": "d-4", "is_return": false,
+                "timestamps": {
+                "dropoff_estimated": "2025-10-25T17:20:00Z",
+                "dropoff_actual": "2025-10-25T17:19:00Z"
+                },
+                "customer_feedback": null
+            }
+        ]
+    """
+    dasher_bonus = calculate_bonus(input)
+    assert dasher_bonus == 3
+
+def test_calculate_bonus_is_return():
+    input = """
+        [
+            {
+                "delivery_id": "d-1", "is_return": true,
+                "timestamps": {
+                "dropoff_estimated": "2025-10-25T14:30:00Z",
+                "dropoff_actual": "2025-10-25T14:28:00Z"
+                },
+                "customer_feedback": {"rating": 5}
+            },
+            {
+                "delivery_id": "d-4", "is_return": false,
+                "timestamps": {
+                "dropoff_estimated": "2025-10-25T17:20:00Z",
+                "dropoff_actual": "2025-10-25T17:19:00Z"
+                },
+                "customer_feedback": null
+            }
+        ]
+    """
+    dasher_bonus = calculate_bonus(input)
+    assert dasher_bonus == 1
+
+def test_calculate_bonus_rating_none():
+    input = """
+        [
+            {
+                "delivery_id": "d-1", "is_return": false,
+                "timestamps": {
+                "dropoff_estimated": "2025-10-25T14:30:00Z",
+                "dropoff_actual": "2025-10-25T14:28:00Z"
+                },
+                "customer_feedback": {"rating": null}
+            },
+            {
+                "delivery_id": "d-4", "is_return": false,
+                "timestamps": {
+                "dropoff_estimated": "2025-10-25T17:20:00Z",
+                "dropoff_actual": "2025-10-25T17:19:00Z"
+                },
+                "customer_feedback": null
+            }
+        ]
+    """
+    dasher_bonus = calculate_bonus(input)
+    assert dasher_bonus == 2
+
+def test_calculate_bonus_timezone_parsing_fail():
+    input = """
+        [
+            {
+                "delivery_id": "d-1", "is_return": false,
+                "timestamps": {
+                "dropoff_estimated": "",
+                "dropoff_actual": "2025-10-25T14:28:00Z"
+                },
+                "customer_feedback": {"rating": 5}
+            },
+            {
+                "delivery_id": "d-4", "is_return": false,
+                "timestamps": {
+                "dropoff_estimated": "2025-10-25T17:20:00Z",
+                "dropoff_actual": "2025-10-25T17:19:00Z"
+                },
+                "customer_feedback": null
+            }
+        ]
+    """
+    dasher_bonus = calculate_bonus(input)
+    assert dasher_bonus == 3
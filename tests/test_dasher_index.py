@@ -0,0 +1,59 @@
+import math
+import random
+
+from solutions.dasher_index import DasherGridIndex
+from solutions.delivery_assignment import DeliveryAssignmentService
+from solutions.delivery_distances import DistanceService
+from solutions.delivery_model import Dasher, DasherRepository, Location, OrderRepository
+
+def test_dasher_grid_index_matches_linear_scan():
+    rng = random.Random(5)
+    service = DeliveryAssignmentService(OrderRepository(), DasherRepository(), DistanceService())
+    dashers = [Dasher(f"d_{i}", Location(43.6 + rng.random() * 0.2, -79.5 + rng.random() * 0.2), True) for i in range(500)]
+    # two dashers at the same place, the first one wins like in the linear scan
+    dashers.append(Dasher("d_twin", Location(dashers[0].location.latitude, dashers[0].location.longitude), True))
+    index = DasherGridIndex.from_dashers(dashers, cell_size=0.013)
+
+    for step in range(300):
+        target = Location(43.55 + rng.random() * 0.3, -79.55 + rng.random() * 0.3)
+        available = [dasher for dasher in dashers if dasher.dasher_id in index]
+        assert index.nearest(target) is service.find_best_dasher(available, target)
+        expected = sorted(available, key=lambda dasher: math.dist((dasher.location.latitude, dasher.location.longitude), (target.latitude, target.longitude)))
+        assert index.k_nearest(target, 5) == expected[:5]
+
+        # dashers move, go offline and come back
+        dasher = rng.choice(dashers)
+        if dasher.dasher_id in index and step % 3 == 0:
+            index.remove(dasher.dasher_id)
+        else:
+            dasher.location = Location(dasher.location.latitude + rng.uniform(-0.05, 0.05), dasher.location.longitude + rng.uniform(-0.05, 0.05))
+            if dasher.dasher_id in index:
+                index.move(dasher)
+    assert index.nearest(dashers[0].location).dasher_id == "d_0" or "d_0" not in index
+
+    index = DasherGridIndex()
+    assert index.nearest(Location(0, 0)) is None and index.k_nearest(Location(0, 0), 3) == []
+
+def test_dasher_grid_index_k_larger_than_fleet():
+    rng = random.Random(37)
+    dashers = [Dasher(f"d_{i}", Location(43.6 + rng.random() * 0.05, -79.5 + rng.random() * 0.05), True) for i in range(50)]
+    # a (0, 0) GPS glitch, then the dasher goes offline
+    outlier = Dasher("d_glitch", Location(0.0, 0.0), True)
+    index = DasherGridIndex.from_dashers(dashers + [outlier])
+    target = Location(43.62, -79.48)
+    assert index.k_nearest(target, 100)[-1] is outlier
+    index.remove("d_glitch")
+    center = index._cell(target.latitude, target.longitude)
+    assert index._max_radius(center) < 30
+
+    expected = sorted(dashers, key=lambda dasher: math.dist((dasher.location.latitude, dasher.location.longitude), (target.latitude, target.longitude)))
+    assert index.k_nearest(target, 100) == expected
+    assert index.k_nearest(target, len(dashers)) == expected
+    # a dasher moving away and back keeps the bounds around the fleet
+    dashers[0].location = Location(10.0, 10.0)
+    index.move(dashers[0])
+    dashers[0].location = Location(43.61, -79.49)
+    index.move(dashers[0])
+    assert index._max_radius(center) < 30
+    index.remove("d_1")
+    assert len(index.k_nearest(target, 1000)) == len(dashers) - 1
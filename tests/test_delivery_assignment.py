@@ -0,0 +1,527 @@
+import contextlib
+import io
+import itertools
+import random
+import threading
+import time
+
+from solutions.dasher_index import DasherGridIndex
+from solutions.delivery_assignment import (
+    AcceptanceCriterion, ConcurrentDeliveryAssignmentService, DasherChangeFeed, DasherChangeType, DasherRegistry,
+    DeliveryAssignmentService, DistanceCriterion, Fleet, FleetDasherRepository, HeadingCriterion, LoadCriterion,
+    min_cost_matching, OrderBatchWindow, ScoringCriterion, ScoringPipeline
+)
+from solutions.delivery_distances import DistanceService
+from solutions.delivery_model import (
+    Dasher, DasherRepository, Delivery, InvalidOrderException, Location, NoDashersAvailableException, Order,
+    OrderRepository, OrderStatus
+)
+
+def test_assign_order_success():
+    # mocking classes
+    class MockDasherRepo(DasherRepository):
+        def get_available_dashers(self):
+            return [
+                Dasher("d_001", Location(43.65, -79.38), True),
+                Dasher("d_002", Location(43.70, -79.40), True),
+            ]
+        def save(self, dasher: Dasher):
+            assert dasher.dasher_id == "d_001"
+            assert dasher.is_available == False
+    
+    class MockOrderRepo(OrderRepository):
+        def save(self, order: Order):
+            assert order.status == OrderStatus.ASSIGNED
+    
+    class MockDistanceService(DistanceService):
+        def calculate_distance(self, loc1, loc2):
+            # Fake the logic to control the test
+            if loc1.latitude == 50.0: return 100.0 # d_far
+            if loc1.latitude == 10.1: return 10.0  # d_close
+            return 0.0
+
+
+    deliveryAssignmentService = DeliveryAssignmentService(MockOrderRepo(), MockDasherRepo(), MockDistanceService())
+
+    order_to_assign = Order(
+        "o_123", 
+        Location(10.0, 10.0), # Restaurant Location
+        Location(12.0, 12.0), # Customer Location
+        OrderStatus.PENDING
+    )
+
+    delivery = deliveryAssignmentService.assign_order(order_to_assign)
+
+    assert delivery.dasher_id == "d_001"
+    assert delivery.delivery_id == "del_o_123"
+
+def test_assign_dasher_not_found():
+    # mocking classes
+    class MockDasherRepo(DasherRepository):
+        def get_available_dashers(self):
+            return []
+        def save(self, dasher: Dasher):
+            assert dasher.dasher_id == "d_001"
+            assert dasher.is_available == False
+    
+    class MockOrderRepo(OrderRepository):
+        def save(self, order: Order):
+            assert order.status == OrderStatus.ASSIGNED
+    
+    class MockDistanceService(DistanceService):
+        def calculate_distance(self, loc1, loc2):
+            # Fake the logic to control the test
+            if loc1.latitude == 50.0: return 100.0 # d_far
+            if loc1.latitude == 10.1: return 10.0  # d_close
+            return 0.0
+
+    deliveryAssignmentService = DeliveryAssignmentService(MockOrderRepo(), MockDasherRepo(), MockDistanceService())
+
+    order_to_assign = Order(
+        "o_123", 
+        Location(10.0, 10.0), # Restaurant Location
+        Location(12.0, 12.0), # Customer Location
+        OrderStatus.PENDING
+    )
+
+    try: 
+        delivery = deliveryAssignmentService.assign_order(order_to_assign)
+    except NoDashersAvailableException:
+        print("Dasher Not Available Exception")
+
+def test_assign_order_with_dasher_index():
+    dashers = [Dasher("d_001", Location(43.65, -79.38), True), Dasher("d_002", Location(43.70, -79.40), True)]
+    index = DasherGridIndex.from_dashers(dashers, cell_size=0.01)
+    service = DeliveryAssignmentService(OrderRepository(), DasherRepository(), DistanceService(), index)
+    delivery = service.assign_order(Order("o_1", Location(43.69, -79.40), Location(43.7, -79.4), OrderStatus.PENDING))
+    assert delivery.dasher_id == "d_002" and not dashers[1].is_available and "d_002" not in index
+    assert service.assign_order(Order("o_2", Location(43.69, -79.40), Location(43.7, -79.4), OrderStatus.PENDING)).dasher_id == "d_001"
+    try:
+        service.assign_order(Order("o_3", Location(43.69, -79.40), Location(43.7, -79.4), OrderStatus.PENDING))
+        assert False
+    except NoDashersAvailableException:
+        pass
+
+def test_min_cost_matching_is_optimal():
+    rng = random.Random(11)
+    for _ in range(200):
+        n_orders, n_dashers = rng.randint(1, 6), rng.randint(1, 7)
+        costs = [[rng.choice([rng.random(), 1.0, 2.0]) for _ in range(n_dashers)] for _ in range(n_orders)]
+        candidates = [[(dasher, cost) for dasher, cost in enumerate(row) if rng.random() < 0.8] for row in costs]
+        matching = min_cost_matching(candidates, n_dashers)
+        assert len(set(dasher for dasher in matching if dasher >= 0)) == sum(1 for dasher in matching if dasher >= 0)
+
+        # brute force over every way to match the orders: the matching is as large as possible, and when every
+        # order is matched it has the smallest total cost (else the first orders are served first)
+        allowed = [dict(order_candidates) for order_candidates in candidates]
+        best = (0, 0.0)
+        for dashers in itertools.product(*[[-1] + list(order_allowed) for order_allowed in allowed]):
+            used = [dasher for dasher in dashers if dasher >= 0]
+            if len(used) != len(set(used)):
+                continue
+            total = sum(allowed[order][dasher] for order, dasher in enumerate(dashers) if dasher >= 0)
+            best = min(best, (-len(used), total))
+        matched = sum(1 for dasher in matching if dasher >= 0)
+        assert matched == -best[0]
+        if matched == n_orders:
+            assert abs(sum(allowed[order][dasher] for order, dasher in enumerate(matching)) - best[1]) < 1e-9
+
+def test_assign_orders_beats_greedy():
+    # greedily, o_a takes d_x and o_b has to go far to d_y, the matching gives d_y to o_a
+    def make():
+        dashers = [Dasher("d_x", Location(0.9, 0.0), True), Dasher("d_y", Location(-1.0, 0.0), True)]
+        orders = [Order("o_a", Location(0.0, 0.0), Location(0.0, 0.0), OrderStatus.PENDING),
+                  Order("o_b", Location(1.0, 0.0), Location(1.0, 0.0), OrderStatus.PENDING)]
+        return dashers, orders
+
+    for use_index in (False, True):
+        dashers, orders = make()
+        repository = DasherRepository()
+        repository.get_available_dashers = lambda: [dasher for dasher in dashers if dasher.is_available]
+        index = DasherGridIndex.from_dashers(dashers, cell_size=0.5) if use_index else None
+        service = DeliveryAssignmentService(OrderRepository(), repository, DistanceService(), index)
+        deliveries = service.assign_orders(orders)
+        assert [(delivery.order_id, delivery.dasher_id) for delivery in deliveries] == [("o_a", "d_y"), ("o_b", "d_x")]
+        assert all(order.status == OrderStatus.ASSIGNED for order in orders)
+        assert not any(dasher.is_available for dasher in dashers)
+        assert deliveries[0].delivery_id == "del_o_a"
+
+    # one candidate per order: o_b can not be matched to its candidate and gets the dasher left
+    dashers, orders = make()
+    repository = DasherRepository()
+    repository.get_available_dashers = lambda: [dasher for dasher in dashers if dasher.is_available]
+    service = DeliveryAssignmentService(OrderRepository(), repository, DistanceService())
+    deliveries = service.assign_orders(orders, candidates_per_order=1)
+    assert [(delivery.order_id, delivery.dasher_id) for delivery in deliveries] == [("o_a", "d_x"), ("o_b", "d_y")]
+
+    # more orders than dashers: the last one stays pending
+    dashers, orders = make()
+    orders.append(Order("o_c", Location(5.0, 0.0), Location(5.0, 0.0), OrderStatus.PENDING))
+    repository.get_available_dashers = lambda: [dasher for dasher in dashers if dasher.is_available]
+    assert len(service.assign_orders(orders)) == 2 and orders[2].status == OrderStatus.PENDING
+    try:
+        service.assign_orders([orders[2]])
+        assert False
+    except NoDashersAvailableException:
+        pass
+
+    now = [0.0]
+    window = OrderBatchWindow(service, window_seconds=1.0, clock=lambda: now[0])
+    dashers, orders = make()
+    assert window.add(orders[0]) == []
+    now[0] = 1.5
+    assert [delivery.dasher_id for delivery in window.add(orders[1])] == ["d_y", "d_x"]
+    assert window.flush() == []
+
+def test_assign_orders_fallback_does_not_take_matched_dashers():
+    # o_1 can not be matched to its only candidate d_a, its fallback runs before o_2 gets d_b from the matching
+    for use_index in (False, True):
+        dashers = [Dasher("d_a", Location(0.0, 0.0), True), Dasher("d_b", Location(10.0, 0.0), True)]
+        orders = [Order("o_0", Location(0.0, 0.0), Location(0.0, 0.0), OrderStatus.PENDING),
+                  Order("o_1", Location(0.1, 0.0), Location(0.0, 0.0), OrderStatus.PENDING),
+                  Order("o_2", Location(10.0, 0.0), Location(0.0, 0.0), OrderStatus.PENDING)]
+        repository = DasherRepository()
+        repository.get_available_dashers = lambda: [dasher for dasher in dashers if dasher.is_available]
+        index = DasherGridIndex.from_dashers(dashers, cell_size=0.5) if use_index else None
+        service = DeliveryAssignmentService(OrderRepository(), repository, DistanceService(), index)
+        deliveries = service.assign_orders(orders, candidates_per_order=1)
+        assert [(delivery.order_id, delivery.dasher_id) for delivery in deliveries] == [("o_0", "d_a"), ("o_2", "d_b")]
+        assert orders[1].status == OrderStatus.PENDING
+
+def test_dasher_registry_change_feed():
+    class CountingRepository(DasherRepository):
+        def __init__(self, dashers):
+            self.dashers = dashers
+            self.queries = 0
+        def get_available_dashers(self):
+            self.queries += 1
+            return [Dasher(d.dasher_id, Location(d.location.latitude, d.location.longitude), d.is_available) for d in self.dashers if d.is_available]
+        def save(self, dasher):
+            pass
+
+    now = [0.0]
+    stored = [Dasher("d_1", Location(0.0, 0.0), True), Dasher("d_2", Location(1.0, 1.0), True), Dasher("d_3", Location(2.0, 2.0), False)]
+    repository = CountingRepository(stored)
+    feed = DasherChangeFeed(capacity=4)
+    registry = DasherRegistry(repository, feed, DasherGridIndex(cell_size=0.5), resync_seconds=60, clock=lambda: now[0])
+    service = DeliveryAssignmentService(OrderRepository(), repository, DistanceService(), dasher_registry=registry)
+    assert service.dasher_index is registry.index and len(registry.index) == 2
+
+    feed.publish(DasherChangeType.ONLINE, "d_3", Location(0.2, 0.2))
+    feed.publish(DasherChangeType.LOCATION, "d_1", Location(5.0, 5.0))
+    feed.publish(DasherChangeType.OFFLINE, "d_2")
+    delivery = service.assign_order(Order("o_1", Location(0.0, 0.0), Location(0.0, 0.0), OrderStatus.PENDING))
+    assert delivery.dasher_id == "d_3" and repository.queries == 1
+    assert [dasher.dasher_id for dasher in registry.available_dashers()] == ["d_1"]
+    assert registry.available_dashers() is registry.available_dashers()
+
+    # the ASSIGNED change of the assignment comes back through the feed, applying it again changes nothing
+    feed.publish(DasherChangeType.ASSIGNED, "d_3")
+    feed.publish(DasherChangeType.FREED, "d_2", Location(0.1, 0.1))
+    registry.refresh()
+    assert sorted(registry.available) == ["d_1", "d_2"] and registry.index.nearest(Location(0, 0)).dasher_id == "d_2"
+
+    # more changes than the feed keeps: the registry resyncs from the repository
+    stored[0].is_available = False
+    for _ in range(6):
+        feed.publish(DasherChangeType.LOCATION, "d_2", Location(0.1, 0.1))
+    registry.refresh()
+    assert repository.queries == 2 and sorted(registry.available) == ["d_2"] and len(registry.index) == 1
+
+    now[0] = 61.0
+    registry.refresh()
+    assert repository.queries == 3
+
+def test_concurrent_assign_order_stress():
+    class SlowRepository(DasherRepository):
+        def __init__(self, dashers):
+            self.dashers = dashers
+        def get_available_dashers(self):
+            return [dasher for dasher in self.dashers if dasher.is_available]
+        def save(self, dasher):
+            time.sleep(0.0001)
+
+    class SlowOrderRepository(OrderRepository):
+        def save(self, order):
+            time.sleep(0.0001)
+
+    for mode in ("repository", "index", "registry"):
+        rng = random.Random(8)
+        dashers = [Dasher(f"d_{i}", Location(rng.random(), rng.random()), True) for i in range(300)]
+        orders = [Order(f"o_{i}", Location(rng.random(), rng.random()), Location(0.5, 0.5), OrderStatus.PENDING) for i in range(400)]
+        repository = SlowRepository(dashers)
+        if mode == "index":
+            service = ConcurrentDeliveryAssignmentService(SlowOrderRepository(), repository, DistanceService(), DasherGridIndex.from_dashers(dashers, 0.05))
+        elif mode == "registry":
+            registry = DasherRegistry(repository, DasherChangeFeed(), DasherGridIndex(0.05))
+            service = ConcurrentDeliveryAssignmentService(SlowOrderRepository(), repository, DistanceService(), dasher_registry=registry)
+        else:
+            service = ConcurrentDeliveryAssignmentService(SlowOrderRepository(), repository, DistanceService())
+
+        deliveries = []
+        no_dasher = []
+        # every order is submitted twice, by two different threads
+        work = orders + orders[::-1]
+
+        def assigner(worker):
+            for order in work[worker::8]:
+                try:
+                    deliveries.append(service.assign_order(order))
+                except NoDashersAvailableException:
+                    no_dasher.append(order.order_id)
+                except InvalidOrderException:
+                    pass
+
+        threads = [threading.Thread(target=assigner, args=(worker, )) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assigned_dashers = [delivery.dasher_id for delivery in deliveries]
+        assert len(assigned_dashers) == len(set(assigned_dashers)) == 300, mode
+        assert len(set(delivery.order_id for delivery in deliveries)) == 300
+        assert not any(dasher.is_available for dasher in dashers)
+        assert sum(order.status == OrderStatus.ASSIGNED for order in orders) == 300
+
+    service.release_dasher(dashers[0].dasher_id)
+    assert dashers[0].dasher_id not in service.reservations
+
+def test_concurrent_assign_order_skips_reserved_candidates():
+    # the nearest dasher is reserved by another call but still in the index, the search goes past it
+    dashers = [Dasher("d_1", Location(0.0, 0.0), True), Dasher("d_2", Location(0.3, 0.0), True)]
+    repository = DasherRepository()
+    repository.save = lambda dasher: None
+    service = ConcurrentDeliveryAssignmentService(OrderRepository(), repository, DistanceService(),
+                                                  DasherGridIndex.from_dashers(dashers, 0.05), candidates_per_attempt=1)
+    assert service.reservations.try_reserve("d_1", object())
+    order = Order("o_1", Location(0.0, 0.0), Location(0.0, 0.0), OrderStatus.PENDING)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert service.assign_order(order).dasher_id == "d_2"
+        try:
+            service.assign_order(Order("o_2", Location(0.0, 0.0), Location(0.0, 0.0), OrderStatus.PENDING))
+            assert False
+        except NoDashersAvailableException:
+            pass
+
+def test_concurrent_assign_order_registry_releases_freed_dashers():
+    dashers = [Dasher("d1", Location(0.0, 0.0), True)]
+    repository = DasherRepository()
+    repository.get_available_dashers = lambda: [dasher for dasher in dashers if dasher.is_available]
+    repository.save = lambda dasher: None
+    feed = DasherChangeFeed()
+    registry = DasherRegistry(repository, feed, DasherGridIndex(0.05))
+    service = ConcurrentDeliveryAssignmentService(OrderRepository(), repository, DistanceService(), dasher_registry=registry)
+
+    def order(order_id):
+        return Order(order_id, Location(0.0, 0.0), Location(0.0, 0.0), OrderStatus.PENDING)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for cycle in range(3):
+            assert service.assign_order(order(f"o_{cycle}")).dasher_id == "d1"
+            feed.publish(DasherChangeType.ASSIGNED, "d1")
+            try:
+                service.assign_order(order(f"busy_{cycle}"))
+                assert False
+            except NoDashersAvailableException:
+                pass
+            # delivered: the dasher is free again and can take the next order
+            feed.publish(DasherChangeType.FREED, "d1")
+        registry.refresh()
+        assert [dasher.dasher_id for dasher in registry.available_dashers()] == ["d1"]
+        assert "d1" not in service.reservations
+
+def test_concurrent_assign_order_rolls_back_failed_saves():
+    class FlakyRepository(DasherRepository):
+        def __init__(self, dashers):
+            self.dashers = dashers
+            self.failures = 1
+        def get_available_dashers(self):
+            return [dasher for dasher in self.dashers if dasher.is_available]
+        def save(self, dasher):
+            if self.failures:
+                self.failures -= 1
+                raise IOError("storage unavailable")
+
+    def order(order_id):
+        return Order(order_id, Location(0.0, 0.0), Location(0.0, 0.0), OrderStatus.PENDING)
+
+    for setup in ("index", "registry", "repository"):
+        dashers = [Dasher("d1", Location(0.0, 0.0), True)]
+        repository = FlakyRepository(dashers)
+        if setup == "registry":
+            registry = DasherRegistry(repository, DasherChangeFeed(), DasherGridIndex(0.05))
+            service = ConcurrentDeliveryAssignmentService(OrderRepository(), repository, DistanceService(), dasher_registry=registry)
+            dasher = registry.get("d1")
+        else:
+            index = DasherGridIndex.from_dashers(dashers, 0.05) if setup == "index" else None
+            service = ConcurrentDeliveryAssignmentService(OrderRepository(), repository, DistanceService(), index)
+            dasher = dashers[0]
+        first = order("o_1")
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                service.assign_order(first)
+                assert False
+            except IOError:
+                pass
+            assert first.status == OrderStatus.PENDING and dasher.is_available
+            assert "d1" not in service.reservations and "d1" not in service.assigned
+            if service.dasher_index is not None:
+                assert "d1" in service.dasher_index
+            # the retry gets the same dasher
+            assert service.assign_order(first).dasher_id == "d1"
+            assert first.status == OrderStatus.ASSIGNED and not dasher.is_available
+
+    # without a registry the dasher stays reserved until the caller releases it
+    dashers = [Dasher("d1", Location(0.0, 0.0), True)]
+    index = DasherGridIndex.from_dashers(dashers, 0.05)
+    repository = FlakyRepository(dashers)
+    repository.failures = 0
+    service = ConcurrentDeliveryAssignmentService(OrderRepository(), repository, DistanceService(), index)
+    with contextlib.redirect_stdout(io.StringIO()):
+        service.assign_order(order("o_1"))
+        dashers[0].is_available = True
+        index.insert(dashers[0])
+        try:
+            service.assign_order(order("o_2"))
+            assert False
+        except NoDashersAvailableException:
+            pass
+        service.release_dasher("d1")
+        assert service.assign_order(order("o_2")).dasher_id == "d1"
+
+def test_scoring_criterion_is_abstract():
+    try:
+        ScoringCriterion()
+        assert False
+    except TypeError:
+        pass
+
+def test_scoring_pipeline():
+    service = DistanceService()
+    dashers = [
+        Dasher("d_near_busy", Location(43.651, -79.38), True, active_orders=2),
+        Dasher("d_near_picky", Location(43.652, -79.38), True, acceptance_rate=0.2),
+        Dasher("d_mid", Location(43.655, -79.38), True, heading=180.0),
+        Dasher("d_mid_away", Location(43.655, -79.381), True, heading=0.0),
+        Dasher("d_far", Location(43.70, -79.38), True)
+    ]
+    order = Order("o_1", Location(43.65, -79.38), Location(43.66, -79.38), OrderStatus.PENDING)
+
+    # distance only, same as find_best_dasher
+    distance_only = ScoringPipeline([DistanceCriterion()], service, k=2)
+    assert distance_only.best_dasher(order, dashers).dasher_id == "d_near_busy"
+
+    criteria = [DistanceCriterion(scale=0.01), LoadCriterion(), AcceptanceCriterion(), HeadingCriterion()]
+    pipeline = ScoringPipeline(criteria, service, k=4, min_qualified=1)
+    # busy costs 2, picky 0.8, d_mid drives towards the restaurant (south), d_mid_away away from it
+    assert pipeline.best_dasher(order, dashers).dasher_id == "d_mid"
+    assert pipeline.widenings == 0 and pipeline.scored == 4
+
+    # nobody close enough qualifies, the search widens to the far dasher
+    limited = [DistanceCriterion(), LoadCriterion(max_active_orders=0), AcceptanceCriterion(min_acceptance_rate=0.5)]
+    pipeline = ScoringPipeline(limited, service, k=1, min_qualified=1)
+    no_mid = [dasher for dasher in dashers if not dasher.dasher_id.startswith("d_mid")]
+    assert pipeline.best_dasher(order, no_mid).dasher_id == "d_far"
+    assert pipeline.widenings == 2
+    pipeline = ScoringPipeline(limited, service, k=1, min_qualified=1, max_candidates=2)
+    assert pipeline.best_dasher(order, no_mid) is None
+
+    # the same answers from the grid index, and through assign_order
+    index = DasherGridIndex.from_dashers(dashers)
+    pipeline = ScoringPipeline(criteria, service, k=4, min_qualified=1, audit_rate=1.0)
+    assert pipeline.best_dasher(order, dasher_index=index).dasher_id == "d_mid"
+    assert pipeline.audited == 1 and pipeline.disagreement_rate == 0.0
+    # with k=1 the pruned answer misses d_mid
+    pruned = ScoringPipeline(criteria, service, k=1, min_qualified=1, audit_rate=1.0)
+    assert pruned.best_dasher(order, dasher_index=index).dasher_id == "d_near_busy"
+    assert pruned.disagreement_rate == 1.0
+
+    class SilentRepository(DasherRepository):
+        def save(self, dasher):
+            pass
+
+    class SilentOrderRepository(OrderRepository):
+        def save(self, order):
+            pass
+
+    assignment = DeliveryAssignmentService(SilentOrderRepository(), SilentRepository(), service, dasher_index=index, scoring=pipeline)
+    assert assignment.assign_order(order).dasher_id == "d_mid"
+    assert "d_mid" not in index
+
+def test_slotted_types_and_fleet():
+    location = Location(43.65, -79.38)
+    dasher = Dasher("d_1", location, True)
+    assert not hasattr(dasher, "__dict__") and not hasattr(location, "__dict__")
+    for frozen in (location, Delivery("del_o_1", "o_1", "d_1")):
+        try:
+            frozen.__setattr__(frozen.__slots__[0], None)
+            assert False
+        except AttributeError:
+            pass
+    assert {location: 1}[Location(43.65, -79.38)] == 1
+
+    rng = random.Random(48)
+    dashers = [Dasher(f"d_{i}", Location(43.5 + rng.random() * 0.3, -79.6 + rng.random() * 0.3), rng.random() < 0.7) for i in range(3000)]
+    fleet = Fleet(capacity=16)
+    for dasher in dashers:
+        fleet.add(dasher.dasher_id, dasher.location, dasher.is_available)
+    assert len(fleet) == 3000 and "d_2999" in fleet and "d_3000" not in fleet
+    view = fleet["d_7"]
+    assert (view.dasher_id, view.location, view.is_available) == (dashers[7].dasher_id, dashers[7].location, dashers[7].is_available)
+    # views write through, an add of a known dasher updates it
+    view.is_available = False
+    fleet.add("d_8", Location(1.0, 2.0), False)
+    assert not fleet["d_7"].is_available and fleet["d_8"].location == Location(1.0, 2.0) and len(fleet) == 3000
+    assert not hasattr(view, "__dict__")
+
+    available = [dasher for dasher in dashers if dasher.dasher_id not in ("d_7", "d_8") and dasher.is_available]
+    assert [view.dasher_id for view in fleet.available_dashers()] == [dasher.dasher_id for dasher in available]
+    service = DistanceService()
+    assignment = DeliveryAssignmentService(OrderRepository(), FleetDasherRepository(fleet), service)
+    for _ in range(50):
+        target = Location(43.5 + rng.random() * 0.3, -79.6 + rng.random() * 0.3)
+        assert fleet.nearest_available(target).dasher_id == assignment.find_best_dasher(available, target).dasher_id
+
+    # assign_order works on the views, the dasher becomes unavailable in the arrays
+    class SilentOrderRepository(OrderRepository):
+        def save(self, order):
+            pass
+
+    assignment = DeliveryAssignmentService(SilentOrderRepository(), FleetDasherRepository(fleet), service)
+    order = Order("o_1", Location(43.6, -79.5), Location(43.7, -79.4), OrderStatus.PENDING)
+    expected = fleet.nearest_available(order.order_location).dasher_id
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert assignment.assign_order(order).dasher_id == expected
+    assert not fleet[expected].is_available and order.status == OrderStatus.ASSIGNED
+
+def test_fleet_views_with_scoring_pipeline():
+    # the same dashers as test_scoring_pipeline, as fleet views: the scoring inputs are fleet columns
+    dashers = [
+        Dasher("d_near_busy", Location(43.651, -79.38), True, active_orders=2),
+        Dasher("d_near_picky", Location(43.652, -79.38), True, acceptance_rate=0.2),
+        Dasher("d_mid", Location(43.655, -79.38), True, heading=180.0),
+        Dasher("d_mid_away", Location(43.655, -79.381), True, heading=0.0),
+        Dasher("d_far", Location(43.70, -79.38), True)
+    ]
+    fleet = Fleet.from_dashers(dashers)
+    for _ in range(3):
+        # growing the arrays keeps the columns
+        fleet.add(f"extra_{len(fleet)}", Location(0.0, 0.0), False)
+    view = fleet["d_mid"]
+    assert (view.active_orders, view.acceptance_rate, view.heading) == (0, 1.0, 180.0)
+    assert fleet["d_far"].heading is None and fleet["d_near_busy"].active_orders == 2
+    view.heading = None
+    assert fleet["d_mid"].heading is None
+    view.heading = 180.0
+
+    criteria = [DistanceCriterion(scale=0.01), LoadCriterion(), AcceptanceCriterion(), HeadingCriterion()]
+    pipeline = ScoringPipeline(criteria, DistanceService(), k=4, min_qualified=1)
+    order = Order("o_1", Location(43.65, -79.38), Location(43.66, -79.38), OrderStatus.PENDING)
+    assert pipeline.best_dasher(order, fleet.available_dashers()).dasher_id == "d_mid"
+
+    # a Dasher saved into the repository keeps its scoring inputs
+    repository = FleetDasherRepository(fleet)
+    repository.save(Dasher("d_new", Location(1.0, 1.0), True, active_orders=1, acceptance_rate=0.5, heading=90.0))
+    new = fleet["d_new"]
+    assert (new.active_orders, new.acceptance_rate, new.heading) == (1, 0.5, 90.0)
@@ -0,0 +1,179 @@
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import tempfile
+import threading
+
+import numpy as np
+
+from solutions.delivery_assignment import DeliveryAssignmentService
+from solutions.delivery_distances import (
+    _travel_times_to, build_travel_time_matrix, CachingDistanceService, DistanceService, haversine_km, RoadGraph,
+    TravelTimeDistanceService, TravelTimeGrid, TravelTimeMatrix
+)
+from solutions.delivery_model import Dasher, DasherRepository, Location, OrderRepository
+
+def test_calculate_distances():
+    service = DistanceService()
+    origin = Location(43.65, -79.38)
+    latitudes = np.array([43.65, 43.70, 40.71])
+    longitudes = np.array([-79.38, -79.40, -74.01])
+    with_prints = [DistanceService.calculate_distance(service, Location(lat, lon), origin) for lat, lon in zip(latitudes, longitudes)]
+    assert service.calculate_distances(origin, latitudes, longitudes).tolist() == with_prints
+
+    # Toronto to New York is about 550 km
+    haversine = service.calculate_distances(origin, latitudes, longitudes, metric="haversine")
+    assert haversine[0] == 0.0 and 5.5 < haversine[1] < 5.9 and 545 < haversine[2] < 555
+    assert DistanceService("haversine").calculate_distances(origin, latitudes, longitudes).tolist() == haversine.tolist()
+    assert math.isclose(haversine_km(origin, Location(40.71, -74.01)), haversine[2])
+    try:
+        DistanceService("manhattan")
+        assert False
+    except ValueError:
+        pass
+
+def test_caching_distance_service_threads():
+    # a small LRU shared by threads keeps evicting, every lookup still succeeds
+    cache = CachingDistanceService(DistanceService(), max_entries=8)
+    errors = []
+
+    def lookups(worker):
+        rng = random.Random(worker)
+        try:
+            for _ in range(3000):
+                cache.calculate_distance(Location(rng.randrange(40) * 0.01, 0.0), Location(0.0, 0.0))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=lookups, args=(worker, )) for worker in range(8)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    stats = cache.stats()
+    assert errors == []
+    assert stats["entries"] <= 8 and stats["hits"] + stats["misses"] == 8 * 3000
+
+def test_caching_distance_service():
+    class CountingDistanceService(DistanceService):
+        def __init__(self):
+            super().__init__()
+            self.calls = 0
+
+        def calculate_distance(self, loc1, loc2):
+            self.calls += 1
+            return loc2.latitude - loc1.latitude
+
+    now = [0.0]
+    inner = CountingDistanceService()
+    service = CachingDistanceService(inner, precision=0.001, max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+    restaurant = Location(43.6500, -79.3800)
+    assert math.isclose(service.calculate_distance(Location(43.6601, -79.38), restaurant), -0.01)
+    # a few meters away, same cell pair
+    assert math.isclose(service.calculate_distance(Location(43.6599, -79.3801), restaurant), -0.01)
+    # not symmetric by default
+    assert math.isclose(service.calculate_distance(restaurant, Location(43.66, -79.38)), 0.01)
+    assert inner.calls == 2 and service.hits == 1
+
+    # the least recently used pair is evicted
+    service.calculate_distance(Location(43.7, -79.38), restaurant)
+    assert service.evictions == 1 and len(service.cache) == 2
+    service.calculate_distance(Location(43.66, -79.38), restaurant)
+    assert inner.calls == 4
+
+    # expired entries are computed again
+    now[0] = 11.0
+    service.calculate_distance(Location(43.7, -79.38), restaurant)
+    assert service.expirations == 1 and inner.calls == 5
+    stats = service.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 5 and stats["entries"] == 2 and stats["memory_bytes"] > 0
+    assert math.isclose(stats["hit_ratio"], 1 / 6)
+
+    symmetric = CachingDistanceService(CountingDistanceService(), symmetric=True)
+    symmetric.calculate_distance(restaurant, Location(43.66, -79.38))
+    symmetric.calculate_distance(Location(43.66, -79.38), restaurant)
+    assert symmetric.service.calls == 1
+
+    # find_best_dasher goes through the cache
+    inner = CountingDistanceService()
+    service = CachingDistanceService(inner)
+    dashers = [Dasher("d_1", Location(43.0, -79.0), True), Dasher("d_2", Location(43.5, -79.0), True)]
+    assignment = DeliveryAssignmentService(OrderRepository(), DasherRepository(), service)
+    for _ in range(3):
+        assert assignment.find_best_dasher(dashers, Location(44.0, -79.0)).dasher_id == "d_2"
+    assert inner.calls == 2 and service.hits == 4
+
+def test_travel_time_matrix():
+    # a 3 x 4 city, a river along row 1 with one bridge at column 3
+    grid = TravelTimeGrid(43.0, -79.0, 0.01, 3, 4)
+    speeds = np.array([[30, 30, 30, 30],
+                       [0, 0, 0, 30],
+                       [30, 30, 30, 30]])
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "city.ttm")
+        size = build_travel_time_matrix(path, grid, RoadGraph.from_speed_table(grid, speeds))
+        assert size == os.path.getsize(path) == 64 + 12 * 12 * 2
+        matrix = TravelTimeMatrix(path)
+        assert matrix.grid == grid
+        service = TravelTimeDistanceService(matrix)
+        north_west, south_west = Location(43.025, -78.995), Location(43.005, -78.995)
+        river, bridge = Location(43.015, -78.985), Location(43.015, -78.965)
+        assert service.calculate_distance(north_west, north_west) == 0.0
+        assert service.calculate_distance(river, north_west) == math.inf
+        assert service.calculate_distance(Location(42.0, -79.0), north_west) == math.inf
+        # crossing the river goes around by the bridge, much longer than the straight line
+        across = service.calculate_distance(north_west, south_west)
+        assert across > 4 * service.calculate_distance(Location(43.025, -78.985), north_west)
+        assert across == service.calculate_distance(south_west, north_west)
+
+        # the cell to cell times match one Dijkstra over the speed table graph
+        graph = RoadGraph.from_speed_table(grid, speeds)
+        reverse_adjacency = [[] for _ in graph.locations]
+        for from_node, to_node, seconds in graph.edges:
+            reverse_adjacency[to_node].append((from_node, seconds))
+        expected = _travel_times_to(reverse_adjacency, grid.cell(north_west))
+        assert service.calculate_distance(bridge, north_west) == round(expected[grid.cell(bridge)])
+
+        # the dasher on the same side of the river is the best, even if the other one is closer in a straight line
+        near_across = Dasher("d_across", Location(43.005, -78.985), True)
+        far_same_side = Dasher("d_same_side", Location(43.025, -78.965), True)
+        restaurant = Location(43.025, -78.985)
+        assignment = DeliveryAssignmentService(OrderRepository(), DasherRepository(), service)
+        assert assignment.find_best_dasher([near_across, far_same_side], restaurant).dasher_id == "d_same_side"
+        distances = service.calculate_distances(restaurant, np.array([43.005, 43.025, 50.0, 43.015]), np.array([-78.985, -78.965, -79.0, -78.995]))
+        assert distances[0] > distances[1] and distances[2] == np.inf and distances[3] == np.inf
+        matrix.close()
+
+        # a road graph file, two nodes and a one way street
+        graph_path = os.path.join(tmp_dir, "roads.json")
+        with open(graph_path, "w") as graph_file:
+            json.dump({"nodes": [[43.005, -78.995], [43.025, -78.965]], "edges": [[0, 1, 120.0]]}, graph_file)
+        build_travel_time_matrix(path, grid, RoadGraph.from_json(graph_path))
+        matrix = TravelTimeMatrix(path)
+        assert matrix.travel_time(south_west, Location(43.025, -78.965)) == 120.0
+        assert matrix.travel_time(Location(43.025, -78.965), south_west) == math.inf
+        matrix.close()
+
+def test_caching_travel_time_distance_service():
+    grid = TravelTimeGrid(43.0, -79.0, 0.01, 2, 2)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "city.ttm")
+        build_travel_time_matrix(path, grid, RoadGraph.from_speed_table(grid, np.full((2, 2), 30)))
+        matrix = TravelTimeMatrix(path)
+        service = TravelTimeDistanceService(matrix)
+        cached = CachingDistanceService(service)
+        assert cached.metric == "travel_time"
+        dasher, restaurant = Location(43.005, -78.995), Location(43.015, -78.985)
+        assert cached.calculate_distance(dasher, restaurant) == service.calculate_distance(dasher, restaurant) > 0
+        assert cached.calculate_distance(dasher, restaurant) == service.calculate_distance(dasher, restaurant)
+        assert cached.stats()["hits"] == 1
+        # the batch goes to the matrix row, not pair by pair through the cache
+        latitudes, longitudes = np.array([43.005, 43.015, 50.0]), np.array([-78.995, -78.995, -79.0])
+        assert cached.calculate_distances(restaurant, latitudes, longitudes).tolist() == \
+            service.calculate_distances(restaurant, latitudes, longitudes).tolist()
+        assert cached.stats()["entries"] == 1
+        matrix.close()
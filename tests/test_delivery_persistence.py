@@ -0,0 +1,154 @@
+import contextlib
+import io
+import os
+import sqlite3
+import tempfile
+import time
+
+from solutions.delivery_assignment import (
+    AcceptanceCriterion, DeliveryAssignmentService, DistanceCriterion, HeadingCriterion, LoadCriterion, ScoringPipeline
+)
+from solutions.delivery_distances import DistanceService
+from solutions.delivery_model import Dasher, Location, Order, OrderRepository, OrderStatus
+from solutions.delivery_persistence import (
+    SqliteConnectionPool, SqliteDasherRepository, SqliteOrderRepository, WriteBehindDasherRepository,
+    WriteBehindOrderRepository, WriteBehindQueue
+)
+
+def test_write_behind_coalesces_and_orders():
+    class RecordingRepository(OrderRepository):
+        def __init__(self, log, name, fail_times=0):
+            self.log = log
+            self.name = name
+            self.fail_times = fail_times
+        def get_available_dashers(self):
+            return [Dasher("d_1", Location(0, 0), True), Dasher("d_2", Location(1, 1), True)]
+        def save_many(self, entities):
+            if self.fail_times:
+                self.fail_times -= 1
+                raise IOError("storage is down")
+            self.log.append((self.name, [getattr(entity, "order_id", None) or entity.dasher_id for entity in entities]))
+
+    log = []
+    queue = WriteBehindQueue(max_batch=1000, flush_seconds=3600)
+    orders = WriteBehindOrderRepository(RecordingRepository(log, "orders"), queue)
+    dashers = WriteBehindDasherRepository(RecordingRepository(log, "dashers", fail_times=1), queue)
+    service = DeliveryAssignmentService(orders, dashers, DistanceService())
+    with contextlib.redirect_stdout(io.StringIO()):
+        service.assign_order(Order("o_1", Location(0, 0), Location(0, 0), OrderStatus.PENDING))
+    # the assigned dasher is not written yet, but it is not available anymore
+    assert [dasher.dasher_id for dasher in dashers.get_available_dashers()] == ["d_2"]
+    assert log == []
+
+    order = Order("o_2", Location(0, 0), Location(0, 0), OrderStatus.PENDING)
+    orders.save(order)
+    order.status = OrderStatus.ASSIGNED
+    orders.save(order)
+    assert queue.coalesced == 1
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            queue.flush()
+            assert False
+        except IOError:
+            pass
+    assert log == [("orders", ["o_1", "o_2"])]
+    # the failed dasher write is done again at close
+    queue.close()
+    assert log == [("orders", ["o_1", "o_2"]), ("dashers", ["d_1"])]
+    try:
+        orders.save(order)
+        assert False
+    except RuntimeError:
+        pass
+
+    # writes by size in the background
+    log = []
+    queue = WriteBehindQueue(max_batch=10, flush_seconds=3600)
+    orders = WriteBehindOrderRepository(RecordingRepository(log, "orders"), queue)
+    for i in range(10):
+        orders.save(Order(f"o_{i}", Location(0, 0), Location(0, 0), OrderStatus.ASSIGNED))
+    for _ in range(1000):
+        if log:
+            break
+        time.sleep(0.001)
+    assert log == [("orders", [f"o_{i}" for i in range(10)])]
+    queue.close()
+
+def test_write_behind_thread_survives_failed_writes():
+    class FlakyRepository(OrderRepository):
+        def __init__(self, fail_times):
+            self.fail_times = fail_times
+            self.written = []
+        def save_many(self, entities):
+            if self.fail_times:
+                self.fail_times -= 1
+                raise IOError("storage is down")
+            self.written.extend(entity.order_id for entity in entities)
+
+    repository = FlakyRepository(fail_times=2)
+    queue = WriteBehindQueue(flush_seconds=0.005, max_backoff_seconds=0.02)
+    orders = WriteBehindOrderRepository(repository, queue)
+    with contextlib.redirect_stdout(io.StringIO()):
+        orders.save(Order("o_1", Location(0, 0), Location(0, 0), OrderStatus.PENDING))
+        deadline = time.monotonic() + 5
+        while not repository.written and time.monotonic() < deadline:
+            time.sleep(0.005)
+        # the background thread retried after the failures, without close()
+        assert repository.written == ["o_1"]
+        assert queue.failures == 2 and queue.thread.is_alive()
+        queue.close()
+    assert not queue.thread.is_alive()
+
+def test_sqlite_repositories():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pool = SqliteConnectionPool(os.path.join(tmp_dir, "delivery.sqlite"), size=2)
+        dashers = SqliteDasherRepository(pool)
+        orders = SqliteOrderRepository(pool)
+        dashers.save_many([Dasher("d_001", Location(43.65, -79.38), True), Dasher("d_002", Location(43.70, -79.40), True),
+                           Dasher("d_003", Location(45.00, -75.00), False)])
+        assert sorted(dasher.dasher_id for dasher in dashers.get_available_dashers()) == ["d_001", "d_002"]
+        assert [dasher.dasher_id for dasher in dashers.get_available_dashers_near(Location(43.66, -79.38), 0.02)] == ["d_001"]
+
+        service = DeliveryAssignmentService(orders, dashers, DistanceService())
+        order = Order("o_1", Location(43.69, -79.40), Location(43.7, -79.4), OrderStatus.PENDING)
+        orders.save(order)
+        assert [pending.order_id for pending in orders.get_pending_orders()] == ["o_1"]
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert service.assign_order(order).dasher_id == "d_002"
+        assert orders.get("o_1").status == OrderStatus.ASSIGNED and orders.get_pending_orders() == []
+        assert dashers.get("d_002").is_available is False and dashers.get("d_404") is None
+        assert [dasher.dasher_id for dasher in dashers.get_available_dashers()] == ["d_001"]
+
+        # the write-behind queue writes through save_many
+        write_queue = WriteBehindQueue(flush_seconds=3600)
+        WriteBehindDasherRepository(dashers, write_queue).save(Dasher("d_002", Location(43.70, -79.40), True))
+        write_queue.close()
+        assert len(dashers.get_available_dashers()) == 2
+        pool.close()
+
+def test_sqlite_dasher_repository_keeps_scoring_inputs():
+    fleet = [Dasher("d_near", Location(43.650, -79.380), True, active_orders=3, acceptance_rate=0.4, heading=180.0),
+             Dasher("d_far", Location(43.655, -79.380), True, active_orders=0, acceptance_rate=0.95, heading=None)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "delivery.sqlite")
+        # a file created before the scoring inputs were stored
+        with sqlite3.connect(path) as connection:
+            connection.execute("CREATE TABLE dashers (dasher_id TEXT PRIMARY KEY, latitude REAL NOT NULL, "
+                               "longitude REAL NOT NULL, is_available INTEGER NOT NULL) WITHOUT ROWID")
+            connection.execute("INSERT INTO dashers VALUES ('d_old', 45.0, -75.0, 0)")
+        connection.close()
+
+        pool = SqliteConnectionPool(path, size=1)
+        repository = SqliteDasherRepository(pool)
+        assert repository.get("d_old") == Dasher("d_old", Location(45.0, -75.0), False)
+        repository.save_many(fleet)
+        assert repository.get("d_near") == fleet[0] and repository.get("d_far") == fleet[1]
+        assert sorted(repository.get_available_dashers(), key=lambda dasher: dasher.dasher_id) == [fleet[1], fleet[0]]
+        assert repository.get_available_dashers_near(Location(43.65, -79.38), 0.001) == [fleet[0]]
+
+        criteria = [DistanceCriterion(), LoadCriterion(max_active_orders=2), AcceptanceCriterion(), HeadingCriterion()]
+        order = Order("o_1", Location(43.651, -79.380), Location(43.7, -79.4), OrderStatus.PENDING)
+        in_memory = ScoringPipeline(criteria, DistanceService(), min_qualified=1).best_dasher(order, fleet)
+        reloaded = ScoringPipeline(criteria, DistanceService(), min_qualified=1).best_dasher(order, repository.get_available_dashers())
+        assert in_memory.dasher_id == reloaded.dasher_id == "d_far"
+        pool.close()
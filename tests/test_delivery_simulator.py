@@ -0,0 +1,43 @@
+import math
+
+from benchmarks.delivery_simulator import DeliverySimulator, LatencyHistogram, SimulationConfig
+from solutions.dasher_index import DasherGridIndex
+from solutions.delivery_assignment import DasherChangeFeed, DasherRegistry, DeliveryAssignmentService
+from solutions.delivery_distances import DistanceService
+from solutions.delivery_model import OrderStatus
+
+def test_delivery_simulator():
+    def linear_engine(order_repository, dasher_repository):
+        return DeliveryAssignmentService(order_repository, dasher_repository, DistanceService())
+
+    def index_engine(order_repository, dasher_repository):
+        index = DasherGridIndex.from_dashers(dasher_repository.get_available_dashers(), cell_size=0.01)
+        return DeliveryAssignmentService(order_repository, dasher_repository, DistanceService(), dasher_index=index)
+
+    def registry_engine(order_repository, dasher_repository):
+        registry = DasherRegistry(dasher_repository, DasherChangeFeed(100000), DasherGridIndex(cell_size=0.01))
+        return DeliveryAssignmentService(order_repository, dasher_repository, DistanceService(), dasher_registry=registry)
+
+    # few dashers for the rate, so some orders wait, and a rush hour in the middle
+    config = SimulationConfig(seed=5, duration_seconds=1800, n_dashers=30, order_rates=((0, 6.0), (600, 20.0), (1200, 4.0)))
+    reports = [DeliverySimulator(config, engine).run() for engine in (linear_engine, linear_engine, index_engine, registry_engine)]
+    first = reports[0]
+    assert first.orders > 200 and 0 < first.assigned < first.orders and first.idle_dashers_min == 0
+    assert first.latency.count >= first.assigned and first.pickup_km_mean > 0 and first.wait_seconds_mean > 0
+    # seeded, and the engines all give the closest dasher
+    for report in reports[1:]:
+        assert report.assignments == first.assignments
+        assert (report.orders, report.waiting, report.idle_dashers_mean) == (first.orders, first.waiting, first.idle_dashers_mean)
+    assert DeliverySimulator(SimulationConfig(seed=6, duration_seconds=1800, n_dashers=30), linear_engine).run().assignments != first.assignments
+
+    # every assigned order is saved as ASSIGNED, and the dashers busy at the end are saved as unavailable
+    simulator = DeliverySimulator(config, linear_engine)
+    report = simulator.run()
+    assert sum(order.status == OrderStatus.ASSIGNED for order in simulator.order_repository.orders.values()) == report.assigned
+    busy = {dasher_id for dasher_id, dasher in simulator.dashers.items() if not dasher.is_available}
+    assert busy == {dasher_id for dasher_id, dasher in simulator.dasher_repository.dashers.items() if not dasher.is_available}
+
+    histogram = LatencyHistogram(min_seconds=1.0, n_buckets=4)
+    for seconds in (0.5, 1.5, 3.0, 3.5, 100.0):
+        histogram.record(seconds)
+    assert histogram.counts == [1, 1, 2, 0, 1] and histogram.percentile(50) == 4.0 and histogram.percentile(100) == math.inf
@@ -0,0 +1,46 @@
+from solutions.event_dedup import BloomDeduplicator, BloomFilter, EventDeduplicator, ExactDeduplicator, WindowedDeduplicator
+
+def test_exact_deduplicator_spill():
+    dedup = ExactDeduplicator(max_memory_ids=10, expected_ids=1000)
+    events = [{"event_id": f"evt-{i}"} for i in range(100)]
+    assert not any(dedup.seen(event) for event in events)
+    assert all(dedup.seen(event) for event in events)
+    assert not dedup.seen({"type": "CHARGE"})
+    stats = dedup.stats()
+    assert stats["checked"] == 200 and stats["duplicates"] == 100 and stats["spilled_ids"] == 100
+    dedup.close()
+
+def test_bloom_deduplicator_false_positive_rate():
+    dedup = BloomDeduplicator(capacity=10000, false_positive_rate=0.01)
+    assert not dedup.seen({"event_id": "evt-1"})
+    assert dedup.seen({"event_id": "evt-1"})
+    false_positives = sum(dedup.seen({"event_id": f"new-{i}"}) for i in range(10000))
+    # 1% at full capacity, with some slack
+    assert false_positives < 200
+    assert dedup.memory_bytes() < 64000
+
+def test_bloom_filter_meets_rate_at_capacity():
+    for false_positive_rate in (0.01, 0.001, 0.0001):
+        bloom = BloomFilter(20000, false_positive_rate)
+        for i in range(20000):
+            bloom.add(f"evt-{i}")
+        probes = round(50 / false_positive_rate)
+        false_positives = sum(f"other-{i}" in bloom for i in range(probes))
+        # the filter is sized for the rate, the tolerance covers the sampling noise of ~50 expected hits
+        assert false_positives <= 1.5 * false_positive_rate * probes
+
+def test_windowed_deduplicator_window():
+    dedup = WindowedDeduplicator(window=3)
+    ids = ["a", "b", "a", "c", "d", "e", "a"]
+    assert [dedup.seen({"event_id": event_id}) for event_id in ids] == [False, False, True, False, False, False, False]
+
+    dedup = WindowedDeduplicator(window=60, time_key="ts")
+    events = [{"event_id": "a", "ts": 0}, {"event_id": "a", "ts": 59}, {"event_id": "a", "ts": 200}]
+    assert [dedup.seen(event) for event in events] == [False, True, False]
+
+def test_event_deduplicator_is_abstract():
+    try:
+        EventDeduplicator()
+        assert False
+    except TypeError:
+        pass
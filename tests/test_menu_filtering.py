@@ -0,0 +1,307 @@
+import json
+
+from solutions.menu_filtering import MenuFilteringService
+
+def test_filter_menu_success():
+    service = MenuFilteringService()
+    
+    menu_json = """
+    {
+        "categories": [
+            {"category_name": "Appetizers", "items": [
+            {"name": "Spring Rolls", "price": 8.00, "is_available": true, "dietary_tags": ["vegan"]},
+            {"name": "Chicken Wings", "price": 14.00, "is_available": true, "dietary_tags": []}
+            ]},
+            {"category_name": "Main Courses", "items": [
+            {"name": "Green Curry", "price": 18.00, "is_available": true, "dietary_tags": ["vegan", "gluten_free"]},
+            {"name": "Pad Thai", "price": 16.00, "is_available": false, "dietary_tags": ["gluten_free"]}
+            ]}
+        ]
+    }
+    """
+
+    filters_json = """
+        {
+        "max_price": 15.00,
+        "dietary_tags": ["vegan"]
+        }
+    """
+
+    expected_result = """{
+        "categories": [
+            {
+                "category_name": "Appetizers", "items": [
+                    {"name": "Spring Rolls", "price": 8.00, "is_available": true, "dietary_tags": ["vegan"]}
+                ]
+            }
+        ]
+    }"""
+
+    filtered_menu = service.filter_menu(menu_json, filters_json)
+    assert filtered_menu == json.loads(expected_result)
+
+def test_filter_menu_no_filter():
+    service = MenuFilteringService()
+    
+    menu_json = """
+    {
+        "categories": [
+            {"category_name": "Appetizers", "items": [
+            {"name": "Spring Rolls", "price": 8.00, "is_available": true, "dietary_tags": ["vegan"]},
+            {"name": "Chicken Wings", "price": 14.00, "is_available": true, "dietary_tags": []}
+            ]},
+            {"category_name": "Main Courses", "items": [
+            {"name": "Green Curry", "price": 18.00, "is_available": true, "dietary_tags": ["vegan", "gluten_free"]},
+            {"name": "Pad Thai", "price": 16.00, "is_available": false, "dietary_tags": ["gluten_free"]}
+            ]}
+        ]
+    }
+    """
+
+    filters_json = """{}"""
+
+    expected_result = """
+    {
+        "categories": [
+            {"category_name": "Appetizers", "items": [
+            {"name": "Spring Rolls", "price": 8.00, "is_available": true, "dietary_tags": ["vegan"]},
+            {"name": "Chicken Wings", "price": 14.00, "is_available": true, "dietary_tags": []}
+            ]},
+            {"category_name": "Main Courses", "items": [
+            {"name": "Green Curry", "price": 18.00, "is_available": true, "dietary_tags": ["vegan", "gluten_free"]}
+            ]}
+        ]
+    }
+    """
+
+    filtered_menu = service.filter_menu(menu_json, filters_json)
+    assert filtered_menu == json.loads(expected_result)
+
+def test_filter_menu_no_dietary_tag():
+    service = MenuFilteringService()
+    
+    menu_json = """
+    {
+        "categories": [
+            {"category_name": "Appetizers", "items": [
+            {"name": "Spring Rolls", "price": 8.00, "is_available": true, "dietary_tags": ["vegan"]},
+            {"name": "Chicken Wings", "price": 14.00, "is_available": true, "dietary_tags": []}
+            ]},
+            {"category_name": "Main Courses", "items": [
+            {"name": "Green Curry", "price": 18.00, "is_available": true, "dietary_tags": ["vegan", "gluten_free"]},
+            {"name": "Pad Thai", "price": 16.00, "is_available": false, "dietary_tags": ["gluten_free"]}
+            ]}
+        ]
+    }
+    """
+
+    filters_json = """
+        {
+        "max_price": 16.00
+        }
+    """
+
+    expected_result = """
+    {
+        "categories": [
+            {"category_name": "Appetizers", "items": [
+            {"name": "Spring Rolls", "price": 8.00, "is_available": true, "dietary_tags": ["vegan"]},
+            {"name": "Chicken Wings", "price": 14.00, "is_available": true, "dietary_tags": []}
+            ]}
+        ]
+    }
+    """
+
+    filtered_menu = service.filter_menu(menu_json, filters_json)
+    assert filtered_menu == json.loads(expected_result)
+
+def test_filter_menu_invalid_filter_max_price():
+    service = MenuFilteringService()
+    
+    menu_json = """
+    {
+        "categories": [
+            {"category_name": "Appetizers", "items": [
+            {"name": "Spring Rolls", "price": 8.00, "is_available": true, "dietary_tags": ["vegan"]},
+            {"name": "Chicken Wings", "price": 14.00, "is_available": true, "dietary_tags": []}
+            ]},
+            {"category_name": "Main Courses", "items": [
+            {"name": "Green Curry", "price": 18.00, "is_available": true, "dietary_tags": ["vegan", "gluten_free"]},
+            {"name": "Pad Thai", "price": 16.00, "is_available": false, "dietary_tags": ["gluten_free"]}
+            ]}
+        ]
+    }
+    """
+
+    filters_json = """
+        {
+        "max_price": "ABC",
+        "dietary_tags": ["vegan"]
+        }
+    """
+
+    expected_result = """
+    {
+        "categories": [
+            {"category_name": "Appetizers", "items": [
+            {"name": "Spring Rolls", "price": 8.00, "is_available": true, "dietary_tags": ["vegan"]}
+            ]},
+            {"category_name": "Main Courses", "items": [
+            {"name": "Green Curry", "price": 18.00, "is_available": true, "dietary_tags": ["vegan", "gluten_free"]}
+            ]}
+        ]
+    }
+    """
+
+    filtered_menu = service.filter_menu(menu_json, filters_json)
+    assert filtered_menu == json.loads(expected_result)
+
+def test_filter_menu_many_matches_filter_menu():
+    service = MenuFilteringService()
+
+    menu_json = """
+    {
+        "categories": [
+            {"category_name": "Appetizers", "items": [
+            {"name": "Spring Rolls", "price": 8.00, "is_available": true, "dietary_tags": ["vegan"]},
+            {"name": "Chicken Wings", "price": 14.00, "is_available": true, "dietary_tags": []}
+            ]},
+            {"category_name": "Main Courses", "items": [
+            {"name": "Green Curry", "price": 18.00, "is_available": true, "dietary_tags": ["vegan", "gluten_free"]},
+            {"name": "Pad Thai", "price": 16.00, "is_available": false, "dietary_tags": ["gluten_free"]},
+            {"name": "Mystery Dish", "price": "ABC", "is_available": true}
+            ]}
+        ]
+    }
+    """
+
+    filters = [
+        {"max_price": 15.00, "dietary_tags": ["vegan"]},
+        {},
+        {"max_price": 16.00},
+        {"max_price": "ABC", "dietary_tags": ["vegan"]},
+        {"dietary_tags": ["vegan", "gluten_free"]},
+        {"dietary_tags": ["halal"]}
+    ]
+
+    filtered_menus = service.filter_menu_many(menu_json, json.dumps(filters))
+    assert filtered_menus == [service.filter_menu(menu_json, json.dumps(f)) for f in filters]
+
+    item_ids = service.filter_menu_many(menu_json, json.dumps(filters), ids_only=True)
+    assert item_ids == [[0], [0, 1, 2], [0, 1], [0, 2], [2], []]
+
+def test_filter_menu_null_dietary_tags():
+    service = MenuFilteringService()
+    # a null dietary_tags is treated like a missing one, in every filtering path
+    menu_json = json.dumps({"categories": [{"category_name": "Mains", "items": [
+        {"name": "Plain Rice", "price": 4.00, "is_available": True, "dietary_tags": None},
+        {"name": "Green Curry", "price": 18.00, "is_available": True, "dietary_tags": ["vegan", ["unhashable"]]},
+        {"name": "Pad Thai", "price": 16.00, "is_available": False, "dietary_tags": None}
+    ]}]})
+    filters = [{}, {"dietary_tags": ["vegan"]}, {"dietary_tags": None, "max_price": 10}]
+
+    expected = [
+        {"categories": [{"category_name": "Mains", "items": [json.loads(menu_json)["categories"][0]["items"][i] for i in ids]}]}
+        for ids in ([0, 1], [1], [0])
+    ]
+    assert [service.filter_menu(menu_json, json.dumps(f)) for f in filters] == expected
+    assert service.filter_menu_many(menu_json, json.dumps(filters)) == expected
+    assert [service.search_menu(menu_json, json.dumps(f)) for f in filters] == expected
+
+def test_filter_menu_many_invalid_json():
+    service = MenuFilteringService()
+    assert service.filter_menu_many("asdf", "[]") == []
+    assert service.filter_menu_many("{}", """{"max_price": 10}""") == []
+
+def test_search_menu_name_query():
+    service = MenuFilteringService()
+
+    menu_json = """
+    {
+        "categories": [
+            {"category_name": "Appetizers", "items": [
+            {"name": "Spring Rolls", "price": 8.00, "is_available": true, "dietary_tags": ["vegan"]},
+            {"name": "Chicken Wings", "price": 14.00, "is_available": true, "dietary_tags": []}
+            ]},
+            {"category_name": "Main Courses", "items": [
+            {"name": "Green Curry", "price": 18.00, "is_available": true, "dietary_tags": ["vegan", "gluten_free"]},
+            {"name": "Pad Thai", "price": 16.00, "is_available": false, "dietary_tags": ["gluten_free"]},
+            {"name": "Chicken Pad Thai", "price": 17.00, "is_available": true, "dietary_tags": ["gluten_free"]}
+            ]}
+        ]
+    }
+    """
+
+    filtered_menu = service.search_menu(menu_json, """{"name_query": "chick"}""")
+    assert [item["name"] for c in filtered_menu["categories"] for item in c["items"]] == ["Chicken Wings", "Chicken Pad Thai"]
+
+    # Pad Thai is not available, so only one item is left and Appetizers is dropped
+    filtered_menu = service.search_menu(menu_json, """{"name_query": "PAD th"}""")
+    assert filtered_menu == {"categories": [{"category_name": "Main Courses", "items": [
+        {"name": "Chicken Pad Thai", "price": 17.00, "is_available": True, "dietary_tags": ["gluten_free"]}
+    ]}]}
+
+    filtered_menu = service.search_menu(menu_json, """{"name_query": "chick", "max_price": 15.00}""")
+    assert filtered_menu == {"categories": [{"category_name": "Appetizers", "items": [
+        {"name": "Chicken Wings", "price": 14.00, "is_available": True, "dietary_tags": []}
+    ]}]}
+
+    assert service.search_menu(menu_json, """{"name_query": "chicken curry"}""") == {"categories": []}
+    assert service.search_menu(menu_json, """{"name_query": "chick", "dietary_tags": ["vegan"]}""") == {"categories": []}
+
+    # a query without any word matches nothing, an empty one does not filter by name
+    for name_query in ["!!", "   ", "-"]:
+        assert service.search_menu(menu_json, json.dumps({"name_query": name_query})) == {"categories": []}
+    assert service.search_menu(menu_json, """{"name_query": ""}""") == service.filter_menu(menu_json, "{}")
+
+    # the caller can hold the index, the service only keeps a digest of the menu text
+    menu_index = service.build_menu_index(menu_json)
+    assert service.search_menu(menu_index, """{"name_query": "chick"}""") == service.search_menu(menu_json, """{"name_query": "chick"}""")
+    assert all(isinstance(key, bytes) for key in service.menu_indexes)
+
+def test_menu_search_index_prefix_range():
+    service = MenuFilteringService()
+    names = ["zz top", "zulu", "apple pie", "apricot", "ap", "b", "az", "yz", "z9"]
+    menu = {"categories": [{"category_name": "Mains", "items": [
+        {"name": name, "price": 10.0, "is_available": True} for name in names
+    ]}]}
+    index = service.build_menu_index(json.dumps(menu))
+    for prefix in ["a", "ap", "apr", "z", "zz", "zzz", "9", "y", "b", "pie", "c"]:
+        expected = [idx for idx, name in enumerate(names) if any(word.startswith(prefix) for word in name.split())]
+        assert index.search(prefix, float("inf"), []) == expected
+
+def test_menu_search_index_prefix_cache_is_bounded():
+    service = MenuFilteringService()
+    menu = {"categories": [{"category_name": "Mains", "items": [
+        {"name": f"Dish {i} chicken", "price": 10.0, "is_available": True} for i in range(50)
+    ]}]}
+    index = service.build_menu_index(json.dumps(menu))
+    index.max_cached_prefixes = 4
+    expected = index.search("chi", float("inf"), [])
+    # every distinct typed query adds a prefix, the cache keeps the last ones only
+    for i in range(50):
+        assert index.search(f"chi {i}", float("inf"), []) == [j for j in range(50) if str(j).startswith(str(i))]
+        assert len(index.prefix_cache) <= 4
+    assert index.search("chi", float("inf"), []) == expected and list(index.prefix_cache)[-1] == "chi"
+
+def test_search_menu_matches_filter_menu():
+    service = MenuFilteringService()
+
+    menu_json = """
+    {
+        "categories": [
+            {"category_name": "Appetizers", "items": [
+            {"name": "Spring Rolls", "price": 8.00, "is_available": true, "dietary_tags": ["vegan"]},
+            {"name": "Chicken Wings", "price": 14.00, "is_available": true, "dietary_tags": []}
+            ]},
+            {"category_name": "Main Courses", "items": [
+            {"name": "Green Curry", "price": 18.00, "is_available": true, "dietary_tags": ["vegan", "gluten_free"]},
+            {"name": "Pad Thai", "price": 16.00, "is_available": false, "dietary_tags": ["gluten_free"]}
+            ]}
+        ]
+    }
+    """
+
+    for filters_json in ["""{"max_price": 15.00, "dietary_tags": ["vegan"]}""", "{}", """{"max_price": "ABC"}"""]:
+        assert service.search_menu(menu_json, filters_json) == service.filter_menu(menu_json, filters_json)
+    assert service.search_menu("asdf", "{}") == {}
@@ -0,0 +1,38 @@
+import numpy as np
+
+from solutions.money import MoneyParser
+
+def test_money_parser_matches_float():
+    amounts = [
+        "14.99", "6.15", "2.50", "0", "-5", "+5", "5.", ".5", "-.05", "007.10", " 14.99 ", "1e3", "0.125", "1_000.5",
+        "", ".", "-", "+-5", "ABC14.99", "14.99ABC", "1.2.3", "inf", "nan", "١٢", "²", 3.99, 5, -0.3, True
+    ]
+    parser = MoneyParser()
+    for _ in range(2):
+        for amount in amounts:
+            try:
+                expected = round(float(amount) * 100)
+            except (ValueError, OverflowError):
+                expected = ValueError
+            try:
+                cents = parser.cents(amount)
+            except ValueError:
+                cents = ValueError
+            assert cents == expected, amount
+    # the strings are parsed once, the second round only hits the cache
+    assert parser.cache_hits == parser.fast_path + parser.fallbacks
+    assert parser.fast_path == 10
+
+    dollars = MoneyParser(strip_dollar=True)
+    assert dollars.cents("$50.00") == 5000 and dollars.cents("$$10.5") == 1050 and dollars.cents(25.5) == 2550
+    for amount in ("$$%!50.00", "$", None, [1]):
+        try:
+            dollars.cents(amount)
+            assert False
+        except (ValueError, TypeError):
+            pass
+
+def test_money_parser_column():
+    cents, valid = MoneyParser(strip_dollar=True).cents_column(["$50.00", "$10.50", None, "$50.00", "bad", 2.5, [1]])
+    assert cents.dtype == np.int64 and cents.tolist() == [5000, 1050, 0, 5000, 0, 250, 0]
+    assert valid.tolist() == [True, True, False, True, False, True, False]
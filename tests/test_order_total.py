@@ -0,0 +1,78 @@
+from solutions.order_total import calculate_order_total
+
+def test_calculate_order_total():
+    input = """
+    {
+        "order_id": "ord-123",
+        "subtotal_estimate": "45.00",
+        "items": [
+            {"item_id": "i-1", "name": "Chicken Wings", "price": "14.99", "quantity": 1},
+            {"item_id": "i-2", "name": "Coke Zero", "price": "2.50", "quantity": 2}
+        ],
+        "promotions": {
+            "FALL20": {"type": "PERCENT", "value": 0.20, "is_active": true},
+            "WELCOME5": {"type": "FIXED", "value": 5.00, "is_active": false}
+        },
+        "adjustments": [
+            {"name": "Service Fee", "amount": 3.99},
+            {"name": "Delivery Fee", "amount": 5.00},
+            {"name": "Small Order Fee", "amount": null}
+        ],
+        "tip": "6.15"
+    }
+    """
+    order_total = calculate_order_total(input)
+    assert order_total == 31.13
+
+def test_calculate_order_total_fail():
+    input = """hello"""
+    order_total = calculate_order_total(input)
+    assert order_total == 0
+
+def test_calculate_order_total_invalid_tip():
+    input = """
+    {
+        "order_id": "ord-123",
+        "subtotal_estimate": "45.00",
+        "items": [
+            {"item_id": "i-1", "name": "Chicken Wings", "price": "14.99", "quantity": 1},
+            {"item_id": "i-2", "name": "Coke Zero", "price": "2.50", "quantity": 2}
+        ],
+        "promotions": {
+            "FALL20": {"type": "PERCENT", "value": 0.20, "is_active": true},
+            "WELCOME5": {"type": "FIXED", "value": 5.00, "is_active": false}
+        },
+        "adjustments": [
+            {"name": "Service Fee", "amount": 3.99},
+            {"name": "Delivery Fee", "amount": 5.00},
+            {"name": "Small Order Fee", "amount": null}
+        ],
+        "tip": "ACD6.15"
+    }
+    """
+    order_total = calculate_order_total(input)
+    assert order_total == round(31.13 - 6.15, 2)
+
+def test_calculate_order_total_invalid_price():
+    input = """
+    {
+        "order_id": "ord-123",
+        "subtotal_estimate": "45.00",
+        "items": [
+            {"item_id": "i-1", "name": "Chicken Wings", "price": "ABC14.99", "quantity": 1},
+            {"item_id": "i-2", "name": "Coke Zero", "price": "2.50", "quantity": 2}
+        ],
+        "promotions": {
+            "FALL20": {"type": "PERCENT", "value": 0.20, "is_active": true},
+            "WELCOME5": {"type": "FIXED", "value": 5.00, "is_active": false}
+        },
+        "adjustments": [
+            {"name": "Service Fee", "amount": 3.99},
+            {"name": "Delivery Fee", "amount": 5.00},
+            {"name": "Small Order Fee", "amount": null}
+        ],
+        "tip": "6.15"
+    }
+    """
+    order_total = calculate_order_total(input)
+    assert order_total == 19.14
@@ -0,0 +1,132 @@
+from solutions.order_validation import OrderValidationService
+
+def test_process_order_success():
+    service = OrderValidationService()
+    input_json = """
+    {
+        "orderId": "A-987",
+        "custId": "user-554",
+        "delivery_address": "123 Main St, Toronto, M5V 2K1",
+        "items": {
+            "1002": {"name": "Bag of Chips", "quantity": 2},
+            "2005": {"name": "Energy Drink", "quantity": 1}
+        }
+    }
+    """
+
+    expected_order = {
+        "order_id": "A-987",
+        "customer_id": "user-554",
+        "delivery_address": {"address": "123 Main St", "city": "Toronto", "zipcode": "M5V 2K1"},
+        "items": [
+            {"item_id": 1002, "name": "Bag of Chips", "quantity": 2},
+            {"item_id": 2005, "name": "Energy Drink", "quantity": 1}
+        ]
+    }
+    order = service.process_order(input_json)
+    assert order == expected_order
+
+def test_process_order_invalid_json():
+    service = OrderValidationService()
+    input_json = """asdf"""
+    order = service.process_order(input_json)
+    assert order == {}
+
+def test_process_order_invalid_order_id():
+    service = OrderValidationService()
+    input_json = """
+    {
+        "custId": "user-554",
+        "delivery_address": "123 Main St, Toronto, M5V 2K1",
+        "items": {
+            "1002": {"name": "Bag of Chips", "quantity": 2},
+            "2005": {"name": "Energy Drink", "quantity": 1}
+        }
+    }
+    """
+
+    expected_order = {
+        "order_id": 0,
+        "customer_id": "user-554",
+        "delivery_address": {"address": "123 Main St", "city": "Toronto", "zipcode": "M5V 2K1"},
+        "items": [
+            {"item_id": 1002, "name": "Bag of Chips", "quantity": 2},
+            {"item_id": 2005, "name": "Energy Drink", "quantity": 1}
+        ]
+    }
+    order = service.process_order(input_json)
+    assert order == expected_order
+
+def test_process_order_invalid_customer_id():
+    service = OrderValidationService()
+    input_json = """
+    {
+        "orderId": "A-987",
+        "delivery_address": "123 Main St, Toronto, M5V 2K1",
+        "items": {
+            "1002": {"name": "Bag of Chips", "quantity": 2},
+            "2005": {"name": "Energy Drink", "quantity": 1}
+        }
+    }
+    """
+    order = service.process_order(input_json)
+    assert order == {}
+
+def test_process_order_invalid_delivery_address():
+    service = OrderValidationService()
+    input_json = """
+    {
+        "orderId": "A-987",
+        "custId": "user-554",
+        "delivery_address": "Toronto, M5V 2K1",
+        "items": {
+            "1002": {"name": "Bag of Chips", "quantity": 2},
+            "2005": {"name": "Energy Drink", "quantity": 1}
+        }
+    }
+    """
+    order = service.process_order(input_json)
+    print(order)
+    assert order == {}
+
+def test_process_order_no_items():
+    service = OrderValidationService()
+    input_json = """
+    {
+        "orderId": "A-987",
+        "custId": "user-554",
+        "delivery_address": "123 Main St, Toronto, M5V 2K1",
+        "items": {
+            "asdf1002": {"name": "Bag of Chips", "quantity": 2}
+        }
+    }
+    """
+
+    order = service.process_order(input_json)
+    assert order == {}
+
+def test_process_order_invalid_item():
+    service = OrderValidationService()
+    input_json = """
+    {
+        "orderId": "A-987",
+        "custId": "user-554",
+        "delivery_address": "123 Main St, Toronto, M5V 2K1",
+        "items": {
+            "sasdf1002": {"name": "Bag of Chips", "quantity": 2},
+            "2005": {"name": "Energy Drink", "quantity": 1}
+        }
+    }
+    """
+
+    expected_order = {
+        "order_id": "A-987",
+        "customer_id": "user-554",
+        "delivery_address": {"address": "123 Main St", "city": "Toronto", "zipcode": "M5V 2K1"},
+        "items": [
+            {"item_id": 2005, "name": "Energy Drink", "quantity": 1}
+        ]
+    }
+    order = service.process_order(input_json)
+    print(order)
+    assert order == expected_order
@@ -0,0 +1,54 @@
+from solutions.orders_net_total import calculate_orders_net_total
+from solutions.event_dedup import BloomDeduplicator, ExactDeduplicator, WindowedDeduplicator
+
+def test_calculate_orders_net_total_no_input():
+    input = """[]"""
+    assert calculate_orders_net_total(input) == {}
+
+def test_calculate_orders_net_total_success():
+    input = """[
+        {"event_id": "e-1", "type": "CHARGE", "order_id": "order-100", "amount": "$50.00"},
+        {"event_id": "e-2", "type": "AUTH", "dasher_id": "d-123"},
+        {"event_id": "e-3", "type": "CHARGE", "order_id": "order-200", "amount": "$25.50"},
+        {"event_id": "e-4", "type": "REFUND", "order_id": "order-100", "amount": "$10.50"},
+        {"event_id": "e-5", "type": "CHARGE", "order_id": "order-100", "amount": "$5.00"}
+    ]"""
+    assert calculate_orders_net_total(input) == {'order-100': 44.5, 'order-200': 25.5}
+
+def test_calculate_orders_net_total_negative_total():
+    input = """[
+        {"event_id": "e-1", "type": "CHARGE", "order_id": "order-100", "amount": "$50.00"},
+        {"event_id": "e-2", "type": "AUTH", "dasher_id": "d-123"},
+        {"event_id": "e-3", "type": "CHARGE", "order_id": "order-200", "amount": "$25.50"},
+        {"event_id": "e-4", "type": "REFUND", "order_id": "order-100", "amount": "$60.50"},
+        {"event_id": "e-5", "type": "CHARGE", "order_id": "order-100", "amount": "$5.00"}
+    ]"""
+    assert calculate_orders_net_total(input) == {'order-100': -5.5, 'order-200': 25.5}
+
+def test_calculate_orders_net_total_invalid_json():
+    input = "hey"
+    assert calculate_orders_net_total(input) == {}
+
+def test_calculate_orders_net_total_invalid_amount():
+    input = """[
+        {"event_id": "e-1", "type": "CHARGE", "order_id": "order-100", "amount": "$$%!50.00"},
+        {"event_id": "e-2", "type": "AUTH", "dasher_id": "d-123"},
+        {"event_id": "e-4", "type": "REFUND", "order_id": "order-100", "amount": "$60.50"},
+        {"event_id": "e-5", "type": "CHARGE", "order_id": "order-100", "amount": "$5.00"}
+    ]"""
+
+    assert calculate_orders_net_total(input) == {"order-100": -55.5}
+
+def test_calculate_orders_net_total_redelivered_events():
+    input = """[
+        {"event_id": "e-1", "type": "CHARGE", "order_id": "order-100", "amount": "$50.00"},
+        {"event_id": "e-4", "type": "REFUND", "order_id": "order-100", "amount": "$10.50"},
+        {"event_id": "e-1", "type": "CHARGE", "order_id": "order-100", "amount": "$50.00"},
+        {"event_id": "e-4", "type": "REFUND", "order_id": "order-100", "amount": "$10.50"},
+        {"event_id": "e-5", "type": "CHARGE", "order_id": "order-100", "amount": "$5.00"}
+    ]"""
+    assert calculate_orders_net_total(input) == {'order-100': 84.0}
+    for deduplicator in (ExactDeduplicator(max_memory_ids=1), BloomDeduplicator(1000), WindowedDeduplicator(2)):
+        assert calculate_orders_net_total(input, deduplicator) == {'order-100': 44.5}
+        assert deduplicator.stats()["duplicates"] == 2
+        deduplicator.close()
@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+
+import solutions
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_python(code: str) -> str:
+    # a fresh interpreter, so the modules already imported by the other tests do not count
+    return subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+
+def test_import_is_lazy():
+    output = run_python(
+        "import sys\n"
+        "import solutions\n"
+        "print(sorted(name for name in sys.modules if name.startswith('solutions.')), 'numpy' in sys.modules)\n"
+        "import solutions.order_total\n"
+        "print(sorted(name for name in sys.modules if name.startswith('solutions.')), 'numpy' in sys.modules)\n"
+    )
+    assert output.split("\n")[:2] == ["[] False", "['solutions.money', 'solutions.order_total'] False"]
+
+def test_aggregators_do_not_load_unused_modules():
+    # the deduplicators and the profit views are passed in by the caller, importing the functions does not load them
+    output = run_python(
+        "import sys\n"
+        "import solutions.reconciliation, solutions.orders_net_total\n"
+        "print(sorted(name for name in sys.modules if name in ('solutions.event_dedup', 'solutions.profit_views')))\n"
+    )
+    assert output == "[]\n"
+
+def test_services_defer_numpy_and_sqlite():
+    # numpy is imported by the functions that use it, sqlite3 only by the persistence module
+    output = run_python(
+        "import sys\n"
+        "import solutions.delivery_assignment, solutions.delivery_distances, solutions.menu_filtering\n"
+        "print('numpy' in sys.modules, 'sqlite3' in sys.modules)\n"
+    )
+    assert output == "False False\n"
+
+def test_submodules_import_without_side_effects():
+    # no test runs and nothing is printed when a module is loaded
+    names = list(solutions.SOLUTION_FILES) + list(solutions.SHARED_MODULES)
+    assert run_python("".join(f"import solutions.{name}\n" for name in names)) == ""
+
+def test_attribute_access():
+    from solutions import delivery_assignment
+    assert solutions.delivery_assignment is delivery_assignment
+    assert delivery_assignment.DeliveryAssignmentService.__module__ == "solutions.delivery_assignment"
+    assert "order_total" in dir(solutions)
+    try:
+        solutions.problem_full_1
+        assert False
+    except AttributeError:
+        pass
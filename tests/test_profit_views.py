@@ -0,0 +1,34 @@
+import random
+
+from solutions.profit_views import ProfitViews, RankTracker
+
+def test_rank_tracker_matches_sorting():
+    rng = random.Random(7)
+    for k in (1, 5, 50):
+        revenues = {}
+        top = RankTracker(k, largest=True, slack=3)
+        bottom = RankTracker(k, largest=False, slack=3)
+        for step in range(5000):
+            order_id = f"order-{rng.randrange(300)}"
+            revenues[order_id] = revenues.get(order_id, 0.0) + rng.uniform(-20, 25)
+            top.update(order_id, revenues[order_id])
+            bottom.update(order_id, revenues[order_id])
+            if step % 97 == 0:
+                expected = sorted(revenues.items(), key=lambda item: item[1], reverse=True)
+                assert [v for _, v in top.query(revenues)] == [v for _, v in expected[:k]]
+                assert [v for _, v in bottom.query(revenues)] == [v for _, v in expected[::-1][:k]]
+        assert top.rebuilds < 5000 // 97
+
+def test_threshold_watcher_crossings():
+    views = ProfitViews(k=2)
+    revenues = {}
+    for order_id, amount in (("A", 10.0), ("B", -5.0), ("A", -12.0), ("C", -0.004), ("B", 6.0), ("D", -1.0)):
+        old_value = revenues.get(order_id)
+        revenues[order_id] = (old_value or 0.0) + amount
+        views.update(revenues, order_id, old_value, revenues[order_id])
+    # C rounds to -0.0, so it is not clamped
+    assert views.count_below() == 2
+    assert sorted(views.ids_below()) == ["A", "D"]
+    assert views.least_profitable() == [("A", -2.0), ("D", -1.0)]
+    assert views.most_profitable(1) == [("B", 1.0)]
+    views.close()
@@ -0,0 +1,264 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from collections import defaultdict
+
+from solutions.reconciliation import (
+    apply_transaction, CSVResultWriter, DictResultWriter, iter_transactions, NDJSONResultWriter, reconcile_transactions,
+    reconcile_transactions_parallel, reconcile_transactions_stream, ResumableReconciliation
+)
+from solutions.event_dedup import BloomDeduplicator, ExactDeduplicator, WindowedDeduplicator
+from solutions.profit_views import ProfitViews
+
+def test_reconcile_transactions_success():
+
+    input_json = """
+        [
+            { "event_id": "evt-1", "type": "CHARGE", "order_id": "A100", "amount": 45.50 },
+            { "event_id": "evt-2", "type": "DASHER_PAY", "order_id": "A100", "amount": 8.00 },
+            { "event_id": "evt-3", "type": "DASHER_ONLINE", "dasher_id": "D123" },
+            { "event_id": "evt-4", "type": "CHARGE", "order_id": "B200", "amount": 22.00 },
+            { "event_id": "evt-5",
+                "type": "ADJUSTMENT",
+                "order_id": "A100",
+                "payload": "{\\"reason\\": \\"Customer complaint\\", \\"amount\\": -5.00}"
+            },
+            { "event_id": "evt-6", "type": "DASHER_PAY", "order_id": "B200", "amount": 6.50 },
+            { "event_id": "evt-7", "type": "REFUND", "order_id": "B200", "amount": 22.00 }
+        ]
+    """
+    order_with_revenues = reconcile_transactions(input_json)
+    assert order_with_revenues == {'A100': 32.5, 'B200': 0}
+
+def test_reconcile_transactions_json_fail():
+
+    input_json = """ asfd   """
+    order_with_revenues = reconcile_transactions(input_json)
+    assert order_with_revenues == {}
+
+def test_reconcile_transactions_payload_fail():
+    input_json = """
+        [
+            { "event_id": "evt-1", "type": "CHARGE", "order_id": "A100", "amount": 45.50 },
+            { "event_id": "evt-2", "type": "DASHER_PAY", "order_id": "A100", "amount": 8.00 },
+            { "event_id": "evt-3", "type": "DASHER_ONLINE", "dasher_id": "D123" },
+            { "event_id": "evt-4", "type": "CHARGE", "order_id": "B200", "amount": 22.00 },
+            { "event_id": "evt-5",
+                "type": "ADJUSTMENT",
+                "order_id": "A100",
+                "payload": "asfd"
+            },
+            { "event_id": "evt-6", "type": "DASHER_PAY", "order_id": "B200", "amount": 6.50 },
+            { "event_id": "evt-7", "type": "REFUND", "order_id": "B200", "amount": 22.00 }
+        ]
+    """
+    order_with_revenues = reconcile_transactions(input_json)
+    assert order_with_revenues == {'A100': 37.5, 'B200': 0}
+
+def test_reconcile_transactions_no_order_id():
+    input_json = """
+        [
+            { "event_id": "evt-1", "type": "CHARGE", "order_id": "A100", "amount": 45.50 },
+            { "event_id": "evt-2", "type": "DASHER_PAY", "amount": 8.00 }
+        ]
+    """
+    order_with_revenues = reconcile_transactions(input_json)
+    assert order_with_revenues == {'A100': 45.50}
+
+def test_reconcile_transactions_empty_result():
+    input_json = """
+        [
+            { "event_id": "evt-1", "type": "CHARGE", "amount": 45.50 },
+            { "event_id": "evt-2", "type": "DASHER_PAY", "amount": 8.00 },
+        ]
+    """
+    order_with_revenues = reconcile_transactions(input_json)
+    assert order_with_revenues == {}
+
+def test_reconcile_transactions_stream_json_array():
+    input_json = """
+        [
+            { "event_id": "evt-1", "type": "CHARGE", "order_id": "A100", "amount": 45.50 },
+            { "event_id": "evt-2", "type": "DASHER_PAY", "order_id": "A100", "amount": 8.00 },
+            { "event_id": "evt-3", "type": "DASHER_ONLINE", "dasher_id": "D123" },
+            { "event_id": "evt-4", "type": "CHARGE", "order_id": "B200", "amount": 22.00 },
+            { "event_id": "evt-5",
+                "type": "ADJUSTMENT",
+                "order_id": "A100",
+                "payload": "{\\"reason\\": \\"Customer complaint\\", \\"amount\\": -5.00}"
+            },
+            { "event_id": "evt-6", "type": "DASHER_PAY", "order_id": "B200", "amount": 6.50 },
+            { "event_id": "evt-7", "type": "REFUND", "order_id": "B200", "amount": 22.00 }
+        ]
+    """
+    # a tiny chunk size makes the events cross the chunk boundaries
+    for chunk_size in (7, 64, 1 << 16):
+        output = io.StringIO()
+        orders_written = reconcile_transactions_stream(io.StringIO(input_json), NDJSONResultWriter(output), chunk_size)
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert orders_written == 2
+        assert {r["order_id"]: r["net_profit"] for r in results} == reconcile_transactions(input_json)
+
+def test_reconcile_transactions_stream_ndjson_to_csv():
+    input_ndjson = (
+        '{"event_id": "evt-1", "type": "CHARGE", "order_id": "A100", "amount": 45.50}\n'
+        '\n'
+        '{"event_id": "evt-2", "type": "DASHER_PAY", "order_id": "A100", "amount": 8.00}\n'
+        '{"event_id": "evt-3", "type": "DASHER_ONLINE", "dasher_id": "D123"}\n'
+        '{"event_id": "evt-7", "type": "REFUND", "order_id": "B200", "amount": 22.00}'
+    )
+    for chunk_size in (5, 1 << 16):
+        output = io.StringIO()
+        assert reconcile_transactions_stream(io.StringIO(input_ndjson), CSVResultWriter(output), chunk_size) == 2
+        assert list(csv.reader(io.StringIO(output.getvalue()))) == [["order_id", "net_profit"], ["A100", "37.5"], ["B200", "0.0"]]
+
+def test_reconcile_transactions_stream_json_fail():
+    for input_json in (""" asfd   """, """[{"type": "CHARGE", "order_id": "A100", "amount": 1}, ]""", """[{"type": "CHARGE" """):
+        output = io.StringIO()
+        assert reconcile_transactions_stream(io.StringIO(input_json), NDJSONResultWriter(output)) == -1
+        assert output.getvalue() == ""
+
+def test_iter_transactions_malformed_event_reads_bounded():
+    class CountingStream(io.StringIO):
+        def __init__(self, text):
+            super().__init__(text)
+            self.chars_read = 0
+        def read(self, size=-1):
+            chunk = super().read(size)
+            self.chars_read += len(chunk)
+            return chunk
+
+    event = json.dumps({"event_id": "evt-1", "type": "CHARGE", "order_id": "A100", "amount": 1.0})
+    # a malformed event at the start of a big log fails without reading the rest of it
+    stream = CountingStream("[" + event + ', {"type": CHARGE}, ' + ", ".join([event] * 100000) + "]")
+    try:
+        list(iter_transactions(stream, chunk_size=1024, max_event_size=4096))
+        assert False
+    except json.JSONDecodeError:
+        pass
+    assert stream.chars_read <= 8 * 1024
+
+    # an event bigger than a chunk still parses
+    big_event = json.dumps({"event_id": "evt-2", "type": "CHARGE", "order_id": "A100", "amount": 2.0, "note": "x" * 3000})
+    assert len(list(iter_transactions(io.StringIO(f"[{event}, {big_event}]"), chunk_size=1024, max_event_size=4096))) == 2
+
+def test_iter_transactions_trailing_data():
+    for trailing in ("]", "x", "[]", ', {"type": "CHARGE"}'):
+        for chunk_size in (3, 1 << 16):
+            try:
+                list(iter_transactions(io.StringIO(f"[{{}}, {{}}]  {trailing}"), chunk_size))
+                assert False
+            except json.JSONDecodeError:
+                pass
+    assert list(iter_transactions(io.StringIO("[{}]  \n\n"), 3)) == [{}]
+    assert list(iter_transactions(io.StringIO("[ ]  \n"), 3)) == []
+
+def test_reconcile_transactions_stream_profit_views():
+    events = []
+    for i in range(4000):
+        tr_type = ("CHARGE", "DASHER_PAY", "REFUND")[i % 3]
+        events.append({"event_id": f"evt-{i}", "type": tr_type, "order_id": f"order-{(i * 7919) % 211}", "amount": round((1 + (i * 31 % 89) * 0.5) * (2.1 if tr_type == "CHARGE" else 1), 2)})
+
+    views = ProfitViews(k=10, thresholds=(0.0, 20.0))
+    orders_with_revenues = defaultdict(float)
+    for idx, tr in enumerate(events):
+        apply_transaction(orders_with_revenues, tr, views)
+        if idx % 500 == 0:
+            # queried mid-stream, checked against a full sort of the running revenues
+            ranked = sorted(orders_with_revenues.values())
+            assert [raw for _, raw in views.least_profitable()] == ranked[:10]
+            assert [raw for _, raw in views.most_profitable(3)] == ranked[::-1][:3]
+            assert views.count_below() == sum(1 for raw in ranked if round(raw, 2) < 0.0)
+
+    expected = reconcile_transactions(json.dumps(events))
+    assert sorted(views.ids_below()) == sorted(order_id for order_id, profit in expected.items() if profit == 0.0 and orders_with_revenues[order_id] < 0)
+    assert sorted(views.ids_below(20.0)) == sorted(order_id for order_id, profit in expected.items() if profit < 20.0)
+    views.close()
+
+    # the streaming reconciliation feeds the same views
+    views = ProfitViews(k=10)
+    writer = DictResultWriter()
+    reconcile_transactions_stream(io.StringIO("\n".join(json.dumps(tr) for tr in events)), writer, views=views)
+    assert writer.results == expected
+    assert [order_id for order_id, _ in views.least_profitable(1)] == [min(orders_with_revenues, key=orders_with_revenues.get)]
+    views.close()
+
+def test_reconcile_transactions_parallel_matches_serial():
+    events = []
+    for i in range(3000):
+        tr_type = ("CHARGE", "DASHER_PAY", "REFUND", "ADJUSTMENT", "DASHER_ONLINE")[i % 5]
+        tr = {"event_id": f"evt-{i}", "type": tr_type, "order_id": f"order-{i % 37}", "amount": round(0.1 + (i % 13) * 1.37, 2)}
+        if tr_type == "ADJUSTMENT":
+            tr["payload"] = json.dumps({"reason": "Customer complaint", "amount": -0.3 * (i % 7)})
+        if tr_type == "DASHER_ONLINE":
+            del tr["order_id"]
+        events.append(tr)
+    expected = reconcile_transactions(json.dumps(events))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ndjson_path = os.path.join(tmp_dir, "ledger.ndjson")
+        with open(ndjson_path, "w") as log_file:
+            log_file.write("\n".join(json.dumps(tr) for tr in events))
+        array_path = os.path.join(tmp_dir, "ledger.json")
+        with open(array_path, "w") as log_file:
+            log_file.write("[" + ",\n".join(json.dumps(tr) for tr in events) + "]")
+        pretty_path = os.path.join(tmp_dir, "ledger-pretty.json")
+        with open(pretty_path, "w") as log_file:
+            json.dump(events, log_file, indent=2)
+
+        for path in (ndjson_path, array_path, pretty_path):
+            for workers in (1, 3):
+                assert reconcile_transactions_parallel(path, workers) == expected
+
+def test_resumable_reconciliation_resume_after_crash():
+    events = []
+    for i in range(500):
+        tr_type = ("CHARGE", "DASHER_PAY", "ADJUSTMENT", "REFUND")[i % 4]
+        tr = {"event_id": f"evt-{i}", "type": tr_type, "order_id": f"order-{i % 23}" if i % 7 else i % 5, "amount": 0.1 * (i % 17)}
+        if tr_type == "ADJUSTMENT":
+            tr["payload"] = json.dumps({"amount": -0.07 * (i % 9)})
+        events.append(tr)
+    expected = reconcile_transactions(json.dumps(events))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_path = os.path.join(tmp_dir, "ledger.json")
+        with open(log_path, "w") as log_file:
+            log_file.write("[\n" + ",\n".join(json.dumps(tr) for tr in events) + "\n]\n")
+        checkpoint_path = os.path.join(tmp_dir, "ledger.ckpt")
+
+        # every job "crashes" after 130 events, the events after the last checkpoint are processed again
+        finished = False
+        jobs = 0
+        while not finished:
+            job = ResumableReconciliation(log_path, checkpoint_path, checkpoint_every=50)
+            finished = job.process(max_events=130)
+            jobs += 1
+        assert jobs > 4
+
+        writer = DictResultWriter()
+        assert job.run(writer) == len(expected)
+        assert writer.results == expected
+        assert not os.path.exists(checkpoint_path)
+
+def test_reconcile_transactions_redelivered_events():
+    input_json = """
+        [
+            { "event_id": "evt-1", "type": "CHARGE", "order_id": "A100", "amount": 45.50 },
+            { "event_id": "evt-2", "type": "DASHER_PAY", "order_id": "A100", "amount": 8.00 },
+            { "event_id": "evt-1", "type": "CHARGE", "order_id": "A100", "amount": 45.50 },
+            { "event_id": "evt-2", "type": "DASHER_PAY", "order_id": "A100", "amount": 8.00 },
+            { "type": "CHARGE", "order_id": "B200", "amount": 1.00 },
+            { "type": "CHARGE", "order_id": "B200", "amount": 1.00 }
+        ]
+    """
+    assert reconcile_transactions(input_json) == {'A100': 75.0, 'B200': 2.0}
+    for deduplicator in (ExactDeduplicator(max_memory_ids=1), BloomDeduplicator(1000), WindowedDeduplicator(10)):
+        assert reconcile_transactions(input_json, deduplicator) == {'A100': 37.5, 'B200': 2.0}
+        assert deduplicator.stats()["duplicates"] == 2
+        deduplicator.close()
+
+    writer = DictResultWriter()
+    reconcile_transactions_stream(io.StringIO(input_json), writer, deduplicator=WindowedDeduplicator(2))
+    assert writer.results == {'A100': 37.5, 'B200': 2.0}
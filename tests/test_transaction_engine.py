@@ -0,0 +1,69 @@
+import json
+
+from benchmarks.datasets import build_transaction_log
+from solutions.orders_net_total import calculate_orders_net_total as net_total
+from solutions.reconciliation import reconcile_transactions as reconcile
+from solutions.transaction_engine import (
+    AdjustmentAmountExtractor, Aggregation, net_profit_aggregation, net_total_aggregation, TransactionEventEngine
+)
+
+def test_adjustment_amount_extractor_matches_json_loads():
+    payloads = [
+        '{"reason": "Customer complaint", "amount": -5.00}', '{"amount":1}', '{"amount": 1e3, "amount": 2.5E-1}',
+        '{}', ' { "a" : true , "amount" : null } ', '{"amount": "5"}', '{"amount": -0}', '{"amount": [1]}',
+        '{"reason": "a \\"quoted\\" reason", "amount": 3}', '{"amount": 1, "nested": {"amount": 2}}',
+        '{"amount": 1.5,}', '{"amount": 01}', 'asfd'
+    ]
+    extractor = AdjustmentAmountExtractor()
+    for _ in range(2):
+        for payload in payloads:
+            try:
+                expected = json.loads(payload).get("amount", 0)
+            except json.JSONDecodeError:
+                expected = json.JSONDecodeError
+            try:
+                amount = extractor.amount(payload)
+            except json.JSONDecodeError:
+                amount = json.JSONDecodeError
+            assert amount == expected and type(amount) == type(expected)
+    # the invalid payloads are not cached
+    assert extractor.cache_hits == len(payloads) - 3
+    assert extractor.fast_path == 9
+
+def test_transaction_event_engine_matches_functions():
+    engine = TransactionEventEngine([net_total_aggregation(), net_profit_aggregation()])
+
+    log_json = json.dumps(build_transaction_log(5000, 71))
+    results = engine.run_json(log_json)
+    assert results["net_total"] == net_total(log_json)
+    assert results["net_profit"] == reconcile(log_json)
+
+    dollar_log = """[
+        {"event_id": "e-1", "type": "CHARGE", "order_id": "order-100", "amount": "$50.00"},
+        {"event_id": "e-2", "type": "AUTH", "dasher_id": "d-123"},
+        {"event_id": "e-3", "type": "CHARGE", "order_id": "order-200", "amount": "$$%!25.50"},
+        {"event_id": "e-4", "type": "REFUND", "order_id": "order-100", "amount": "$60.50"}
+    ]"""
+    # reconcile_transactions can not sum string amounts, only the net_total view runs on this log
+    assert TransactionEventEngine([net_total_aggregation()]).run_json(dollar_log) == {"net_total": net_total(dollar_log)}
+    assert net_total(dollar_log) == {"order-100": -10.5}
+    assert engine.run_json("asdf") == {"net_total": {}, "net_profit": {}}
+
+def test_transaction_event_engine_custom_aggregation():
+    # charges only, counted per order, next to the built in aggregations in the same pass
+    charge_count = Aggregation("charge_count", finish=lambda counts: {k: int(v) for k, v in counts.items()}) \
+        .on("CHARGE", lambda tr: 1)
+    engine = TransactionEventEngine([net_profit_aggregation(), charge_count])
+    try:
+        engine.register(net_profit_aggregation())
+        assert False
+    except ValueError:
+        pass
+
+    results = engine.run([
+        {"type": "CHARGE", "order_id": "A100", "amount": 45.50},
+        {"type": "CHARGE", "order_id": "A100", "amount": 4.50},
+        {"type": "DASHER_PAY", "order_id": "A100", "amount": 8.00},
+        "not an event"
+    ])
+    assert results == {"net_profit": {"A100": 42.0}, "charge_count": {"A100": 2}}